@@ -1,21 +1,28 @@
 import sys
 import csv
-import time
 import datetime
-import threading
 import json
+import time
 from pathlib import Path
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QTableWidget,
-                             QTableWidgetItem, QVBoxLayout, QWidget,
+                             QTableWidgetItem, QTableView, QVBoxLayout, QWidget,
                              QPushButton, QLabel, QTabWidget, QComboBox,
                              QToolBar, QLineEdit, QHBoxLayout, QMessageBox,
-                             QMenu, QTimeEdit, QCheckBox)
+                             QMenu, QTimeEdit, QAbstractItemView,
+                             QStyledItemDelegate)
 from PyQt6.QtCore import QTimer, Qt, QTime
-from PyQt6.QtGui import QAction, QColor
-import pandas as pd
-from playsound import playsound
-import MetaTrader5 as mt5
+from PyQt6.QtGui import QAction
 from zoneinfo import ZoneInfo
+from price_alert.audio import AlertAudioPlayer
+from price_alert.config import (PARAMETER_HEADERS, ParameterSets, Product, default_products,
+                                load_app_config, read_clock_options, read_product_list,
+                                write_product_list)
+from price_alert.engine import MonitorEngine
+from price_alert.event_log import EventLogWriter
+from price_alert.feeds import create_feed
+from price_alert.qt_models import PriceTableModel, ScheduleTableModel
+from price_alert.schedule import DAYS
+from price_alert.symbol_cache import SymbolMetaCache
 
 
 class NonScrollableComboBox(QComboBox):
@@ -79,71 +86,82 @@ class TimeEdit(QTimeEdit):
         event.ignore()
 
 
+class TimeEditDelegate(QStyledItemDelegate):
+    """以 TimeEdit 編輯以當日秒數儲存的欄位，編輯器只在編輯期間存在"""
+
+    def createEditor(self, parent, option, index):
+        return TimeEdit(parent)
+
+    def setEditorData(self, editor, index):
+        editor.setTime(QTime(0, 0, 0).addSecs(index.data(Qt.ItemDataRole.EditRole) or 0))
+
+    def setModelData(self, editor, model, index):
+        t = editor.time()
+        model.setData(index, t.hour() * 3600 + t.minute() * 60 + t.second(), Qt.ItemDataRole.EditRole)
+
+
+class DayComboDelegate(QStyledItemDelegate):
+    """以下拉選單編輯星期欄位"""
+
+    def createEditor(self, parent, option, index):
+        combo = NonScrollableComboBox(parent)
+        combo.addItems(DAYS)
+        return combo
+
+    def setEditorData(self, editor, index):
+        editor.setCurrentIndex(index.data(Qt.ItemDataRole.EditRole) or 0)
+
+    def setModelData(self, editor, model, index):
+        model.setData(index, editor.currentIndex(), Qt.ItemDataRole.EditRole)
+
+
+EDIT_TRIGGERS = (QAbstractItemView.EditTrigger.DoubleClicked |
+                 QAbstractItemView.EditTrigger.SelectedClicked |
+                 QAbstractItemView.EditTrigger.EditKeyPressed)
+
+
 class PriceMonitor(QMainWindow):
-    def __init__(self):
+    """MonitorEngine 的視窗介面；輪詢與警報判斷都在引擎中進行"""
+
+    def __init__(self, feed=None, engine=None, recorder=None):
         super().__init__()
         self.setWindowTitle("價格監控")
         self.setGeometry(100, 100, 1400, 800)
 
         self.tz = ZoneInfo("Asia/Shanghai")
         self.auto_fit_enabled = True
-        self.csv_lock = threading.Lock()
+        # 自動調整只在品種列表、品種資料或開關改變後的下一次顯示更新進行一次，
+        # 不在每次更新時逐格量測內容
+        self.fit_pending = True
         self.config_file = "app_config.json"
-
-        if not mt5.initialize():
-            print("無法初始化 MT5")
+        self.profile_options = {"duration": 30.0, "mode": "sample", "directory": "profiles"}
+
+        self.engine = engine or MonitorEngine(
+            feed or create_feed("mt5"), tz=self.tz, audio=AlertAudioPlayer(),
+            event_log=EventLogWriter(prefix="play_log", fmt="csv", tz=self.tz), recorder=recorder,
+            symbol_cache=SymbolMetaCache())
+        if not self.engine.open():
+            print(f"無法初始化報價來源 ({self.engine.feed.name})")
             sys.exit()
 
-        self.default_symbols = [
-            "XAUUSD", "XAGUSD", "PLT", "PAD", "COPPER", "IRON", "GAUCNH", "XALUSD",
-            "HKGHKD", "XNIUSD", "XZNUSD", "AUDUSD", "EURUSD", "GBPUSD", "NZDUSD",
-            "USDCAD", "USDCHF", "USDJPY", "EURJPY", "NZDJPY", "GBPJPY", "CADJPY",
-            "AUDJPY", "EURCHF", "EURGBP", "EURAUD", "GBPCHF", "GBPAUD", "AUDNZD",
-            "EURCAD", "EURNZD", "GBPCAD", "AUDCAD", "NZDCAD", "USDCNH", "HKDCNH",
-            "USOil", "UKOil", "NGAS", "CHINA300", "HK50", "JPN225", "A50", "STI",
-            "AS200", "INDIA50", "KS200", "SH50", "VN30", "DJ30", "SP500", "TECH100",
-            "RUSS2000", "USDINDEX", "GER30", "FRA40", "UK100", "EUR50", "EUR600",
-            "AEX25", "SOYBEAN", "CORN", "WHEAT", "COCOA", "COFFEE", "SUGAR", "COTTON",
-            "00005.HK", "AAPL", "BTCUSDT", "ETHUSDT"
-        ]
-
-        self.symbols = []
-        self.wav_paths = {}
-        self.wav_paths_resume = {}
-        self.custom_times = {}
-        self.alert_enabled = {}
         self.order_options = {}
-        self.symbol_digits = {}  # 新增：儲存每個交易品種的小數位數
+        self.parameter_sets = ParameterSets({})
 
         self.load_config()
         self.load_symbols_from_file()
-        self.load_symbol_digits()  # 新增：載入每個品種的 digits
         self.setup_ui()
         self.load_last_parameters()
 
-        self.last_prices = {}
-        self.running = False
-        self.csv_file = "MT5_Latest_Price_All.csv"
-
-        self.price_thread = None
         self.refresh_timer = QTimer()
         self.refresh_timer.timeout.connect(self.update_display)
         self.status_label.setText("狀態: 已停止")
 
+    @property
+    def symbols(self):
+        return self.engine.symbols
+
     def load_config(self):
-        if Path(self.config_file).exists():
-            try:
-                with open(self.config_file, 'r', encoding='utf-8') as f:
-                    config = json.load(f)
-                    self.last_product_path = config.get('product_path', str(Path('product_list.csv').absolute()))
-                    self.last_clock = config.get('clock', None)
-            except Exception as e:
-                print(f"載入配置錯誤: {e}")
-                self.last_product_path = str(Path('product_list.csv').absolute())
-                self.last_clock = None
-        else:
-            self.last_product_path = str(Path('product_list.csv').absolute())
-            self.last_clock = None
+        self.last_product_path, self.last_clock = load_app_config(self.config_file)
 
     def save_config(self):
         config = {
@@ -157,52 +175,34 @@ class PriceMonitor(QMainWindow):
             print(f"保存配置錯誤: {e}")
 
     def load_symbols_from_file(self):
-        product_file = self.last_product_path if hasattr(self, 'last_product_path') else "product_list.csv"
+        product_file = self.last_product_path
+        products = []
         if Path(product_file).exists():
             try:
-                with open(product_file, 'r') as f:
-                    reader = csv.reader(f)
-                    self.symbols = []
-                    self.wav_paths.clear()
-                    self.wav_paths_resume.clear()
-                    self.alert_enabled.clear()
-                    self.custom_times.clear()
-                    for row in reader:
-                        if row and row[0].strip():
-                            symbol = row[0].strip()
-                            self.symbols.append(symbol)
-                            self.wav_paths[symbol] = row[1].strip() if len(row) > 1 else ""
-                            self.wav_paths_resume[symbol] = row[2].strip() if len(row) > 2 else ""
-                            self.alert_enabled[symbol] = True
-                            self.custom_times[symbol] = "00:00:00"
+                products = read_product_list(product_file)
             except Exception as e:
                 print(f"載入產品列表錯誤: {e}。使用預設符號。")
-                self.symbols = self.default_symbols.copy()
-                self.wav_paths = {symbol: "" for symbol in self.default_symbols}
-                self.wav_paths_resume = {symbol: "" for symbol in self.default_symbols}
-                self.alert_enabled = {symbol: True for symbol in self.default_symbols}
-                self.custom_times = {symbol: "00:00:00" for symbol in self.default_symbols}
         else:
             print(f"找不到產品檔案 '{product_file}'。使用預設符號。")
-            self.symbols = self.default_symbols.copy()
-            self.wav_paths = {symbol: "" for symbol in self.default_symbols}
-            self.wav_paths_resume = {symbol: "" for symbol in self.default_symbols}
-            self.alert_enabled = {symbol: True for symbol in self.default_symbols}
-            self.custom_times = {symbol: "00:00:00" for symbol in self.default_symbols}
-
-    def load_symbol_digits(self):
-        """從 MT5 獲取每個交易品種的小數位數"""
-        for symbol in self.symbols:
-            try:
-                mt5.symbol_select(symbol, True)
-                info = mt5.symbol_info(symbol)
-                if info is not None:
-                    self.symbol_digits[symbol] = info.digits
-                else:
-                    self.symbol_digits[symbol] = 5  # 預設 5 位小數
-            except Exception as e:
-                print(f"無法獲取 {symbol} 的 digits: {e}")
-                self.symbol_digits[symbol] = 5  # 預設值
+        self.engine.set_products(products or default_products())
+
+    def set_products(self, products):
+        self.engine.set_products(products)
+        self.price_model.set_dicts(self.engine.alert_enabled, self.engine.tolerances)
+        self.rebuild_price_table()
+        self.rebuild_schedule_table()
+
+    def fill_product_table(self):
+        self.product_table.clearContents()
+        self.product_table.setRowCount(len(self.symbols))
+        for i, symbol in enumerate(self.symbols):
+            self.product_table.setItem(i, 0, QTableWidgetItem(symbol))
+            wav_item_stop = QTableWidgetItem(self.engine.wav_paths.get(symbol, ""))
+            wav_item_stop.setFlags(wav_item_stop.flags() | Qt.ItemFlag.ItemIsEditable)
+            self.product_table.setItem(i, 1, wav_item_stop)
+            wav_item_resume = QTableWidgetItem(self.engine.wav_paths_resume.get(symbol, ""))
+            wav_item_resume.setFlags(wav_item_resume.flags() | Qt.ItemFlag.ItemIsEditable)
+            self.product_table.setItem(i, 2, wav_item_resume)
 
     def load_product_list(self):
         file_path = self.product_path_input.text().strip() or "product_list.csv"
@@ -211,44 +211,15 @@ class PriceMonitor(QMainWindow):
             return
 
         try:
-            with open(file_path, 'r') as f:
-                reader = csv.reader(f)
-                new_symbols = []
-                self.wav_paths.clear()
-                self.wav_paths_resume.clear()
-                self.alert_enabled.clear()
-                old_custom_times = self.custom_times.copy()
-                self.custom_times.clear()
-
-                for row in reader:
-                    if row and row[0].strip():
-                        symbol = row[0].strip()
-                        new_symbols.append(symbol)
-                        self.wav_paths[symbol] = row[1].strip() if len(row) > 1 else ""
-                        self.wav_paths_resume[symbol] = row[2].strip() if len(row) > 2 else ""
-                        self.alert_enabled[symbol] = True
-                        self.custom_times[symbol] = old_custom_times.get(symbol, "00:00:00")
-
-                if not new_symbols:
-                    QMessageBox.warning(self, "警告", "檔案為空或無有效符號!")
-                    return
-
-                self.symbols = new_symbols
-                self.load_symbol_digits()  # 更新 digits
-                self.rebuild_price_table()
-                self.rebuild_schedule_table()
-                self.product_table.clearContents()
-                self.product_table.setRowCount(len(self.symbols))
-                for i, symbol in enumerate(self.symbols):
-                    self.product_table.setItem(i, 0, QTableWidgetItem(symbol))
-                    wav_item_stop = QTableWidgetItem(self.wav_paths[symbol])
-                    wav_item_stop.setFlags(wav_item_stop.flags() | Qt.ItemFlag.ItemIsEditable)
-                    self.product_table.setItem(i, 1, wav_item_stop)
-                    wav_item_resume = QTableWidgetItem(self.wav_paths_resume[symbol])
-                    wav_item_resume.setFlags(wav_item_resume.flags() | Qt.ItemFlag.ItemIsEditable)
-                    self.product_table.setItem(i, 2, wav_item_resume)
-
-                QMessageBox.information(self, "成功", f"已從 '{file_path}' 載入產品列表")
+            products = read_product_list(file_path)
+            if not products:
+                QMessageBox.warning(self, "警告", "檔案為空或無有效符號!")
+                return
+
+            self.set_products(products)
+            self.fill_product_table()
+
+            QMessageBox.information(self, "成功", f"已從 '{file_path}' 載入產品列表")
         except Exception as e:
             QMessageBox.critical(self, "錯誤", f"載入產品列表失敗: {str(e)}")
 
@@ -276,8 +247,7 @@ class PriceMonitor(QMainWindow):
 
         product_path_layout = QHBoxLayout()
         product_path_layout.addWidget(QLabel("產品列表:"))
-        self.product_path_input = QLineEdit(
-            self.last_product_path if hasattr(self, 'last_product_path') else str(Path('product_list.csv').absolute()))
+        self.product_path_input = QLineEdit(self.last_product_path)
         self.product_path_input.setMinimumWidth(300)
         product_path_layout.addWidget(self.product_path_input)
 
@@ -303,96 +273,44 @@ class PriceMonitor(QMainWindow):
         main_layout.addLayout(path_layout)
 
     def load_last_parameters(self):
-        if hasattr(self, 'last_clock') and self.last_clock and self.last_clock in self.order_options:
-            param_path = self.order_options[self.last_clock]
+        if self.last_clock and self.last_clock in self.parameter_sets:
+            param_path = self.parameter_sets.path(self.last_clock)
             if Path(param_path).exists():
-                self.apply_clock_parameters_from_file(param_path)
+                try:
+                    self.engine.apply_parameter_set(self.parameter_sets.get(self.last_clock))
+                except Exception as e:
+                    print(f"載入參數失敗 {param_path}: {str(e)}")
+                self.refresh_parameter_views()
                 self.clock_combo.setCurrentText(self.last_clock)
 
-    def apply_clock_parameters_from_file(self, param_path):
-        try:
-            with open(param_path, 'r') as f:
-                reader = csv.reader(f)
-                headers = next(reader)
-                for row in reader:
-                    if not row or len(row) < 13:
-                        continue
-                    symbol = row[0].strip()
-                    if symbol not in self.symbols:
-                        continue
-
-                    row_idx = self.symbols.index(symbol)
-
-                    time_tolerance = QTime.fromString(row[1].strip(), "HH:mm:ss")
-                    if not time_tolerance.isValid():
-                        time_tolerance = QTime.fromString(row[1].strip(), "h:mm:ss")
-                    if time_tolerance.isValid():
-                        self.price_table.cellWidget(row_idx, 6).setTime(time_tolerance)
-                        self.custom_times[symbol] = time_tolerance.toString("HH:mm:ss")
-
-                    self.schedule_table.setItem(row_idx, 1, QTableWidgetItem(row[2]))
-                    self.schedule_table.cellWidget(row_idx, 2).setCurrentText(row[3])
-
-                    start_time = QTime.fromString(row[4].strip(), "HH:mm:ss")
-                    if not start_time.isValid():
-                        start_time = QTime.fromString(row[4].strip(), "h:mm:ss")
-                    if start_time.isValid():
-                        self.schedule_table.cellWidget(row_idx, 3).setTime(start_time)
-
-                    self.schedule_table.cellWidget(row_idx, 4).setCurrentText(row[5])
-
-                    end_time = QTime.fromString(row[6].strip(), "HH:mm:ss")
-                    if not end_time.isValid():
-                        end_time = QTime.fromString(row[6].strip(), "h:mm:ss")
-                    if end_time.isValid():
-                        self.schedule_table.cellWidget(row_idx, 5).setTime(end_time)
-
-                    for col, value in zip(range(6, 12), row[7:13]):
-                        break_time = QTime.fromString(value.strip(), "HH:mm:ss")
-                        if not break_time.isValid():
-                            break_time = QTime.fromString(value.strip(), "h:mm:ss")
-                        if break_time.isValid():
-                            self.schedule_table.cellWidget(row_idx, col).setTime(break_time)
-        except Exception as e:
-            print(f"載入參數失敗 {param_path}: {str(e)}")
+    def refresh_parameter_views(self):
+        self.engine.invalidate()
+        self.price_model.refresh_tolerances()
+        self.schedule_model.refresh()
 
     def create_price_tab(self):
         price_tab = QWidget()
         price_layout = QVBoxLayout(price_tab)
 
+        status_layout = QHBoxLayout()
         self.status_label = QLabel("最後更新: 尚未更新 | 狀態: 已停止")
-        price_layout.addWidget(self.status_label)
-
-        self.price_table = QTableWidget()
-        self.price_table.setColumnCount(10)
-        self.price_table.setRowCount(len(self.symbols))
-        self.price_table.setHorizontalHeaderLabels(
-            ["", "交易品種", "時間", "買價", "賣價", "時間差", "時間容忍度", "狀態", "警報", "語音警報"])
-
-        for i, symbol in enumerate(self.symbols):
-            checkbox = QCheckBox()
-            checkbox.setChecked(self.alert_enabled.get(symbol, True))
-            checkbox.stateChanged.connect(
-                lambda state, s=symbol: self.alert_enabled.__setitem__(s, state == Qt.CheckState.Checked.value))
-            self.price_table.setCellWidget(i, 0, checkbox)
-
-            self.price_table.setItem(i, 1, QTableWidgetItem(symbol))
-
-            time_tolerance_edit = TimeEdit()
-            time_tolerance_edit.setTime(QTime.fromString(self.custom_times.get(symbol, "00:00:00"), "HH:mm:ss"))
-            self.price_table.setCellWidget(i, 6, time_tolerance_edit)
-
-            status_item = QTableWidgetItem("關閉")
-            status_item.setBackground(QColor(255, 200, 200))
-            self.price_table.setItem(i, 7, status_item)
-
-            alert_item = QTableWidgetItem("關閉")
-            alert_item.setBackground(QColor(255, 200, 200))
-            self.price_table.setItem(i, 8, alert_item)
-
-            voice_alert_item = QTableWidgetItem("")
-            voice_alert_item.setFlags(voice_alert_item.flags() | Qt.ItemFlag.ItemIsEditable)
-            self.price_table.setItem(i, 9, voice_alert_item)
+        status_layout.addWidget(self.status_label)
+        status_layout.addStretch()
+        self.metrics_label = QLabel("")
+        status_layout.addWidget(self.metrics_label)
+        price_layout.addLayout(status_layout)
+
+        self.price_model = PriceTableModel(self.tz, self.engine.alert_enabled, self.engine.tolerances, self)
+        self.price_model.set_digits(self.engine.symbol_digits)
+        self.price_model.set_symbols(self.symbols)
+        self.price_model.voiceEdited.connect(self.on_voice_edited)
+        self.price_model.settingsEdited.connect(lambda row: self.engine.invalidate([row]))
+        self.display_version = 0
+        self.metadata_version = self.engine.metadata_version
+        self.price_table = QTableView()
+        self.price_table.setModel(self.price_model)
+        self.price_table.setEditTriggers(EDIT_TRIGGERS)
+        self.price_table.setItemDelegateForColumn(PriceTableModel.COL_TOLERANCE, TimeEditDelegate(self.price_table))
 
         self.price_table.setColumnWidth(9, 100)
         price_layout.addWidget(self.price_table)
@@ -402,48 +320,17 @@ class PriceMonitor(QMainWindow):
         schedule_tab = QWidget()
         schedule_layout = QVBoxLayout(schedule_tab)
 
-        self.schedule_table = QTableWidget()
-        self.schedule_table.setColumnCount(12)
-        self.schedule_table.setRowCount(len(self.symbols))
-        self.schedule_table.setHorizontalHeaderLabels([
-            "交易品種", "產品組", "開始日", "開始時間", "結束日", "結束時間",
-            "休息1開始", "休息1結束", "休息2開始", "休息2結束",
-            "休息3開始", "休息3結束"
-        ])
-
-        days = ["星期一", "星期二", "星期三", "星期四", "星期五", "星期六", "星期日"]
-
-        for i, symbol in enumerate(self.symbols):
-            self.schedule_table.setItem(i, 0, QTableWidgetItem(symbol))
-
-            item = QTableWidgetItem("")
-            item.setFlags(item.flags() | Qt.ItemFlag.ItemIsEditable)
-            self.schedule_table.setItem(i, 1, item)
-
-            start_day_combo = NonScrollableComboBox()
-            start_day_combo.addItems(days)
-            self.schedule_table.setCellWidget(i, 2, start_day_combo)
-
-            start_time_edit = TimeEdit()
-            start_time_edit.setTime(QTime(0, 0, 0))
-            self.schedule_table.setCellWidget(i, 3, start_time_edit)
-
-            end_day_combo = NonScrollableComboBox()
-            end_day_combo.addItems(days)
-            self.schedule_table.setCellWidget(i, 4, end_day_combo)
-
-            end_time_edit = TimeEdit()
-            end_time_edit.setTime(QTime(0, 0, 0))
-            self.schedule_table.setCellWidget(i, 5, end_time_edit)
-
-            for col in range(6, 12, 2):
-                start_edit = TimeEdit()
-                start_edit.setTime(QTime(0, 0, 0))
-                self.schedule_table.setCellWidget(i, col, start_edit)
-
-                end_edit = TimeEdit()
-                end_edit.setTime(QTime(0, 0, 0))
-                self.schedule_table.setCellWidget(i, col + 1, end_edit)
+        self.schedule_model = ScheduleTableModel(self.engine, self)
+        self.schedule_model.set_symbols(self.symbols)
+        self.schedule_table = QTableView()
+        self.schedule_table.setModel(self.schedule_model)
+        self.schedule_table.setEditTriggers(EDIT_TRIGGERS)
+        day_delegate = DayComboDelegate(self.schedule_table)
+        time_delegate = TimeEditDelegate(self.schedule_table)
+        for col in ScheduleTableModel.DAY_COLUMNS:
+            self.schedule_table.setItemDelegateForColumn(col, day_delegate)
+        for col in ScheduleTableModel.TIME_COLUMNS:
+            self.schedule_table.setItemDelegateForColumn(col, time_delegate)
 
         schedule_layout.addWidget(self.schedule_table)
 
@@ -472,19 +359,10 @@ class PriceMonitor(QMainWindow):
 
         self.product_table = QTableWidget()
         self.product_table.setColumnCount(3)
-        self.product_table.setRowCount(len(self.symbols))
         self.product_table.setHorizontalHeaderLabels(["交易品種", "WAV路徑（停價）", "WAV路徑（報價恢復）"])
         self.product_table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
         self.product_table.setSelectionMode(QTableWidget.SelectionMode.SingleSelection)
-
-        for i, symbol in enumerate(self.symbols):
-            self.product_table.setItem(i, 0, QTableWidgetItem(symbol))
-            wav_item_stop = QTableWidgetItem(self.wav_paths.get(symbol, ""))
-            wav_item_stop.setFlags(wav_item_stop.flags() | Qt.ItemFlag.ItemIsEditable)
-            self.product_table.setItem(i, 1, wav_item_stop)
-            wav_item_resume = QTableWidgetItem(self.wav_paths_resume.get(symbol, ""))
-            wav_item_resume.setFlags(wav_item_resume.flags() | Qt.ItemFlag.ItemIsEditable)
-            self.product_table.setItem(i, 2, wav_item_resume)
+        self.fill_product_table()
 
         product_layout.addWidget(self.product_table)
 
@@ -519,137 +397,29 @@ class PriceMonitor(QMainWindow):
         self.tabs.addTab(product_tab, "產品列表")
 
     def rebuild_price_table(self):
-        old_tolerance = {symbol: self.custom_times.get(symbol, "00:00:00") for symbol in self.symbols}
-        self.price_table.clearContents()
-        self.price_table.setRowCount(len(self.symbols))
-
-        for i, symbol in enumerate(self.symbols):
-            checkbox = QCheckBox()
-            checkbox.setChecked(self.alert_enabled.get(symbol, True))
-            checkbox.stateChanged.connect(
-                lambda state, s=symbol: self.alert_enabled.__setitem__(s, state == Qt.CheckState.Checked.value))
-            self.price_table.setCellWidget(i, 0, checkbox)
-
-            self.price_table.setItem(i, 1, QTableWidgetItem(symbol))
-
-            time_tolerance_edit = TimeEdit()
-            time_tolerance_edit.setTime(QTime.fromString(old_tolerance.get(symbol, "00:00:00"), "HH:mm:ss"))
-            self.price_table.setCellWidget(i, 6, time_tolerance_edit)
-
-            status_item = QTableWidgetItem("關閉")
-            status_item.setBackground(QColor(255, 200, 200))
-            self.price_table.setItem(i, 7, status_item)
-
-            alert_item = QTableWidgetItem("關閉")
-            alert_item.setBackground(QColor(255, 200, 200))
-            self.price_table.setItem(i, 8, alert_item)
-
-            voice_alert_item = QTableWidgetItem("")
-            voice_alert_item.setFlags(voice_alert_item.flags() | Qt.ItemFlag.ItemIsEditable)
-            self.price_table.setItem(i, 9, voice_alert_item)
+        self.price_model.set_symbols(self.symbols)
+        self.display_version = 0
+        self.fit_pending = True
 
         self.price_table.setColumnWidth(9, 100)
         self.price_table.resizeColumnsToContents()
         self.price_table.resizeRowsToContents()
 
     def rebuild_schedule_table(self):
-        old_schedule = {}
-        for i in range(self.schedule_table.rowCount()):
-            symbol = self.schedule_table.item(i, 0).text()
-            product_group = self.schedule_table.item(i, 1).text() if self.schedule_table.item(i, 1) else ""
-            start_day = self.schedule_table.cellWidget(i, 2).currentText()
-            start_time = self.schedule_table.cellWidget(i, 3).time().toString("HH:mm:ss")
-            end_day = self.schedule_table.cellWidget(i, 4).currentText()
-            end_time = self.schedule_table.cellWidget(i, 5).time().toString("HH:mm:ss")
-            breaks = [(self.schedule_table.cellWidget(i, col).time().toString("HH:mm:ss"),
-                       self.schedule_table.cellWidget(i, col + 1).time().toString("HH:mm:ss"))
-                      for col in range(6, 12, 2)]
-            old_schedule[symbol] = (product_group, start_day, start_time, end_day, end_time, breaks)
-
-        self.schedule_table.clearContents()
-        self.schedule_table.setRowCount(len(self.symbols))
-
-        days = ["星期一", "星期二", "星期三", "星期四", "星期五", "星期六", "星期日"]
-
-        for i, symbol in enumerate(self.symbols):
-            self.schedule_table.setItem(i, 0, QTableWidgetItem(symbol))
-
-            item = QTableWidgetItem("")
-            item.setFlags(item.flags() | Qt.ItemFlag.ItemIsEditable)
-            self.schedule_table.setItem(i, 1, item)
-
-            start_day_combo = NonScrollableComboBox()
-            start_day_combo.addItems(days)
-            self.schedule_table.setCellWidget(i, 2, start_day_combo)
-
-            start_time_edit = TimeEdit()
-            start_time_edit.setTime(QTime(0, 0, 0))
-            self.schedule_table.setCellWidget(i, 3, start_time_edit)
-
-            end_day_combo = NonScrollableComboBox()
-            end_day_combo.addItems(days)
-            self.schedule_table.setCellWidget(i, 4, end_day_combo)
-
-            end_time_edit = TimeEdit()
-            end_time_edit.setTime(QTime(0, 0, 0))
-            self.schedule_table.setCellWidget(i, 5, end_time_edit)
-
-            for col in range(6, 12, 2):
-                start_edit = TimeEdit()
-                start_edit.setTime(QTime(0, 0, 0))
-                self.schedule_table.setCellWidget(i, col, start_edit)
-
-                end_edit = TimeEdit()
-                end_edit.setTime(QTime(0, 0, 0))
-                self.schedule_table.setCellWidget(i, col + 1, end_edit)
-
-            if symbol in old_schedule:
-                product_group, start_day, start_time, end_day, end_time, breaks = old_schedule[symbol]
-                self.schedule_table.item(i, 1).setText(product_group)
-                self.schedule_table.cellWidget(i, 2).setCurrentText(start_day)
-                self.schedule_table.cellWidget(i, 3).setTime(QTime.fromString(start_time, "HH:mm:ss"))
-                self.schedule_table.cellWidget(i, 4).setCurrentText(end_day)
-                self.schedule_table.cellWidget(i, 5).setTime(QTime.fromString(end_time, "HH:mm:ss"))
-                for col, (break_start, break_end) in zip(range(6, 12, 2), breaks):
-                    self.schedule_table.cellWidget(i, col).setTime(QTime.fromString(break_start, "HH:mm:ss"))
-                    self.schedule_table.cellWidget(i, col + 1).setTime(QTime.fromString(break_end, "HH:mm:ss"))
-
+        self.schedule_model.set_symbols(self.symbols)
         self.schedule_table.resizeColumnsToContents()
         self.schedule_table.resizeRowsToContents()
 
     def save_product_list(self):
         file_path = self.product_path_input.text().strip() or "product_list.csv"
         try:
-            with open(file_path, 'w', newline='') as f:
-                writer = csv.writer(f)
-                for row in range(self.product_table.rowCount()):
-                    symbol = self.product_table.item(row, 0).text()
-                    wav_path_stop = self.product_table.item(row, 1).text() if self.product_table.item(row, 1) else ""
-                    wav_path_resume = self.product_table.item(row, 2).text() if self.product_table.item(row, 2) else ""
-                    if symbol:
-                        writer.writerow([symbol, wav_path_stop, wav_path_resume])
+            write_product_list(file_path, self.products_from_table())
             QMessageBox.information(self, "成功", f"產品列表已保存至 '{file_path}'")
         except Exception as e:
             QMessageBox.critical(self, "錯誤", f"保存產品列表失敗: {str(e)}")
 
     def save_parameters(self):
-        data = []
-        for row in range(self.schedule_table.rowCount()):
-            row_data = []
-            row_data.append(self.schedule_table.item(row, 0).text())
-            time_tolerance_edit = self.price_table.cellWidget(row, 6)
-            row_data.append(time_tolerance_edit.time().toString("HH:mm:ss") if time_tolerance_edit else "00:00:00")
-            row_data.append(self.schedule_table.item(row, 1).text() if self.schedule_table.item(row, 1) else "")
-            row_data.append(self.schedule_table.cellWidget(row, 2).currentText())
-            start_time_edit = self.schedule_table.cellWidget(row, 3)
-            row_data.append(start_time_edit.time().toString("HH:mm:ss") if start_time_edit else "00:00:00")
-            row_data.append(self.schedule_table.cellWidget(row, 4).currentText())
-            end_time_edit = self.schedule_table.cellWidget(row, 5)
-            row_data.append(end_time_edit.time().toString("HH:mm:ss") if end_time_edit else "00:00:00")
-            for col in range(6, 12):
-                time_edit = self.schedule_table.cellWidget(row, col)
-                row_data.append(time_edit.time().toString("HH:mm:ss") if time_edit else "00:00:00")
-            data.append(row_data)
+        data = self.engine.parameter_rows()
 
         selected_clock = self.clock_combo.currentText()
         if selected_clock in self.order_options:
@@ -662,9 +432,7 @@ class PriceMonitor(QMainWindow):
         try:
             with open(file_path, "w", newline="") as f:
                 writer = csv.writer(f)
-                writer.writerow(["交易品種", "時間容忍度", "產品組", "開始日", "開始時間",
-                                 "結束日", "結束時間", "休息1開始", "休息1結束",
-                                 "休息2開始", "休息2結束", "休息3開始", "休息3結束"])
+                writer.writerow(PARAMETER_HEADERS)
                 writer.writerows(data)
             QMessageBox.information(self, "成功", f"參數已保存至 '{file_path}'")
         except Exception as e:
@@ -720,53 +488,37 @@ class PriceMonitor(QMainWindow):
             self.product_table.setItem(current_row + 1, 2, wav_item_resume)
             self.product_table.setCurrentCell(current_row + 1, 0)
 
-    def apply_product_changes(self):
-        new_symbols = []
-        self.wav_paths.clear()
-        self.wav_paths_resume.clear()
-        self.alert_enabled.clear()
-        old_custom_times = self.custom_times.copy()
-        self.custom_times.clear()
-
+    def products_from_table(self):
+        products = []
         for row in range(self.product_table.rowCount()):
             symbol_item = self.product_table.item(row, 0)
             wav_item_stop = self.product_table.item(row, 1)
             wav_item_resume = self.product_table.item(row, 2)
             if symbol_item and symbol_item.text():
-                symbol = symbol_item.text()
-                new_symbols.append(symbol)
-                self.wav_paths[symbol] = wav_item_stop.text() if wav_item_stop else ""
-                self.wav_paths_resume[symbol] = wav_item_resume.text() if wav_item_resume else ""
-                self.alert_enabled[symbol] = True
-                self.custom_times[symbol] = old_custom_times.get(symbol, "00:00:00")
-
-        if not new_symbols:
+                products.append(Product(symbol_item.text(),
+                                        wav_item_stop.text() if wav_item_stop else "",
+                                        wav_item_resume.text() if wav_item_resume else ""))
+        return products
+
+    def apply_product_changes(self):
+        products = self.products_from_table()
+        if not products:
             QMessageBox.warning(self, "警告", "產品列表不能為空!")
             return
 
-        self.symbols = new_symbols
-        self.load_symbol_digits()  # 更新 digits
+        self.set_products(products)
         self.save_product_list()
-        self.rebuild_price_table()
-        self.rebuild_schedule_table()
 
         QMessageBox.information(self, "成功", "產品列表更新成功!")
 
     def load_clock_options(self):
-        clock_file = "clock_change.txt"
         self.order_options = {}
 
         try:
-            if Path(clock_file).exists():
-                with open(clock_file, 'r', encoding='utf-8') as f:
-                    lines = f.readlines()
-                    self.clock_combo.clear()
-                    for line in lines:
-                        line = line.strip()
-                        if line and ',' in line:
-                            clock_name, param_path = line.split(',', 1)
-                            self.order_options[clock_name.strip()] = param_path.strip()
-                            self.clock_combo.addItem(clock_name.strip())
+            self.order_options = read_clock_options("clock_change.txt")
+            self.parameter_sets = ParameterSets(self.order_options)
+            self.clock_combo.clear()
+            self.clock_combo.addItems(list(self.order_options))
             if self.clock_combo.count() == 0:
                 self.clock_combo.addItem("無可用轉令")
         except Exception as e:
@@ -775,68 +527,12 @@ class PriceMonitor(QMainWindow):
 
     def apply_clock_parameters(self):
         selected_clock = self.clock_combo.currentText()
-        if selected_clock in self.order_options:
-            param_path = self.order_options[selected_clock]
+        if selected_clock in self.parameter_sets:
+            param_path = self.parameter_sets.path(selected_clock)
             if Path(param_path).exists():
                 try:
-                    old_params = {}
-                    for i in range(self.schedule_table.rowCount()):
-                        symbol = self.schedule_table.item(i, 0).text()
-                        time_tolerance = self.price_table.cellWidget(i, 6).time().toString("HH:mm:ss")
-                        product_group = self.schedule_table.item(i, 1).text() if self.schedule_table.item(i, 1) else ""
-                        start_day = self.schedule_table.cellWidget(i, 2).currentText()
-                        start_time = self.schedule_table.cellWidget(i, 3).time().toString("HH:mm:ss")
-                        end_day = self.schedule_table.cellWidget(i, 4).currentText()
-                        end_time = self.schedule_table.cellWidget(i, 5).time().toString("HH:mm:ss")
-                        breaks = [(self.schedule_table.cellWidget(i, col).time().toString("HH:mm:ss"),
-                                   self.schedule_table.cellWidget(i, col + 1).time().toString("HH:mm:ss"))
-                                  for col in range(6, 12, 2)]
-                        old_params[symbol] = (time_tolerance, product_group, start_day, start_time,
-                                              end_day, end_time, breaks)
-
-                    with open(param_path, 'r') as f:
-                        reader = csv.reader(f)
-                        headers = next(reader)
-                        for row in reader:
-                            if not row or len(row) < 13:
-                                continue
-                            symbol = row[0].strip()
-                            if symbol not in self.symbols:
-                                continue
-
-                            row_idx = self.symbols.index(symbol)
-
-                            time_tolerance = QTime.fromString(row[1].strip(), "HH:mm:ss")
-                            if not time_tolerance.isValid():
-                                time_tolerance = QTime.fromString(row[1].strip(), "h:mm:ss")
-                            if time_tolerance.isValid():
-                                self.price_table.cellWidget(row_idx, 6).setTime(time_tolerance)
-                                self.custom_times[symbol] = time_tolerance.toString("HH:mm:ss")
-
-                            self.schedule_table.setItem(row_idx, 1, QTableWidgetItem(row[2]))
-                            self.schedule_table.cellWidget(row_idx, 2).setCurrentText(row[3])
-
-                            start_time = QTime.fromString(row[4].strip(), "HH:mm:ss")
-                            if not start_time.isValid():
-                                start_time = QTime.fromString(row[4].strip(), "h:mm:ss")
-                            if start_time.isValid():
-                                self.schedule_table.cellWidget(row_idx, 3).setTime(start_time)
-
-                            self.schedule_table.cellWidget(row_idx, 4).setCurrentText(row[5])
-
-                            end_time = QTime.fromString(row[6].strip(), "HH:mm:ss")
-                            if not end_time.isValid():
-                                end_time = QTime.fromString(row[6].strip(), "h:mm:ss")
-                            if end_time.isValid():
-                                self.schedule_table.cellWidget(row_idx, 5).setTime(end_time)
-
-                            for col, value in zip(range(6, 12), row[7:13]):
-                                break_time = QTime.fromString(value.strip(), "HH:mm:ss")
-                                if not break_time.isValid():
-                                    break_time = QTime.fromString(value.strip(), "h:mm:ss")
-                                if break_time.isValid():
-                                    self.schedule_table.cellWidget(row_idx, col).setTime(break_time)
-
+                    self.engine.apply_parameter_set(self.parameter_sets.get(selected_clock))
+                    self.refresh_parameter_views()
                     QMessageBox.information(self, "成功", f"已應用轉令 '{selected_clock}' 的參數")
                 except Exception as e:
                     QMessageBox.critical(self, "錯誤", f"應用轉令參數失敗: {str(e)}")
@@ -846,248 +542,74 @@ class PriceMonitor(QMainWindow):
             QMessageBox.warning(self, "警告", "請選擇有效的轉令")
 
     def update_display(self):
+        started = time.perf_counter()
+        with self.engine.profiler.section("display"):
+            self.refresh_display()
+        metrics = self.engine.metrics
+        metrics.display_refresh_ms.observe((time.perf_counter() - started) * 1000)
+        self.metrics_label.setText(metrics.summary_text(self.engine.poll_scheduler.overruns))
+        if self.profile_action.isChecked() != self.engine.profiler.running:
+            self.profile_action.setChecked(self.engine.profiler.running)
+
+    def refresh_display(self):
         try:
-            with self.csv_lock:
-                if Path(self.csv_file).exists():
-                    df = pd.read_csv(self.csv_file)
-                    current_time = datetime.datetime.now(tz=self.tz)
-
-                    for i, row in df.iterrows():
-                        row_idx = self.symbols.index(row['Symbol'])
-                        symbol_time = datetime.datetime.strptime(row['Time'], '%Y-%m-%d %H:%M:%S').replace(
-                            tzinfo=self.tz)
-
-                        self.price_table.setItem(row_idx, 2, QTableWidgetItem(row['Time']))
-                        # 格式化 Bid 和 Ask 根據品種的 digits
-                        digits = self.symbol_digits.get(row['Symbol'], 5)
-                        self.price_table.setItem(row_idx, 3, QTableWidgetItem(f"{row['Bid']:.{digits}f}"))
-                        self.price_table.setItem(row_idx, 4, QTableWidgetItem(f"{row['Ask']:.{digits}f}"))
-
-                        time_diff = current_time - symbol_time
-                        if time_diff.total_seconds() < 0:
-                            time_diff = datetime.timedelta(seconds=0)
-                        time_diff_str = str(time_diff).split('.')[0]
-                        self.price_table.setItem(row_idx, 5, QTableWidgetItem(time_diff_str))
-
-                        is_trading_now = self.is_trading(row_idx, current_time)
-                        status_item = self.price_table.item(row_idx, 7)
-                        if not status_item:
-                            status_item = QTableWidgetItem()
-                            self.price_table.setItem(row_idx, 7, status_item)
-
-                        if is_trading_now:
-                            status_item.setText("交易中")
-                            status_item.setBackground(Qt.GlobalColor.green)
-                        else:
-                            status_item.setText("關閉")
-                            status_item.setBackground(QColor(255, 200, 200))
-
-                        alert_item = self.price_table.item(row_idx, 8)
-                        if not alert_item:
-                            alert_item = QTableWidgetItem()
-                            self.price_table.setItem(row_idx, 8, alert_item)
-
-                        time_tolerance_edit = self.price_table.cellWidget(row_idx, 6)
-                        tolerance_time = QTime.fromString(time_tolerance_edit.time().toString("HH:mm:ss"), "HH:mm:ss")
-                        time_diff_seconds = time_diff.total_seconds()
-                        tolerance_seconds = tolerance_time.hour() * 3600 + tolerance_time.minute() * 60 + tolerance_time.second()
-
-                        symbol = row['Symbol']
-                        voice_alert_item = self.price_table.item(row_idx, 9)
-                        if not voice_alert_item:
-                            voice_alert_item = QTableWidgetItem("")
-                            voice_alert_item.setFlags(voice_alert_item.flags() | Qt.ItemFlag.ItemIsEditable)
-                            self.price_table.setItem(row_idx, 9, voice_alert_item)
-
-                        if (self.alert_enabled[symbol] and
-                                is_trading_now and
-                                time_diff_seconds > tolerance_seconds):
-                            alert_item.setText("開啟")
-                            alert_item.setBackground(Qt.GlobalColor.green)
-                            if voice_alert_item.text() != "已播放":
-                                wav_path = self.wav_paths.get(symbol, "")
-                                if wav_path and Path(wav_path).exists():
-                                    try:
-                                        threading.Thread(target=playsound, args=(wav_path,), daemon=True).start()
-                                        self.log_play_event(symbol, current_time.strftime('%Y-%m-%d %H:%M:%S'))
-                                        voice_alert_item.setText("已播放")
-                                    except Exception as e:
-                                        print(f"播放 {symbol} 的 WAV 失敗: {str(e)}")
-                        else:
-                            alert_item.setText("關閉")
-                            alert_item.setBackground(QColor(255, 200, 200))
-
-                        if (self.alert_enabled[symbol] and
-                                is_trading_now and
-                                time_diff_seconds < tolerance_seconds and
-                                voice_alert_item.text() == "已播放"):
-                            voice_alert_item.setText("")
-                            wav_path_resume = self.wav_paths_resume.get(symbol, "")
-                            if wav_path_resume and Path(wav_path_resume).exists():
-                                try:
-                                    threading.Thread(target=playsound, args=(wav_path_resume,), daemon=True).start()
-                                    self.log_play_event(symbol, current_time.strftime('%Y-%m-%d %H:%M:%S'))
-                                except Exception as e:
-                                    print(f"播放 {symbol} 的恢復 WAV 失敗: {str(e)}")
-
-                    self.status_label.setText(
-                        f"最後更新: {current_time.strftime('%Y-%m-%d %H:%M:%S')} | 狀態: 運行中"
-                    )
-                    if self.auto_fit_enabled:
-                        self.resize_table_columns()
-
-        except Exception as e:
-            print(f"顯示更新錯誤: {str(e)}")
+            version, symbols, table = self.engine.snapshot.read()
+            current_time = datetime.datetime.now(tz=self.tz)
+            model = self.price_model
+            if len(symbols) != model.rowCount():
+                return
 
-    def monitor_prices(self):
-        while self.running:
-            with self.csv_lock:
-                with open(self.csv_file, 'w', newline='') as f:
-                    writer = csv.writer(f)
-                    writer.writerow(["Symbol", "Time", "Bid", "Ask"])
-
-                    for symbol in self.symbols:
-                        try:
-                            mt5.symbol_select(symbol, True)
-                            tick = mt5.symbol_info_tick(symbol)
-                            if tick is not None:
-                                now = datetime.datetime.now(tz=self.tz)
-                                tick_time = datetime.datetime.fromtimestamp(tick.time, tz=self.tz)
-                                if tick_time > now:
-                                    tick_time = now
-                                current_bid = tick.bid
-                                current_ask = tick.ask
-
-                                writer.writerow(
-                                    [symbol, tick_time.strftime('%Y-%m-%d %H:%M:%S'), current_bid, current_ask])
-                                self.last_prices[symbol] = {'bid': current_bid, 'ask': current_ask}
-
-                                self.check_alert_conditions(symbol, current_bid, current_ask)
-
-                        except Exception as e:
-                            print(f"處理 {symbol} 時出錯: {str(e)}")
-
-            time.sleep(0.1)
-
-    def check_alert_conditions(self, symbol, bid, ask):
-        config_file = "alert_config.csv"
-        if Path(config_file).exists():
-            df = pd.read_csv(config_file)
-            symbol_config = df[df['symbol'] == symbol]
-            if not symbol_config.empty and symbol_config['condition'].iloc[0] == "ON":
-                wav_path = symbol_config['wav_path'].iloc[0]
-                if Path(wav_path).exists():
-                    threading.Thread(target=playsound, args=(wav_path,), daemon=True).start()
-                    self.log_play_event(symbol, datetime.datetime.now(tz=self.tz).strftime('%Y-%m-%d %H:%M:%S'))
-
-    def log_play_event(self, symbol, timestamp):
-        with open("play_log.txt", "a") as f:
-            f.write(f"{timestamp},{symbol},1\n")
-
-    def is_trading(self, row, current_time):
-        symbol = self.schedule_table.item(row, 0).text()
-        start_day = self.schedule_table.cellWidget(row, 2).currentText()
-        start_time_edit = self.schedule_table.cellWidget(row, 3)
-        start_time_str = start_time_edit.time().toString("HH:mm:ss") if start_time_edit else "00:00:00"
-
-        end_day = self.schedule_table.cellWidget(row, 4).currentText()
-        end_time_edit = self.schedule_table.cellWidget(row, 5)
-        end_time_str = end_time_edit.time().toString("HH:mm:ss") if end_time_edit else "00:00:00"
-
-        day_map = {"星期一": 0, "星期二": 1, "星期三": 2, "星期四": 3,
-                   "星期五": 4, "星期六": 5, "星期日": 6}
-
-        current_weekday = current_time.weekday()
-        week_start = current_time - datetime.timedelta(days=current_weekday)
-
-        start_day_num = day_map[start_day]
-        end_day_num = day_map[end_day]
-
-        start_time = datetime.datetime.strptime(start_time_str, '%H:%M:%S').time()
-        end_time = datetime.datetime.strptime(end_time_str, '%H:%M:%S').time()
-
-        start_datetime = datetime.datetime.combine(
-            week_start.date() + datetime.timedelta(days=start_day_num),
-            start_time,
-            tzinfo=self.tz
-        )
-        end_datetime = datetime.datetime.combine(
-            week_start.date() + datetime.timedelta(days=end_day_num),
-            end_time,
-            tzinfo=self.tz
-        )
-
-        if end_day_num < start_day_num or (end_day_num == start_day_num and end_time < start_time):
-            end_datetime += datetime.timedelta(days=7)
-
-        within_trading_hours = start_datetime <= current_time <= end_datetime
-
-        break_pairs = [(6, 7), (8, 9), (10, 11)]
-        in_break = False
-
-        current_day_num = current_time.weekday()
-        current_day_start = current_time.replace(hour=0, minute=0, second=0, microsecond=0)
-
-        for i, (start_col, end_col) in enumerate(break_pairs, 1):
-            start_edit = self.schedule_table.cellWidget(row, start_col)
-            end_edit = self.schedule_table.cellWidget(row, end_col)
-
-            break_start_str = start_edit.time().toString("HH:mm:ss") if start_edit else "00:00:00"
-            break_end_str = end_edit.time().toString("HH:mm:ss") if end_edit else "00:00:00"
-
-            if break_start_str == "00:00:00" and break_end_str == "00:00:00":
-                continue
-
-            break_start_time = datetime.datetime.strptime(break_start_str, '%H:%M:%S').time()
-            break_end_time = datetime.datetime.strptime(break_end_str, '%H:%M:%S').time()
-
-            break_start = datetime.datetime.combine(
-                current_day_start.date(),
-                break_start_time,
-                tzinfo=self.tz
-            )
-            break_end = datetime.datetime.combine(
-                current_day_start.date(),
-                break_end_time,
-                tzinfo=self.tz
+            changed_rows = self.engine.snapshot.changed_rows(table, self.display_version)
+            self.display_version = version
+            model.update_ticks(table, changed_rows, current_time.timestamp())
+
+            engine = self.engine
+            if engine.metadata_version != self.metadata_version:
+                self.metadata_version = engine.metadata_version
+                model.refresh_prices()
+                self.fit_pending = True
+            for row_idx in engine.take_state_changes():
+                if row_idx < model.rowCount():
+                    model.set_status(row_idx, engine.trading[row_idx], engine.alert_on[row_idx])
+                    model.set_voice(row_idx, "已播放" if engine.played[row_idx] else "")
+
+            model.flush()
+            self.status_label.setText(
+                f"最後更新: {current_time.strftime('%Y-%m-%d %H:%M:%S')} | "
+                f"狀態: {'報價來源中斷' if engine.feed_down else '運行中'}"
             )
+            if self.fit_pending and len(changed_rows):
+                # 等收到報價後再量測，價格欄才有實際寬度
+                self.resize_table_columns()
 
-            if break_end < break_start:
-                break_end += datetime.timedelta(days=1)
-
-            if break_start <= current_time <= break_end:
-                in_break = True
-                break
+        except Exception as e:
+            print(f"顯示更新錯誤: {str(e)}")
 
-        return within_trading_hours and not in_break
+    def on_voice_edited(self, row, text):
+        self.engine.set_played(row, text == "已播放")
+        self.engine.invalidate([row])
 
     def start_monitoring(self):
-        if not self.running:
-            if not mt5.initialize():
-                print("無法初始化 MT5")
-                QMessageBox.critical(self, "錯誤", "無法初始化 MT5")
+        if not self.engine.running:
+            if not self.engine.start():
+                print(f"無法初始化報價來源 ({self.engine.feed.name})")
+                QMessageBox.critical(self, "錯誤", f"無法初始化報價來源 ({self.engine.feed.name})")
                 return
 
-            self.running = True
             self.refresh_timer.start(1000)
-
-            self.price_thread = threading.Thread(target=self.monitor_prices)
-            self.price_thread.daemon = True
-            self.price_thread.start()
             self.status_label.setText(f"最後更新: 尚未更新 | 狀態: 運行中")
             print("監控已開始")
 
     def stop_monitoring(self):
-        self.running = False
+        self.engine.stop()
         self.refresh_timer.stop()
         self.status_label.setText(f"最後更新: 已停止 | 狀態: 已停止")
         print("監控已停止")
 
     def closeEvent(self, event):
         self.save_config()
-        self.running = False
         self.refresh_timer.stop()
-        mt5.shutdown()
+        self.engine.close()
         event.accept()
 
     def showEvent(self, event):
@@ -1096,6 +618,7 @@ class PriceMonitor(QMainWindow):
         self.auto_fit_action.setChecked(self.auto_fit_enabled)
 
     def resize_table_columns(self):
+        self.fit_pending = False
         if self.auto_fit_enabled:
             self.price_table.resizeColumnsToContents()
             self.price_table.resizeRowsToContents()
@@ -1130,6 +653,14 @@ class PriceMonitor(QMainWindow):
         toggle_all_alerts_action = QAction("切換所有警報", self)
         toggle_all_alerts_action.triggered.connect(self.toggle_all_alerts)
 
+        reload_alerts_action = QAction("重新載入警報設定", self)
+        reload_alerts_action.triggered.connect(self.reload_alert_rules)
+
+        self.profile_action = QAction("效能分析", self)
+        self.profile_action.setCheckable(True)
+        self.profile_action.setToolTip("在限定時間內分析輪詢與畫面更新，結束後保存結果")
+        self.profile_action.triggered.connect(self.toggle_profiling)
+
         exit_action = QAction("退出", self)
         exit_action.triggered.connect(self.close)
 
@@ -1137,21 +668,38 @@ class PriceMonitor(QMainWindow):
         toolbar.addSeparator()
         toolbar.addAction(self.auto_fit_action)
         toolbar.addAction(toggle_all_alerts_action)
+        toolbar.addAction(reload_alerts_action)
+        toolbar.addAction(self.profile_action)
         toolbar.addAction(exit_action)
 
+    def toggle_profiling(self, checked):
+        profiler = self.engine.profiler
+        if checked and not profiler.running:
+            profiler.start(**self.profile_options)
+            print(f"效能分析已開始（{self.profile_options['duration']:g} 秒）")
+        elif not checked and profiler.running:
+            profiler.stop()
+
+    def reload_alert_rules(self):
+        count = self.engine.alert_rules.reload()
+        print(f"已重新載入警報設定: {count} 條規則")
+
     def toggle_all_alerts(self):
-        all_checked = all(self.alert_enabled[symbol] for symbol in self.symbols)
+        alert_enabled = self.engine.alert_enabled
+        all_checked = all(alert_enabled[symbol] for symbol in self.symbols)
         new_state = not all_checked
 
-        for i, symbol in enumerate(self.symbols):
-            self.alert_enabled[symbol] = new_state
-            checkbox = self.price_table.cellWidget(i, 0)
-            if checkbox:
-                checkbox.setChecked(new_state)
+        for symbol in self.symbols:
+            alert_enabled[symbol] = new_state
+        self.price_model.refresh_enabled()
+        self.engine.invalidate()
 
 
 if __name__ == '__main__':
+    from price_alert.cli import feed_from_args, metrics_server_from_args, parse_args, recorder_from_args
+    args = parse_args(sys.argv[1:])
     app = QApplication(sys.argv)
-    window = PriceMonitor()
+    window = PriceMonitor(feed_from_args(args), recorder=recorder_from_args(args))
+    metrics_server_from_args(window.engine, args)
     window.show()
     sys.exit(app.exec())
@@ -0,0 +1,2 @@
+"""價格監控的核心元件（與 PyQt6 視窗分離）"""
+from price_alert.snapshot import TickSnapshot, TICK_DTYPE
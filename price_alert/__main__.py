@@ -0,0 +1,5 @@
+import sys
+
+from price_alert.cli import main
+
+sys.exit(main())
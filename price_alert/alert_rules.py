@@ -0,0 +1,134 @@
+"""警報設定 (alert_config.csv) 的快取與條件解析
+
+每列為 symbol,condition,wav_path，可另加 hysteresis 欄；同一品種可有多列。condition：
+
+    ON                  每次收到新報價都觸發（舊格式）
+    above 1.2345        bid 向上穿越 1.2345
+    below 1.2345        bid 向下穿越 1.2345
+    change 0.5% 60      60 秒內 bid 漲跌幅絕對值達 0.5%；+0.5% 只看上漲，-0.5% 只看下跌
+    spread 0.0003       點差 (ask - bid) 大於 0.0003
+    frozen 30           交易時段內 bid/ask 連續 30 秒沒有變動
+
+除 ON 之外都只在條件由不成立變為成立時觸發一次，之後須離開門檻 hysteresis
+（價格、百分比或點差，與門檻同單位）才重新生效。OFF 或空白表示停用。
+"""
+import collections
+import csv
+import os
+import threading
+import time
+
+ON, ABOVE, BELOW, CHANGE, SPREAD, FROZEN = range(6)
+KINDS = {"on": ON, "above": ABOVE, "below": BELOW, "change": CHANGE, "spread": SPREAD, "frozen": FROZEN}
+
+# direction 只用於 change：0 為雙向，1 為上漲，-1 為下跌
+AlertRule = collections.namedtuple('AlertRule', ['symbol', 'condition', 'wav_path', 'kind', 'threshold',
+                                                 'window', 'direction', 'hysteresis'])
+
+
+def parse_condition(condition):
+    """解析 condition 欄，回傳 (kind, threshold, window, direction)；停用時回傳 None，格式錯誤時拋出 ValueError"""
+    parts = condition.split()
+    if not parts or parts[0].upper() == "OFF":
+        return None
+    kind = KINDS.get(parts[0].lower())
+    if kind is None:
+        raise ValueError(f"未知的條件 {parts[0]}")
+    expected = 3 if kind == CHANGE else 1 if kind == ON else 2
+    if len(parts) != expected:
+        raise ValueError(f"{parts[0]} 需要 {expected - 1} 個參數")
+    if kind == ON:
+        return ON, 0.0, 0.0, 0
+    if kind == CHANGE:
+        text = parts[1].rstrip("%")
+        direction = 1 if text.startswith("+") else -1 if text.startswith("-") else 0
+        threshold = abs(float(text))
+        window = float(parts[2])
+        if window <= 0:
+            raise ValueError("期間須大於 0 秒")
+        return CHANGE, threshold, window, direction
+    threshold = float(parts[1])
+    if kind == FROZEN:
+        if threshold <= 0:
+            raise ValueError("秒數須大於 0")
+        return FROZEN, threshold, threshold, 0
+    return kind, threshold, 0.0, 0
+
+
+class AlertRuleStore:
+    """只在檔案的修改時間或大小改變時重新載入的警報設定
+
+    refresh() 最多每 check_interval 秒檢查一次檔案狀態，可在輪詢迴圈中每週期呼叫；
+    reload() 則不論檔案狀態立即重新載入。每次載入後 version 遞增，
+    使用者比較 version 即可得知是否需要重新編譯規則。
+    """
+
+    def __init__(self, path="alert_config.csv", check_interval=1.0):
+        self.path = path
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._rules = ()
+        self._by_symbol = {}
+        self._signature = None
+        self._next_check = 0.0
+        self.version = 0
+
+    def _stat_signature(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def _load(self, signature):
+        rules = []
+        if signature is not None:
+            try:
+                with open(self.path, 'r', newline='', encoding='utf-8-sig') as f:
+                    for line, row in enumerate(csv.DictReader(f), start=2):
+                        symbol = (row.get('symbol') or '').strip()
+                        condition = (row.get('condition') or '').strip()
+                        if not symbol:
+                            continue
+                        try:
+                            parsed = parse_condition(condition)
+                            hysteresis = abs(float((row.get('hysteresis') or '').strip() or 0))
+                        except ValueError as e:
+                            print(f"警報設定第 {line} 行 ({symbol} {condition}) 錯誤: {e}")
+                            continue
+                        if parsed is not None:
+                            rules.append(AlertRule(symbol, condition, (row.get('wav_path') or '').strip(),
+                                                   *parsed, hysteresis))
+            except Exception as e:
+                print(f"載入警報設定錯誤: {e}")
+                return
+        by_symbol = {}
+        for rule in rules:
+            by_symbol.setdefault(rule.symbol, []).append(rule)
+        with self._lock:
+            self._rules = tuple(rules)
+            self._by_symbol = {symbol: tuple(items) for symbol, items in by_symbol.items()}
+            self._signature = signature
+            self.version += 1
+
+    def refresh(self):
+        now = time.monotonic()
+        if now < self._next_check:
+            return
+        self._next_check = now + self.check_interval
+        signature = self._stat_signature()
+        if signature != self._signature:
+            self._load(signature)
+
+    def reload(self):
+        self._next_check = time.monotonic() + self.check_interval
+        self._load(self._stat_signature())
+        return len(self._rules)
+
+    def rules(self, symbols=None):
+        """回傳 (version, 規則)；指定 symbols 時只取這些品種的規則（依品種索引，依 symbols 順序）"""
+        with self._lock:
+            if symbols is None:
+                return self.version, self._rules
+            by_symbol = self._by_symbol
+            return self.version, tuple(rule for symbol in symbols for rule in by_symbol.get(symbol, ()))
@@ -0,0 +1,135 @@
+"""警報音效：單一播放執行緒、WAV 記憶體快取、相同音效合併與播放頻率限制"""
+import collections
+import itertools
+import os
+import queue
+import threading
+import time
+
+try:
+    import winsound
+except ImportError:
+    winsound = None
+
+# 數字越小越優先
+PRIORITY_STALE = 0
+PRIORITY_RESUME = 1
+PRIORITY_RULE = 2
+PRIORITY_PRELOAD = 9
+
+
+def default_player(path, data):
+    """Windows 直接從記憶體播放；其他平台退回 playsound 播放檔案（data 為 None）"""
+    if winsound is not None:
+        winsound.PlaySound(data, winsound.SND_MEMORY)
+        return
+    from playsound import playsound
+    playsound(path)
+
+
+# 只有能從記憶體播放時才需要把 WAV 讀入快取
+default_player.from_memory = winsound is not None
+
+
+class AlertAudioPlayer:
+    """所有警報音效都經由同一個背景執行緒依優先順序播放
+
+    cache_size      記憶體中保留的 WAV 數量，超過時淘汰最久未使用者
+    max_per_second  每秒最多播放次數
+    player          播放函式 player(path, data)，預設為 default_player
+
+    佇列中已有相同檔案時，新的請求會被合併而不重複播放。WAV 快取與 preload()
+    只在 player.from_memory 為 True 時使用（預設播放函式只在 Windows 上如此）；
+    其他平台的播放函式自行讀取檔案，data 為 None。
+    """
+
+    def __init__(self, cache_size=64, max_per_second=4.0, player=default_player):
+        self.cache_size = cache_size
+        self.min_interval = 1.0 / max_per_second if max_per_second > 0 else 0.0
+        self.player = player
+        self.from_memory = getattr(player, "from_memory", True)
+        self._queue = queue.PriorityQueue()
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._pending = set()
+        self._cache = collections.OrderedDict()
+        self._thread = None
+        self.played = 0
+        self.coalesced = 0
+        self.playbacks = None  # 由使用者指定的 metrics Counter，實際播放後遞增
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="alert-audio", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._queue.put((-1, next(self._seq), None, False))
+            self._thread.join(timeout=2.0)
+            self._thread = None
+
+    def play(self, path, priority=PRIORITY_STALE):
+        """排入播放；路徑為空、檔案不存在或已在佇列中時回傳 False"""
+        if not path or not os.path.isfile(path):
+            return False
+        with self._lock:
+            if path in self._pending:
+                self.coalesced += 1
+                return False
+            self._pending.add(path)
+        self._queue.put((priority, next(self._seq), path, True))
+        return True
+
+    def preload(self, paths):
+        """在背景預先讀取 WAV 至快取"""
+        if not self.from_memory:
+            return
+        for path in dict.fromkeys(p for p in paths if p):
+            self._queue.put((PRIORITY_PRELOAD, next(self._seq), path, False))
+
+    def _load(self, path):
+        """回傳 WAV 內容；不從記憶體播放時只確認檔案存在並回傳 b""，檔案不存在時為 None"""
+        if not self.from_memory:
+            return b"" if os.path.isfile(path) else None
+        try:
+            st = os.stat(path)
+        except OSError:
+            self._cache.pop(path, None)
+            return None
+        signature = (st.st_mtime_ns, st.st_size)
+        cached = self._cache.get(path)
+        if cached is not None and cached[0] == signature:
+            self._cache.move_to_end(path)
+            return cached[1]
+        with open(path, 'rb') as f:
+            data = f.read()
+        self._cache[path] = (signature, data)
+        self._cache.move_to_end(path)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return data
+
+    def _run(self):
+        next_allowed = 0.0
+        while True:
+            _, _, path, should_play = self._queue.get()
+            if path is None:
+                break
+            if should_play:
+                wait = next_allowed - time.monotonic()
+                if wait > 0:
+                    time.sleep(wait)
+                with self._lock:
+                    self._pending.discard(path)
+            try:
+                data = self._load(path)
+                if data is None or not should_play:
+                    continue
+                self.player(path, data if self.from_memory else None)
+                self.played += 1
+                if self.playbacks is not None:
+                    self.playbacks.inc()
+            except Exception as e:
+                print(f"播放 {path} 失敗: {str(e)}")
+            next_allowed = time.monotonic() + self.min_interval
@@ -0,0 +1,270 @@
+"""效能基準：以模擬報價驅動 輪詢 → 判斷 → 警報 → 畫面 的完整流程
+
+    python -m price_alert.benchmark --symbols 70,500,2000,10000 --tick-rate 2 --output bench.json
+
+每個情境在獨立的子行程中執行（記憶體量測互不影響），結果寫入 JSON：
+  poll_cycle_ms      MonitorEngine.poll_once() 一輪的耗時（含模擬報價產生）
+  tick_to_screen_ms  報價發布到快照，至畫面重繪完成的延遲（--no-gui 時為 null）
+  alert_latency_ms   停價期限（報價時間 + 容忍度）至停價事件發出的延遲
+  frame_ms           update_display() 加上價格表重繪的耗時（offscreen Qt）
+  rss_peak_mb        子行程的最大常駐記憶體
+以 --baseline 指定先前的結果檔時，會列出各指標 p95 的差異。
+"""
+import argparse
+import datetime
+import json
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from price_alert.config import Product
+from price_alert.engine import MonitorEngine
+from price_alert.feeds import SimulatedFeed
+from price_alert.schedule import ScheduleEntry
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+DEFAULT_SIZES = (70, 500, 2000, 10000)
+# 星期一 00:00:00 至 星期日 23:59:59，基準測試時所有品種都在交易中
+ALWAYS_OPEN = ScheduleEntry(0, 0, 6, 86399, ())
+METRICS = ("poll_cycle_ms", "tick_to_screen_ms", "alert_latency_ms", "frame_ms")
+
+
+def summarize(samples):
+    """回傳毫秒樣本的統計值，無樣本時為 None"""
+    if not len(samples):
+        return None
+    values = np.asarray(samples, dtype=float)
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {"count": int(values.size), "mean": round(float(values.mean()), 3),
+            "p50": round(float(p50), 3), "p95": round(float(p95), 3),
+            "p99": round(float(p99), 3), "max": round(float(values.max()), 3)}
+
+
+def peak_rss_mb():
+    try:
+        import psutil
+        info = psutil.Process().memory_info()
+        return round(getattr(info, 'peak_wset', info.rss) / 2 ** 20, 1)
+    except ImportError:
+        pass
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # macOS 以位元組為單位，Linux 以 KB 為單位
+        return round(peak / (2 ** 20 if sys.platform == 'darwin' else 2 ** 10), 1)
+    return None
+
+
+class _Probe:
+    """包裝引擎的輪詢、發布與事件，記錄各階段時間點"""
+
+    def __init__(self, engine, tolerance):
+        self.engine = engine
+        self.tolerance = tolerance
+        self.poll_ms = []
+        self.alert_ms = []
+        self.screen_ms = []
+        self.frame_ms = []
+        self.ticks = 0
+        self.published = {}  # 快照版本 → perf_counter
+
+        poll_once = engine.poll_once
+        publish = engine.snapshot.publish
+
+        def timed_poll(symbols=None):
+            start = time.perf_counter()
+            poll_once(symbols)
+            self.poll_ms.append((time.perf_counter() - start) * 1000)
+
+        def timed_publish(ticks):
+            ticks = list(ticks)
+            version = publish(ticks)
+            self.published[version] = time.perf_counter()
+            self.ticks += len(ticks)
+            return version
+
+        engine.poll_once = timed_poll
+        engine.snapshot.publish = timed_publish
+        engine.listeners.append(self.on_event)
+
+    def on_event(self, symbol, event, stale_seconds):
+        # 停價期限為報價時間 + 容忍度，stale_seconds 為事件發出時距報價時間的秒數
+        if event == "stale" and stale_seconds is not None:
+            self.alert_ms.append((stale_seconds - self.tolerance) * 1000)
+
+    def watch_window(self, window):
+        update_display = window.update_display
+        viewport = window.price_table.viewport()
+
+        def timed_update():
+            before = window.display_version
+            versions = self.engine.snapshot.read()[2]['version']
+            start = time.perf_counter()
+            update_display()
+            viewport.repaint()
+            end = time.perf_counter()
+            self.frame_ms.append((end - start) * 1000)
+            changed = versions[versions > before]
+            if changed.size:
+                received = np.array([self.published.get(int(v), end) for v in np.unique(changed)])
+                counts = np.unique(changed, return_counts=True)[1]
+                self.screen_ms.extend(np.repeat((end - received) * 1000, counts).tolist())
+
+        window.refresh_timer.timeout.disconnect()
+        window.refresh_timer.timeout.connect(timed_update)
+
+
+def run_scenario(symbols, tick_rate, duration, gui, tolerance, gap_probability, seed, auto_fit):
+    feed = SimulatedFeed(tick_rate=tick_rate, gap_probability=gap_probability,
+                         gap_seconds=(tolerance + 1.0, tolerance + 5.0), seed=seed)
+    engine = MonitorEngine(feed, alert_config=os.devnull)
+    products = [Product(f"SYM{i:05d}", "", "") for i in range(symbols)]
+
+    app = window = None
+    if gui:
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+        from PyQt6.QtCore import QTimer
+        from PyQt6.QtWidgets import QApplication
+        from Price_Alert import PriceMonitor
+        app = QApplication.instance() or QApplication([])
+        window = PriceMonitor(engine=engine)
+        window.auto_fit_enabled = auto_fit
+        window.set_products(products)
+    else:
+        engine.open()
+        engine.set_products(products)
+    for product in products:
+        engine.set_schedule(product.symbol, "", ALWAYS_OPEN)
+        engine.tolerances[product.symbol] = tolerance
+    if window is not None:
+        window.refresh_parameter_views()
+
+    probe = _Probe(engine, tolerance)
+    started = time.perf_counter()
+    if window is not None:
+        probe.watch_window(window)
+        window.show()
+        window.start_monitoring()
+        QTimer.singleShot(int(duration * 1000), app.quit)
+        app.exec()
+        window.stop_monitoring()
+    else:
+        engine.start()
+        time.sleep(duration)
+        engine.stop()
+    elapsed = time.perf_counter() - started
+    engine.close()
+
+    return {
+        "symbols": symbols,
+        "tick_rate": tick_rate,
+        "duration_s": round(elapsed, 2),
+        "ticks": probe.ticks,
+        "ticks_per_second": round(probe.ticks / elapsed, 1),
+        "poll_cycles": len(probe.poll_ms),
+        "alerts": len(probe.alert_ms),
+        "poll_cycle_ms": summarize(probe.poll_ms),
+        "tick_to_screen_ms": summarize(probe.screen_ms) if gui else None,
+        "alert_latency_ms": summarize(probe.alert_ms),
+        "frame_ms": summarize(probe.frame_ms) if gui else None,
+        "rss_peak_mb": peak_rss_mb(),
+    }
+
+
+def _scenario_worker(kwargs, results):
+    results.put(run_scenario(**kwargs))
+
+
+def run_isolated(**kwargs):
+    """在新的子行程中執行單一情境"""
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Queue()
+    process = ctx.Process(target=_scenario_worker, args=(kwargs, results))
+    process.start()
+    try:
+        result = results.get(timeout=kwargs["duration"] + 300)
+    finally:
+        process.join(timeout=30)
+    return result
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), timeout=5).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def compare(results, baseline):
+    """列出與基準結果相比 p95 的變化"""
+    old = {(r["symbols"], r["tick_rate"]): r for r in baseline.get("results", [])}
+    for result in results:
+        before = old.get((result["symbols"], result["tick_rate"]))
+        if before is None:
+            continue
+        for metric in METRICS:
+            new_stats, old_stats = result.get(metric), before.get(metric)
+            if new_stats and old_stats and old_stats["p95"]:
+                change = (new_stats["p95"] - old_stats["p95"]) / old_stats["p95"] * 100
+                print(f"{result['symbols']:>6} 品種 {metric:<18} p95 {old_stats['p95']:>10.3f} → "
+                      f"{new_stats['p95']:>10.3f} ms ({change:+.1f}%)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="price_alert.benchmark", description="價格監控效能基準")
+    parser.add_argument("--symbols", default=",".join(str(n) for n in DEFAULT_SIZES),
+                        help="品種數量，以逗號分隔")
+    parser.add_argument("--tick-rate", type=float, action="append", help="每個品種每秒報價數，可重複指定（預設 2）")
+    parser.add_argument("--duration", type=float, default=15.0, help="每個情境的執行秒數")
+    parser.add_argument("--tolerance", type=int, default=2, help="所有品種的時間容忍度（秒）")
+    parser.add_argument("--gap", type=float, default=0.001, help="每筆報價後出現空檔的機率，用於觸發停價警報")
+    parser.add_argument("--seed", type=int, default=0, help="亂數種子")
+    parser.add_argument("--no-gui", action="store_true", help="不量測畫面（不需 PyQt6）")
+    parser.add_argument("--no-auto-fit", action="store_true", help="關閉自動調整欄寬")
+    parser.add_argument("--output", default="benchmark_results.json", help="結果 JSON 檔")
+    parser.add_argument("--baseline", help="先前的結果 JSON 檔，用於比較")
+    args = parser.parse_args(argv)
+
+    settings = {"duration_s": args.duration, "tolerance_s": args.tolerance, "gap_probability": args.gap,
+                "seed": args.seed, "gui": not args.no_gui, "auto_fit": not args.no_auto_fit}
+    results = []
+    for tick_rate in args.tick_rate or [2.0]:
+        for symbols in (int(n) for n in args.symbols.split(",") if n.strip()):
+            print(f"執行 {symbols} 品種，每品種 {tick_rate} 筆/秒 ...", flush=True)
+            result = run_isolated(symbols=symbols, tick_rate=tick_rate, duration=args.duration,
+                                  gui=not args.no_gui, tolerance=args.tolerance,
+                                  gap_probability=args.gap, seed=args.seed, auto_fit=not args.no_auto_fit)
+            results.append(result)
+            poll, frame = result["poll_cycle_ms"] or {}, result["frame_ms"] or {}
+            print(f"  輪詢 p95 {poll.get('p95')} ms | 畫面 p95 {frame.get('p95')} ms | "
+                  f"{result['ticks_per_second']} 筆/秒 | 記憶體 {result['rss_peak_mb']} MB", flush=True)
+
+    report = {
+        "timestamp": datetime.datetime.now().astimezone().isoformat(timespec='seconds'),
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "settings": settings,
+        "results": results,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"結果已寫入 {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            compare(results, json.load(f))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,271 @@
+"""命令列入口：python -m price_alert [--headless] ..."""
+import argparse
+import datetime
+import signal
+import sys
+import time
+from pathlib import Path
+from zoneinfo import ZoneInfo
+
+from price_alert.audio import AlertAudioPlayer
+from price_alert.config import Product, default_products, load_app_config, read_clock_options, read_product_list
+from price_alert.engine import MonitorEngine
+from price_alert.event_log import EventLogWriter
+from price_alert.feeds import FEEDS, create_feed
+from price_alert.metrics import MetricsServer
+from price_alert.process_feed import ProcessFeed
+from price_alert.profiling import MODES
+from price_alert.recorder import TickRecorder
+from price_alert.replay import ReplayFeed, VirtualClock, open_segments, run_replay
+from price_alert.sharding import ShardedFeed
+from price_alert.symbol_cache import SymbolMetaCache
+
+EVENT_NAMES = {"stale": "停價", "resume": "恢復", "rule": "警報規則",
+               "feed_down": "報價來源中斷", "feed_up": "報價來源恢復"}
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="price_alert", description="價格監控")
+    parser.add_argument("--headless", action="store_true", help="不開啟視窗，只在終端機輸出狀態")
+    parser.add_argument("--feed", choices=sorted(FEEDS), default="mt5", help="報價來源")
+    parser.add_argument("--sim-rate", type=float, default=2.0, help="模擬報價：每個品種每秒報價數")
+    parser.add_argument("--sim-gap", type=float, default=0.0, help="模擬報價：每筆報價後出現空檔的機率")
+    parser.add_argument("--sim-outage", action="append", default=[], metavar="開始秒數:持續秒數",
+                        help="模擬報價：全體斷線區間，可重複指定")
+    parser.add_argument("--sim-seed", type=int, default=0, help="模擬報價：亂數種子")
+    parser.add_argument("--sim-disconnect", action="store_true", help="模擬報價：斷線區間視為終端斷線")
+    parser.add_argument("--feed-process", action="store_true",
+                        help="在獨立子行程輪詢報價，經由共用記憶體交給監控程式")
+    parser.add_argument("--terminals", metavar="JSON",
+                        help="多終端設定檔，每個終端由獨立子行程輪詢（指定時忽略 --feed）")
+    parser.add_argument("--record", metavar="目錄", help="將收到的報價與停價事件保存到此目錄")
+    parser.add_argument("--metrics-port", type=int, default=0,
+                        help="在本機此連接埠提供 Prometheus 格式的 /metrics 與啟動效能分析的 POST /profile，0 為不啟用")
+    parser.add_argument("--profile", type=float, default=0.0, metavar="秒數",
+                        help="啟動後分析輪詢與畫面更新的秒數，0 為不分析（視窗版也可由工具欄啟動）")
+    parser.add_argument("--profile-mode", choices=MODES, default="sample",
+                        help="sample 為低負擔取樣，cprofile 另外記錄完整呼叫次數")
+    parser.add_argument("--profile-dir", default="profiles", help="效能分析結果目錄")
+    parser.add_argument("--replay", metavar="目錄", help="重播 --record 保存的報價（不開啟視窗）")
+    parser.add_argument("--speed", default="1", help="重播速度倍數，max 為盡可能快")
+    parser.add_argument("--replay-tail", type=float, default=0.0,
+                        help="最後一筆報價後繼續推進的虛擬秒數，讓結尾的停價期限到期")
+
+    headless = parser.add_argument_group("headless 與重播模式")
+    headless.add_argument("--config", default="app_config.json", help="視窗版保存的配置檔")
+    headless.add_argument("--products", help="產品列表 CSV（預設取配置檔中的路徑）")
+    headless.add_argument("--clock", help="轉令名稱（預設取配置檔中上次使用的轉令）")
+    headless.add_argument("--params", help="交易時間參數 CSV，指定時忽略 --clock")
+    headless.add_argument("--mute", action="store_true", help="不播放音效")
+    headless.add_argument("--symbol-cache", default="symbol_cache.json", help="品種資料快取檔，空字串為不使用快取")
+    headless.add_argument("--summary-interval", type=float, default=60.0, help="狀態摘要的輸出間隔秒數，0 為不輸出")
+    headless.add_argument("--duration", type=float, default=0.0, help="執行秒數後自動結束，0 為持續執行")
+    return parser
+
+
+def parse_args(argv):
+    # 允許 Qt 自身的命令列參數
+    return build_parser().parse_known_args(argv)[0]
+
+
+def feed_from_args(args):
+    if args.terminals:
+        return ShardedFeed.from_config(args.terminals)
+    options = {}
+    if args.feed == "sim":
+        outages = [tuple(float(v) for v in spec.split(":", 1)) for spec in args.sim_outage]
+        options = dict(tick_rate=args.sim_rate, gap_probability=args.sim_gap, outages=outages,
+                       seed=args.sim_seed, disconnect=args.sim_disconnect)
+    if args.feed_process:
+        return ProcessFeed(args.feed, **options)
+    return create_feed(args.feed, **options)
+
+
+def recorder_from_args(args, tz=None):
+    return TickRecorder(args.record, tz=tz) if args.record else None
+
+
+def metrics_server_from_args(engine, args):
+    """指定 --metrics-port 時啟動量測服務（含 /profile 效能分析入口）"""
+    if not args.metrics_port:
+        return None
+    server = MetricsServer(engine.metrics, args.metrics_port, profiler=engine.profiler,
+                           profile_options=profile_options_from_args(args, args.profile or 30.0))
+    return server if server.start() else None
+
+
+def profile_options_from_args(args, duration=None):
+    return {"duration": args.profile if duration is None else duration,
+            "mode": args.profile_mode, "directory": args.profile_dir}
+
+
+def install_profile_signal(engine, args):
+    """支援 SIGUSR1 的平台上，收到訊號時開始分析（不需重新啟動）
+
+    沒有 SIGUSR1 的平台（Windows）改用 --metrics-port 的 POST /profile。
+    """
+    if not hasattr(signal, "SIGUSR1"):
+        return
+    duration = args.profile or 30.0
+
+    def handler(signum, frame):
+        if engine.profiler.start(**profile_options_from_args(args, duration)) is not None:
+            print(f"效能分析已開始（{duration:g} 秒）")
+
+    signal.signal(signal.SIGUSR1, handler)
+
+
+def load_engine_settings(engine, args):
+    """依命令列與配置檔載入產品列表及交易時間參數"""
+    product_path, last_clock = load_app_config(args.config)
+    product_path = args.products or product_path
+    products = []
+    if Path(product_path).exists():
+        try:
+            products = read_product_list(product_path)
+        except Exception as e:
+            print(f"載入產品列表錯誤: {e}。使用預設符號。")
+    else:
+        print(f"找不到產品檔案 '{product_path}'。使用預設符號。")
+    engine.set_products(products or default_products())
+    load_engine_parameters(engine, args, last_clock)
+
+
+def load_engine_parameters(engine, args, last_clock=None):
+    """依 --params 或轉令名稱載入交易時間參數"""
+    param_path = args.params
+    if param_path is None:
+        clock = args.clock or last_clock
+        param_path = read_clock_options().get(clock) if clock else None
+    if param_path:
+        try:
+            count = engine.load_parameters(param_path)
+            print(f"已載入參數 {param_path}: {count} 個品種")
+        except Exception as e:
+            print(f"載入參數失敗 {param_path}: {str(e)}")
+
+
+def describe_event(symbol, event, stale_seconds):
+    detail = "" if stale_seconds is None else f" ({stale_seconds:.1f} 秒)"
+    prefix = f"{symbol} " if symbol else ""
+    return f"{prefix}{EVENT_NAMES.get(event, event)}{detail}"
+
+
+def print_summary(engine):
+    trading = sum(engine.trading)
+    alerts = [symbol for symbol, on in zip(engine.symbols, engine.alert_on) if on]
+    text = ", ".join(alerts[:10]) + (" ..." if len(alerts) > 10 else "")
+    rate = engine.history.tick_rates(window=60.0).sum()
+    scheduler = engine.poll_scheduler
+    active, quiet, closed = scheduler.tier_counts()
+    print(f"[{datetime.datetime.now(tz=engine.tz):%Y-%m-%d %H:%M:%S}] 品種 {len(engine.symbols)} | "
+          f"交易中 {trading} | 報價 {rate:.1f} 筆/秒 | 輪詢 {active}/{quiet}/{closed} | "
+          f"逾時 {scheduler.overruns} | 警報 {len(alerts)}" + (f": {text}" if alerts else "")
+          + (" | 報價來源中斷" if engine.feed_down else ""))
+
+
+def run_headless(args):
+    tz = ZoneInfo("Asia/Shanghai")
+    engine = MonitorEngine(feed_from_args(args), tz=tz,
+                           audio=None if args.mute else AlertAudioPlayer(),
+                           event_log=EventLogWriter(prefix="play_log", fmt="csv", tz=tz),
+                           recorder=recorder_from_args(args, tz),
+                           symbol_cache=SymbolMetaCache(args.symbol_cache) if args.symbol_cache else None)
+    if not engine.open():
+        print(f"無法初始化報價來源 ({engine.feed.name})")
+        return 1
+    load_engine_settings(engine, args)
+
+    def on_event(symbol, event, stale_seconds):
+        print(f"[{datetime.datetime.now(tz=tz):%H:%M:%S}] {describe_event(symbol, event, stale_seconds)}")
+
+    engine.listeners.append(on_event)
+    if not engine.start():
+        print(f"無法初始化報價來源 ({engine.feed.name})")
+        engine.close()
+        return 1
+    metrics_server = metrics_server_from_args(engine, args)
+    install_profile_signal(engine, args)
+    if args.profile > 0:
+        engine.profiler.start(**profile_options_from_args(args))
+    print("監控已開始（Ctrl+C 結束）")
+
+    started = time.monotonic()
+    next_summary = started + args.summary_interval
+    try:
+        while not args.duration or time.monotonic() - started < args.duration:
+            time.sleep(0.2)
+            if args.summary_interval > 0 and time.monotonic() >= next_summary:
+                print_summary(engine)
+                next_summary += args.summary_interval
+    except KeyboardInterrupt:
+        pass
+    finally:
+        engine.profiler.stop()
+        engine.close()
+        if metrics_server is not None:
+            metrics_server.stop()
+        print("監控已停止")
+    return 0
+
+
+def run_replay_cli(args):
+    clock = VirtualClock()
+    segments = open_segments(args.replay)
+    feed = ReplayFeed(segments, clock)
+    if not len(feed):
+        print(f"找不到報價記錄: {args.replay}")
+        return 1
+    tz = ZoneInfo("Asia/Shanghai")
+    engine = MonitorEngine(feed, tz=tz, audio=None if args.mute else AlertAudioPlayer(), clock=clock)
+    engine.open()
+    if args.products:
+        load_engine_settings(engine, args)
+    else:
+        engine.set_products([Product(symbol, "", "") for symbol in feed.recorded_symbols])
+        load_engine_parameters(engine, args, load_app_config(args.config)[1])
+
+    def on_event(symbol, event, stale_seconds):
+        print(f"[{datetime.datetime.fromtimestamp(clock(), tz=tz):%Y-%m-%d %H:%M:%S.%f}] "
+              f"{describe_event(symbol, event, stale_seconds)}")
+
+    engine.listeners.append(on_event)
+    speed = None if args.speed == "max" else float(args.speed)
+    print(f"重播 {len(segments)} 個區段、{len(feed)} 筆報價，速度 {args.speed}")
+    try:
+        stats = run_replay(engine, feed, clock, speed, tail=args.replay_tail)
+    except KeyboardInterrupt:
+        engine.close()
+        return 1
+    engine.close()
+    print(f"重播完成: {stats['ticks']} 筆報價，虛擬時間 {stats['virtual_seconds']} 秒，"
+          f"耗時 {stats['seconds']} 秒，{stats['ticks_per_second']} 筆/秒")
+    return 0
+
+
+def run_gui(args, argv):
+    from PyQt6.QtWidgets import QApplication
+    from Price_Alert import PriceMonitor
+
+    app = QApplication([sys.argv[0]] + list(argv))
+    window = PriceMonitor(feed_from_args(args), recorder=recorder_from_args(args))
+    metrics_server = metrics_server_from_args(window.engine, args)
+    window.profile_options = profile_options_from_args(args, args.profile or 30.0)
+    if args.profile > 0:
+        window.engine.profiler.start(**window.profile_options)
+    window.show()
+    code = app.exec()
+    window.engine.profiler.stop()
+    if metrics_server is not None:
+        metrics_server.stop()
+    return code
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    args = parse_args(argv)
+    if args.replay:
+        return run_replay_cli(args)
+    if args.headless:
+        return run_headless(args)
+    return run_gui(args, argv)
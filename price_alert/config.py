@@ -0,0 +1,150 @@
+"""設定檔讀取：產品列表、轉令清單、交易時間參數與 app_config.json"""
+import collections
+import csv
+import json
+import os
+from pathlib import Path
+
+from price_alert.schedule import DAY_INDEX, parse_hms
+
+DEFAULT_SYMBOLS = [
+    "XAUUSD", "XAGUSD", "PLT", "PAD", "COPPER", "IRON", "GAUCNH", "XALUSD",
+    "HKGHKD", "XNIUSD", "XZNUSD", "AUDUSD", "EURUSD", "GBPUSD", "NZDUSD",
+    "USDCAD", "USDCHF", "USDJPY", "EURJPY", "NZDJPY", "GBPJPY", "CADJPY",
+    "AUDJPY", "EURCHF", "EURGBP", "EURAUD", "GBPCHF", "GBPAUD", "AUDNZD",
+    "EURCAD", "EURNZD", "GBPCAD", "AUDCAD", "NZDCAD", "USDCNH", "HKDCNH",
+    "USOil", "UKOil", "NGAS", "CHINA300", "HK50", "JPN225", "A50", "STI",
+    "AS200", "INDIA50", "KS200", "SH50", "VN30", "DJ30", "SP500", "TECH100",
+    "RUSS2000", "USDINDEX", "GER30", "FRA40", "UK100", "EUR50", "EUR600",
+    "AEX25", "SOYBEAN", "CORN", "WHEAT", "COCOA", "COFFEE", "SUGAR", "COTTON",
+    "00005.HK", "AAPL", "BTCUSDT", "ETHUSDT"
+]
+
+PARAMETER_HEADERS = ["交易品種", "時間容忍度", "產品組", "開始日", "開始時間",
+                     "結束日", "結束時間", "休息1開始", "休息1結束",
+                     "休息2開始", "休息2結束", "休息3開始", "休息3結束"]
+
+Product = collections.namedtuple('Product', ['symbol', 'wav_path', 'wav_path_resume'])
+
+
+def default_products():
+    return [Product(symbol, "", "") for symbol in DEFAULT_SYMBOLS]
+
+
+def read_product_list(path):
+    """讀取產品列表 CSV：品種, WAV路徑（停價）, WAV路徑（報價恢復）"""
+    products = []
+    with open(path, 'r') as f:
+        for row in csv.reader(f):
+            if row and row[0].strip():
+                products.append(Product(row[0].strip(),
+                                        row[1].strip() if len(row) > 1 else "",
+                                        row[2].strip() if len(row) > 2 else ""))
+    return products
+
+
+def write_product_list(path, products):
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        for product in products:
+            writer.writerow(list(product))
+
+
+def read_clock_options(path="clock_change.txt"):
+    """讀取轉令清單，每行為「名稱,參數檔路徑」"""
+    options = {}
+    if Path(path).exists():
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line and ',' in line:
+                    clock_name, param_path = line.split(',', 1)
+                    options[clock_name.strip()] = param_path.strip()
+    return options
+
+
+def read_parameter_rows(path):
+    """逐列讀取交易時間參數 CSV（略過標題與欄位不足的列）"""
+    with open(path, 'r') as f:
+        reader = csv.reader(f)
+        next(reader, None)
+        for row in reader:
+            if row and len(row) >= 13:
+                yield row
+
+
+# 參數檔一列解析後的值；無法解析的欄位為 None，套用時維持原值
+ParameterRow = collections.namedtuple(
+    'ParameterRow', ['tolerance', 'group', 'start_day', 'start_time', 'end_day', 'end_time', 'breaks'])
+
+
+def parse_parameter_row(row):
+    """回傳 (品種, ParameterRow)；breaks 為 6 個休息時間（秒數或 None）"""
+    return row[0].strip(), ParameterRow(
+        parse_hms(row[1]), row[2], DAY_INDEX.get(row[3].strip()), parse_hms(row[4]),
+        DAY_INDEX.get(row[5].strip()), parse_hms(row[6]), tuple(parse_hms(value) for value in row[7:13]))
+
+
+def read_parameter_set(path):
+    """將參數檔解析為 {品種: ParameterRow}，同一品種出現多次時以最後一列為準"""
+    return dict(parse_parameter_row(row) for row in read_parameter_rows(path))
+
+
+def merge_parameter_row(entry, params):
+    """以 ParameterRow 更新 ScheduleEntry，無法解析的欄位維持原值"""
+    breaks = [list(pair) for pair in entry.breaks] + [[0, 0] for _ in range(3 - len(entry.breaks))]
+    for i, break_time in enumerate(params.breaks):
+        if break_time is not None:
+            breaks[i // 2][i % 2] = break_time
+    return entry._replace(
+        start_day=entry.start_day if params.start_day is None else params.start_day,
+        start_time=entry.start_time if params.start_time is None else params.start_time,
+        end_day=entry.end_day if params.end_day is None else params.end_day,
+        end_time=entry.end_time if params.end_time is None else params.end_time,
+        breaks=tuple(tuple(pair) for pair in breaks))
+
+
+class ParameterSets:
+    """轉令名稱 → 已解析的參數集
+
+    建立時預先解析清單中的所有參數檔，切換轉令時不必再讀檔；
+    參數檔在之後被修改（例如保存參數）時，get() 會重新解析該檔。
+    """
+
+    def __init__(self, options):
+        self.options = dict(options)
+        self._sets = {}  # 轉令名稱 → (修改時間, 參數集)
+        for clock in self.options:
+            try:
+                self.get(clock)
+            except Exception as e:
+                print(f"預先載入參數失敗 {self.options[clock]}: {str(e)}")
+
+    def __contains__(self, clock):
+        return clock in self.options
+
+    def path(self, clock):
+        return self.options[clock]
+
+    def get(self, clock):
+        """回傳該轉令的參數集；檔案不存在時引發 FileNotFoundError"""
+        path = self.options[clock]
+        mtime = os.stat(path).st_mtime_ns
+        cached = self._sets.get(clock)
+        if cached is None or cached[0] != mtime:
+            cached = (mtime, read_parameter_set(path))
+            self._sets[clock] = cached
+        return cached[1]
+
+
+def load_app_config(path="app_config.json"):
+    """回傳 (產品列表路徑, 上次使用的轉令)"""
+    default_product_path = str(Path('product_list.csv').absolute())
+    if Path(path).exists():
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                config = json.load(f)
+                return config.get('product_path', default_product_path), config.get('clock', None)
+        except Exception as e:
+            print(f"載入配置錯誤: {e}")
+    return default_product_path, None
@@ -0,0 +1,557 @@
+"""監控引擎：輪詢報價、判斷停價與恢復、觸發警報，不依賴 PyQt6
+
+GUI 與 --headless 命令列模式都是引擎的使用者：引擎在背景執行緒輪詢報價，
+另一執行緒依 StalenessDetector 的期限判斷狀態，使用者只讀取 snapshot 與各列狀態。
+"""
+import datetime
+import math
+import threading
+import time
+from zoneinfo import ZoneInfo
+
+from price_alert.alert_rules import CHANGE, AlertRuleStore
+from price_alert.audio import PRIORITY_RESUME, PRIORITY_RULE, PRIORITY_STALE
+from price_alert.config import merge_parameter_row, read_parameter_set
+from price_alert.health import ConnectionSupervisor
+from price_alert.history import TickHistory
+from price_alert.metrics import Counter, Gauge, Metrics
+from price_alert.poll_scheduler import PollScheduler
+from price_alert.profiling import Profiler
+from price_alert.rule_engine import CompiledRules
+from price_alert.schedule import CLOSED, DAYS, ScheduleBook, format_hms
+from price_alert.snapshot import TickSnapshot
+from price_alert.staleness import NEVER, StalenessDetector
+
+DEFAULT_DIGITS = 5
+DEADLINE_SLACK = 0.001
+# change 規則最多讓報價歷史擴大到的筆數（每個品種）
+MAX_HISTORY_SIZE = 2048
+
+
+class MonitorEngine:
+    """報價監控的核心狀態與執行緒
+
+    feed          報價來源（QuoteFeed）
+    audio         AlertAudioPlayer，None 表示不播放音效
+    event_log     EventLogWriter，None 表示不記錄
+    recorder      TickRecorder，None 表示不保存報價與事件
+    metrics       Metrics，None 時自動建立；輪詢、報價查詢、警報延遲與事件數都記錄在此
+    symbol_cache  SymbolMetaCache；指定時先用快取的小數位數，缺少或過期的品種在背景查詢，
+                  None 表示每次都向報價來源逐一查詢
+    poll_interval 輪詢週期秒數；不在交易時段或沒有新報價的品種降低頻率（PollScheduler）
+    history_size  每個品種保留的報價筆數（TickHistory）；change 警報規則的期間較長時自動擴大
+    clock         時間來源，重播時為虛擬時鐘
+
+    symbols 的順序即各列索引；trading / alert_on / played 為各列目前狀態，
+    狀態有變動的列由 take_state_changes() 取出。listeners 中的函式會以
+    (symbol, event, stale_seconds) 被呼叫，event 為 "stale"、"resume" 或 "rule"
+    （警報規則每個輪詢週期以 CompiledRules 對整張快照判斷一次）；
+    報價來源中斷與恢復時 event 為 "feed_down" / "feed_up"，symbol 為空字串。
+    中斷期間不判斷個別品種的停價，恢復後全部重新判斷。
+    """
+
+    def __init__(self, feed, tz=ZoneInfo("Asia/Shanghai"), alert_config="alert_config.csv",
+                 audio=None, event_log=None, recorder=None, symbol_cache=None, metrics=None,
+                 poll_interval=0.1, history_size=128, clock=time.time):
+        self.feed = feed
+        self.tz = tz
+        self.audio = audio
+        self.event_log = event_log
+        self.recorder = recorder
+        self.symbol_cache = symbol_cache
+        self.clock = clock
+        self.poll_interval = poll_interval
+
+        self.symbols = []
+        self.wav_paths = {}
+        self.wav_paths_resume = {}
+        self.alert_enabled = {}
+        self.tolerances = {}  # 時間容忍度（秒）
+        self.symbol_digits = {}
+        self.metadata_version = 0  # 背景查詢更新 symbol_digits 後遞增
+        self._metadata_thread = None
+        self.groups = {}
+        self.schedules = {}
+        self.schedule_book = ScheduleBook()
+        self.alert_rules = AlertRuleStore(alert_config)
+        self.compiled_rules = None
+        self._rules_version = None
+        self.snapshot = TickSnapshot()
+        self.detector = StalenessDetector(clock)
+        self.poll_scheduler = PollScheduler(poll_interval)
+        self.history = TickHistory(capacity=history_size)
+        self.listeners = []
+
+        self.trading = []
+        self.alert_on = []
+        self.played = []
+        self._state_lock = threading.Lock()
+        self._dirty = set()
+
+        self.running = False
+        self.poll_errors = 0
+        # 更換品種列表時同時持有兩者，輪詢週期與停價判斷不會用到舊列表的列索引
+        self._cycle_lock = threading.Lock()
+        self._evaluate_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._threads = []
+        self.supervisor = ConnectionSupervisor()
+
+        self.metrics = metrics if metrics is not None else Metrics()
+        self.metrics.add(Counter("price_alert_poll_overruns_total", "落後超過一個週期的輪詢次數",
+                                 source=lambda: self.poll_scheduler.overruns))
+        self.metrics.add(Gauge("price_alert_symbols", "監控中的品種數", source=lambda: len(self.symbols)))
+        self.metrics.add(Gauge("price_alert_alerts_active", "停價警報中的品種數",
+                               source=lambda: sum(self.alert_on)))
+        self.metrics.add(Gauge("price_alert_feed_up", "報價來源連線正常為 1，中斷為 0",
+                               source=lambda: 0 if self.feed_down else 1))
+        self.metrics.add(Counter("price_alert_poll_errors_total", "因例外而中斷的輪詢週期數",
+                                 source=lambda: self.poll_errors))
+        self.metrics.add(Counter("price_alert_reconnects_total", "報價來源中斷後重新連線成功的次數",
+                                 source=lambda: self.supervisor.reconnects))
+        breakers = getattr(self.feed, "breakers", None)
+        if breakers is not None:
+            self.metrics.add(Gauge("price_alert_parked_symbols", "斷路器暫停輪詢中的品種數",
+                                   source=breakers.parked))
+        self.feed.call_latency = self.metrics.feed_call_ms
+        if self.audio is not None:
+            self.audio.playbacks = self.metrics.playbacks
+        self.profiler = Profiler()
+
+    # ---- 設定 ----
+
+    def set_products(self, products):
+        """更換監控的品種（Product 列表），保留仍存在之品種的容忍度與時間表
+
+        在輪詢週期與停價判斷之間進行（_cycle_lock、_evaluate_lock），各元件的列數一次換完。
+        """
+        with self._cycle_lock, self._evaluate_lock:
+            self._replace_symbols(products)
+        self.load_symbol_digits()
+        if self.audio is not None:
+            self.audio.preload(list(self.wav_paths.values()) + list(self.wav_paths_resume.values()))
+
+    def _replace_symbols(self, products):
+        symbols = [product.symbol for product in products]
+        self.wav_paths = {product.symbol: product.wav_path for product in products}
+        self.wav_paths_resume = {product.symbol: product.wav_path_resume for product in products}
+        self.alert_enabled = {symbol: True for symbol in symbols}
+        self.tolerances = {symbol: self.tolerances.get(symbol, 0) for symbol in symbols}
+        self.groups = {symbol: self.groups.get(symbol, "") for symbol in symbols}
+        self.schedules = {symbol: self.schedules.get(symbol, CLOSED) for symbol in symbols}
+        self.schedule_book.retain(symbols)
+        for symbol, entry in self.schedules.items():
+            self.schedule_book.set_entry(symbol, entry)
+        with self._state_lock:
+            self.trading = [False] * len(symbols)
+            self.alert_on = [False] * len(symbols)
+            self.played = [False] * len(symbols)
+            self._dirty.clear()
+        self.history.set_symbols(symbols)
+        self.snapshot.set_symbols(symbols)
+        self.detector.reset(len(symbols))
+        self.poll_scheduler.reset(len(symbols))
+        self.symbols = symbols
+
+    def load_symbol_digits(self):
+        """獲取每個交易品種的小數位數；有快取時不等待報價來源"""
+        if self.symbol_cache is not None:
+            self._load_cached_digits()
+            return
+        for symbol in self.symbols:
+            try:
+                info = self.feed.symbol_info(symbol)
+                self.symbol_digits[symbol] = info.digits if info is not None else DEFAULT_DIGITS
+            except Exception as e:
+                print(f"無法獲取 {symbol} 的 digits: {e}")
+                self.symbol_digits[symbol] = DEFAULT_DIGITS
+
+    def _load_cached_digits(self):
+        cache = self.symbol_cache
+        feed_name = self.feed.name
+        for symbol in self.symbols:
+            meta = cache.get(feed_name, symbol)
+            self.symbol_digits[symbol] = meta.digits if meta is not None else DEFAULT_DIGITS
+        stale = cache.stale_symbols(feed_name, self.symbols)
+        if stale:
+            self._metadata_thread = threading.Thread(target=self._refresh_metadata, args=(stale,),
+                                                     name="symbol-metadata", daemon=True)
+            self._metadata_thread.start()
+
+    def _refresh_metadata(self, symbols):
+        fetched = self.symbol_cache.refresh(self.feed, symbols)
+        for symbol, meta in fetched.items():
+            self.symbol_digits[symbol] = meta.digits
+        if fetched:
+            self.metadata_version += 1
+
+    def set_schedule(self, symbol, group, entry):
+        self.groups[symbol] = group
+        self.schedules[symbol] = entry
+        self.schedule_book.set_entry(symbol, entry)
+        row = self.snapshot.index.get(symbol)
+        if row is not None:
+            self.detector.invalidate([row])
+
+    def apply_parameter_set(self, parameter_set):
+        """一次套用已解析的參數集（{品種: ParameterRow}），回傳套用的品種數
+
+        不在監控列表中的品種略過；所有列套用完才要求重新判斷一次。
+        """
+        count = 0
+        for symbol, params in parameter_set.items():
+            entry = self.schedules.get(symbol)
+            if entry is None:
+                continue
+            if params.tolerance is not None:
+                self.tolerances[symbol] = params.tolerance
+            entry = merge_parameter_row(entry, params)
+            self.groups[symbol] = params.group
+            self.schedules[symbol] = entry
+            self.schedule_book.set_entry(symbol, entry)
+            count += 1
+        if count:
+            self.detector.invalidate()
+        return count
+
+    def load_parameters(self, path):
+        """載入交易時間參數檔，回傳套用的品種數"""
+        return self.apply_parameter_set(read_parameter_set(path))
+
+    def parameter_rows(self):
+        """以參數檔的欄位格式輸出目前的設定"""
+        rows = []
+        for symbol in self.symbols:
+            entry = self.schedules[symbol]
+            row = [symbol, format_hms(self.tolerances.get(symbol, 0)), self.groups.get(symbol, ""),
+                   DAYS[entry.start_day], format_hms(entry.start_time),
+                   DAYS[entry.end_day], format_hms(entry.end_time)]
+            for break_start, break_end in entry.breaks:
+                row.extend([format_hms(break_start), format_hms(break_end)])
+            row.extend(["00:00:00"] * (13 - len(row)))
+            rows.append(row)
+        return rows
+
+    # ---- 狀態 ----
+
+    def set_played(self, row, played):
+        with self._state_lock:
+            if row < len(self.played) and self.played[row] != played:
+                self.played[row] = played
+                self._dirty.add(row)
+
+    def _set_status(self, row, trading, alert_on):
+        with self._state_lock:
+            if self.trading[row] != trading or self.alert_on[row] != alert_on:
+                self.trading[row] = trading
+                self.alert_on[row] = alert_on
+                self._dirty.add(row)
+
+    def take_state_changes(self):
+        """取出自上次呼叫後狀態有變動的列（已排序）"""
+        with self._state_lock:
+            rows = sorted(self._dirty)
+            self._dirty.clear()
+        return rows
+
+    def _notify(self, symbol, event, stale_seconds=None):
+        self.metrics.count_alert(event)
+        if self.recorder is not None:
+            self.recorder.record_event(symbol, event, stale_seconds, self.clock())
+        for listener in self.listeners:
+            try:
+                listener(symbol, event, stale_seconds)
+            except Exception as e:
+                print(f"事件處理錯誤: {str(e)}")
+
+    @property
+    def feed_down(self):
+        return self.supervisor.down
+
+    def _feed_event(self, event):
+        self.metrics.count_alert(event)
+        self._log("", event)
+        for listener in self.listeners:
+            try:
+                listener("", event, None)
+            except Exception as e:
+                print(f"事件處理錯誤: {str(e)}")
+
+    def _play(self, path, priority):
+        """排入播放；實際播放次數由 AlertAudioPlayer 記錄在 metrics.playbacks"""
+        return self.audio is not None and self.audio.play(path, priority)
+
+    def _log(self, symbol, event, stale_seconds=None, latency_ms=None):
+        if self.event_log is not None:
+            self.event_log.log(symbol, event, stale_seconds, latency_ms, self.clock())
+
+    # ---- 判斷 ----
+
+    def evaluate(self, now_ts=None):
+        """判斷所有品種的交易狀態、停價警報與恢復"""
+        self._evaluate_rows(range(len(self.trading)), now_ts)
+
+    def evaluate_due(self):
+        """不等待，判斷期限已到或被標記的列；回傳判斷的列數"""
+        rows = self.detector.wait(0)
+        if rows:
+            self._evaluate_rows(rows)
+        return len(rows)
+
+    def next_deadline(self):
+        return self.detector.next_wake()
+
+    def invalidate(self, rows=None):
+        """設定（啟用、容忍度、時間表、語音狀態）被修改後，要求立即重新判斷"""
+        self.detector.invalidate(rows)
+
+    def _evaluate_rows(self, rows, now_ts=None):
+        if self.feed_down:
+            # 報價來源中斷時不判斷個別品種，恢復連線後由 invalidate() 重新判斷
+            return
+        now_ts = self.clock() if now_ts is None else now_ts
+        # 品種列表更換前取出的列可能已超出新列表
+        size = len(self.trading)
+        rows = [row for row in rows if row < size]
+        symbols, records = self.snapshot.read_rows(rows)
+        if len(symbols) != len(self.trading):
+            return
+        current_time = datetime.datetime.fromtimestamp(now_ts, tz=self.tz)
+        for row_idx, record in zip(rows, records):
+            symbol = symbols[row_idx]
+            if not record['version']:
+                # 尚未收到報價：收到第一筆時再判斷
+                self.detector.schedule(row_idx, NEVER, watch_ticks=True)
+                continue
+            wake_at = self._evaluate_row(row_idx, symbol, record['time_msc'] / 1000, now_ts, current_time)
+            self.detector.schedule(row_idx, min(wake_at, self.schedule_book.next_transition(symbol, current_time)),
+                                   watch_ticks=self.alert_on[row_idx] or self.played[row_idx])
+
+    def _evaluate_row(self, row_idx, symbol, tick_time, now_ts, current_time):
+        """判斷單一品種，回傳下一次停價期限（不需要時為 NEVER）"""
+        is_trading_now = self.schedule_book.is_trading(symbol, current_time)
+        time_diff_seconds = max(0.0, now_ts - tick_time)
+        tolerance_seconds = self.tolerances.get(symbol, 0)
+        enabled = self.alert_enabled.get(symbol, True)
+
+        alert_on = enabled and is_trading_now and time_diff_seconds > tolerance_seconds
+        was_on = self.alert_on[row_idx]
+        self._set_status(row_idx, is_trading_now, alert_on)
+        if alert_on and not was_on:
+            self.metrics.alert_latency_ms.observe((time_diff_seconds - tolerance_seconds) * 1000)
+            self._notify(symbol, "stale", time_diff_seconds)
+        elif was_on and not alert_on:
+            self._notify(symbol, "resume", time_diff_seconds)
+
+        # 只有音效確實排入播放才標記已播放；檔案不存在、靜音或已在佇列中時下次判斷再試
+        if alert_on and not self.played[row_idx]:
+            if self._play(self.wav_paths.get(symbol, ""), PRIORITY_STALE):
+                self._log(symbol, "stale", time_diff_seconds,
+                          (time_diff_seconds - tolerance_seconds) * 1000)
+                self.set_played(row_idx, True)
+
+        if (enabled and is_trading_now and
+                time_diff_seconds < tolerance_seconds and
+                self.played[row_idx]):
+            self.set_played(row_idx, False)
+            if self._play(self.wav_paths_resume.get(symbol, ""), PRIORITY_RESUME):
+                self._log(symbol, "resume", time_diff_seconds)
+
+        if enabled and is_trading_now and not alert_on:
+            # 時間差須「大於」容忍度才警報，期限之後稍晚再判斷
+            return tick_time + tolerance_seconds + DEADLINE_SLACK
+        return NEVER
+
+    def _compile_alert_rules(self):
+        """警報設定或品種列表變更時重新編譯規則；沒有規則時回傳 None"""
+        self.alert_rules.refresh()
+        symbols = self.symbols
+        compiled = self.compiled_rules
+        if compiled is None or compiled.symbols is not symbols or self._rules_version != self.alert_rules.version:
+            # 只取監控中品種的規則（AlertRuleStore 的品種索引）
+            version, rules = self.alert_rules.rules(symbols)
+            rules = self._fit_history(rules)
+            compiled = self.compiled_rules = CompiledRules(rules, symbols, self.snapshot.version)
+            self._rules_version = version
+        return compiled if len(compiled) else None
+
+    def _fit_history(self, rules):
+        """擴大報價歷史使其涵蓋最長的 change 期間，回傳可判斷的規則
+
+        每個品種每次輪詢至多寫入一筆，需要 期間 / 輪詢間隔 筆；
+        超過 MAX_HISTORY_SIZE 筆才能涵蓋的規則略過。
+        """
+        interval = min(self.poll_interval, getattr(self.feed, "poll_interval", self.poll_interval))
+        limit = MAX_HISTORY_SIZE * interval
+        kept = []
+        longest = 0.0
+        for rule in rules:
+            if rule.kind == CHANGE:
+                if rule.window > limit:
+                    print(f"警報規則 {rule.symbol} {rule.condition}: 期間超過報價歷史可涵蓋的 {limit:g} 秒，略過")
+                    continue
+                longest = max(longest, rule.window)
+            kept.append(rule)
+        needed = math.ceil(longest / interval) + 2 if longest else 0
+        if needed > self.history.capacity:
+            self.history.resize(needed)
+        return kept
+
+    def check_alert_rules(self, compiled, received=None):
+        """對目前的報價快照判斷所有警報規則，觸發者播放音效並通知"""
+        now = self.clock()
+        version, _, table = self.snapshot.read()
+        for i in compiled.evaluate(version, table, now, self.history, self.trading):
+            rule = compiled.rules[i]
+            if received is not None:
+                self.metrics.alert_latency_ms.observe((now - received) * 1000)
+            if self._play(rule.wav_path, PRIORITY_RULE):
+                self._log(rule.symbol, "rule")
+            self._notify(rule.symbol, "rule")
+
+    # ---- 執行緒 ----
+
+    def poll_once(self, symbols=None):
+        """輪詢一次 symbols（預設為所有品種），只將有變動的報價發布到快照並寫入報價歷史，
+        最後對整張快照判斷一次警報規則"""
+        compiled = self._compile_alert_rules()
+        first_received = None
+        for batch in self.feed.fetch_changes(symbols):
+            received = self.clock()
+            if first_received is None:
+                first_received = received
+            now_msc = int(received * 1000)
+            layout_symbols, index = self.snapshot.layout()
+            ticks = []
+            rows, times_msc, bids, asks = [], [], [], []
+            for tick in batch:
+                # 報價時間不得晚於本機時間
+                ticks.append((tick.symbol, min(tick.time_msc, now_msc), tick.bid, tick.ask))
+                row = index.get(tick.symbol)
+                if row is not None:
+                    rows.append(row)
+                    times_msc.append(tick.time_msc)
+                    bids.append(tick.bid)
+                    asks.append(tick.ask)
+            self.snapshot.publish(ticks)
+            self.detector.touch(rows)
+            self.history.append(rows, times_msc, bids, asks, received)
+            self.poll_scheduler.observe(rows, times_msc, self.poll_scheduler.clock())
+            if self.recorder is not None:
+                self.recorder.record_ticks(layout_symbols, rows, times_msc, bids, asks, received)
+        if compiled is not None:
+            try:
+                self.check_alert_rules(compiled, first_received)
+            except Exception as e:
+                print(f"警報規則判斷錯誤: {str(e)}")
+
+    def _update_poll_tiers(self, now):
+        current_time = datetime.datetime.fromtimestamp(self.clock(), tz=self.tz)
+        symbols = self.symbols
+        trading = [self.schedule_book.is_trading(symbol, current_time) for symbol in symbols]
+        self.poll_scheduler.set_tiers(trading, self.alert_on, now)
+        self.feed.set_tiers(symbols, trading, list(self.alert_on))
+
+    def _poll_loop(self):
+        scheduler = self.poll_scheduler
+        selected_symbols = None
+        next_tiering = 0.0
+        scheduler.start()
+        while self.running:
+            # 單一週期出錯只略過該週期，不讓輪詢執行緒結束
+            try:
+                was_down = self.feed_down
+                available, recovered = self.supervisor.check(self.feed)
+                if recovered:
+                    selected_symbols = None
+                    if self.compiled_rules is not None:
+                        self.compiled_rules.restart_frozen(self.clock())
+                    self._feed_event("feed_up")
+                    self.invalidate()
+                elif not available and not was_down:
+                    self._feed_event("feed_down")
+                if available:
+                    with self._cycle_lock:
+                        selected_symbols, next_tiering = self._poll_cycle(selected_symbols, next_tiering)
+            except Exception as e:
+                self.poll_errors += 1
+                print(f"輪詢錯誤: {str(e)}")
+            scheduler.wait_next(self._wake)
+
+    def _poll_cycle(self, selected_symbols, next_tiering):
+        """輪詢一次到期的品種，回傳 (已選取的品種列表, 下一次重新分級的時間)；呼叫端須持有 _cycle_lock"""
+        scheduler = self.poll_scheduler
+        # 品種列表變更時才重新選取，每個品種只選取一次
+        symbols = self.symbols
+        if symbols is not selected_symbols:
+            self.feed.select(symbols)
+            selected_symbols = symbols
+        now = scheduler.clock()
+        if now >= next_tiering:
+            self._update_poll_tiers(now)
+            next_tiering = now + 1.0
+        rows = scheduler.due(now)
+        if len(rows):
+            cycle_start = time.perf_counter()
+            with self.profiler.section("poll"):
+                self.poll_once(None if len(rows) == len(symbols) else [symbols[row] for row in rows])
+            self.metrics.poll_cycle_ms.observe((time.perf_counter() - cycle_start) * 1000)
+            scheduler.polled(rows, now)
+        return selected_symbols, next_tiering
+
+    def _evaluate_loop(self):
+        # 只在最早的停價期限到期或警報中的品種收到報價時醒來
+        while self.running:
+            rows = self.detector.wait()
+            if not self.running:
+                break
+            try:
+                with self._evaluate_lock, self.profiler.section("evaluate"):
+                    self._evaluate_rows(rows)
+            except Exception as e:
+                print(f"狀態判斷錯誤: {str(e)}")
+
+    def open(self):
+        """連線報價來源並啟動音效與記錄執行緒；連線失敗回傳 False"""
+        if not self.feed.connect():
+            return False
+        if self.audio is not None:
+            self.audio.start()
+        if self.event_log is not None:
+            self.event_log.start()
+        if self.recorder is not None:
+            self.recorder.start()
+        return True
+
+    def start(self):
+        if self.running:
+            return True
+        if not self.feed.connect():
+            return False
+        self.running = True
+        self._wake.clear()
+        self.detector.open()
+        self.detector.invalidate()
+        self._threads = [threading.Thread(target=self._poll_loop, name="price-poll", daemon=True),
+                         threading.Thread(target=self._evaluate_loop, name="price-evaluate", daemon=True)]
+        for thread in self._threads:
+            thread.start()
+        return True
+
+    def stop(self):
+        self.running = False
+        self._wake.set()
+        self.detector.close()
+        for thread in self._threads:
+            thread.join(timeout=2.0)
+        self._threads = []
+
+    def close(self):
+        self.stop()
+        self.feed.shutdown()
+        if self.audio is not None:
+            self.audio.stop()
+        if self.event_log is not None:
+            self.event_log.stop()
+        if self.recorder is not None:
+            self.recorder.stop()
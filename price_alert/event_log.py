@@ -0,0 +1,141 @@
+"""警報事件記錄：由背景執行緒批次寫入，可依日期或大小輪替"""
+import csv
+import datetime
+import io
+import json
+import os
+import queue
+import threading
+import time
+
+FIELDS = ['timestamp', 'symbol', 'event', 'stale_seconds', 'latency_ms']
+
+
+class EventLogWriter:
+    """以佇列接收事件，累積到 flush_size 筆或 flush_interval 秒後一次寫入
+
+    檔名為 {prefix}_{YYYYMMDD}.{csv|jsonl}；rotate_daily 為 False 時省略日期。
+    max_bytes 大於 0 時，檔案超過大小後依序改寫 {prefix}_{日期}_1、_2 ...
+    log() 只把記錄放入佇列，不會在呼叫端開檔。
+    """
+
+    def __init__(self, directory=".", prefix="play_log", fmt="csv", flush_size=100,
+                 flush_interval=1.0, rotate_daily=True, max_bytes=0, tz=None):
+        if fmt not in ("csv", "jsonl"):
+            raise ValueError(f"不支援的記錄格式: {fmt}")
+        self.directory = directory
+        self.prefix = prefix
+        self.fmt = fmt
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.rotate_daily = rotate_daily
+        self.max_bytes = max_bytes
+        self.tz = tz
+        self._queue = queue.SimpleQueue()
+        self._thread = None
+        self._file = None
+        self._path = None
+        self._day = None
+        self._part = 0
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="event-log", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout=5.0)
+            self._thread = None
+
+    def log(self, symbol, event, stale_seconds=None, latency_ms=None, timestamp=None):
+        self._queue.put((time.time() if timestamp is None else timestamp,
+                         symbol, event, stale_seconds, latency_ms))
+
+    def _target_path(self, day):
+        name = self.prefix
+        if self.rotate_daily:
+            name += f"_{day}"
+        if self._part:
+            name += f"_{self._part}"
+        return os.path.join(self.directory, f"{name}.{self.fmt}")
+
+    def _open_for(self, day):
+        if self._file is not None and day == self._day:
+            if not self.max_bytes or self._file.tell() < self.max_bytes:
+                return
+            self._part += 1
+        elif day != self._day:
+            self._part = 0
+        self._close()
+        self._day = day
+        while True:
+            self._path = self._target_path(day)
+            if not self.max_bytes or not os.path.exists(self._path) \
+                    or os.path.getsize(self._path) < self.max_bytes:
+                break
+            self._part += 1
+        os.makedirs(self.directory, exist_ok=True)
+        is_new = not os.path.exists(self._path) or os.path.getsize(self._path) == 0
+        self._file = open(self._path, 'a', newline='', encoding='utf-8')
+        if is_new and self.fmt == "csv":
+            self._file.write(",".join(FIELDS) + "\r\n")
+
+    def _close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _format(self, records):
+        if self.fmt == "jsonl":
+            return "".join(json.dumps(dict(zip(FIELDS, record)), ensure_ascii=False) + "\n"
+                           for record in records)
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(records)
+        return buffer.getvalue()
+
+    def _write(self, batch):
+        rows_by_day = []
+        for ts, symbol, event, stale_seconds, latency_ms in batch:
+            moment = datetime.datetime.fromtimestamp(ts, tz=self.tz)
+            record = (moment.isoformat(timespec='milliseconds'), symbol, event,
+                      "" if stale_seconds is None else round(stale_seconds, 3),
+                      "" if latency_ms is None else round(latency_ms, 3))
+            if self.fmt == "jsonl":
+                record = tuple(None if value == "" else value for value in record)
+            day = moment.strftime('%Y%m%d')
+            if rows_by_day and rows_by_day[-1][0] == day:
+                rows_by_day[-1][1].append(record)
+            else:
+                rows_by_day.append((day, [record]))
+        try:
+            for day, records in rows_by_day:
+                self._open_for(day)
+                self._file.write(self._format(records))
+            self._file.flush()
+        except Exception as e:
+            print(f"寫入事件記錄失敗: {str(e)}")
+            self._close()
+
+    def _run(self):
+        batch = []
+        deadline = None
+        running = True
+        while running:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = ()
+            if item is None:
+                running = False
+            elif item:
+                batch.append(item)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+            if batch and (not running or len(batch) >= self.flush_size or time.monotonic() >= deadline):
+                self._write(batch)
+                batch = []
+                deadline = None
+        self._close()
@@ -0,0 +1,331 @@
+"""報價來源轉接層：MT5 終端與可重現的模擬報價"""
+import collections
+import math
+import random
+import threading
+import time
+
+from price_alert.health import SymbolBreakers
+
+Tick = collections.namedtuple('Tick', ['symbol', 'time', 'time_msc', 'bid', 'ask'])
+SymbolMeta = collections.namedtuple('SymbolMeta', ['symbol', 'digits', 'point', 'trade_mode'])
+
+
+class QuoteFeed:
+    """報價來源介面
+
+    select() 設定要監控的品種列表；fetch_batches() 逐批回傳最新報價，
+    呼叫端可在每批之後立即發佈，不必等整個列表輪詢完畢。fetch_batches(symbols)
+    只輪詢已選取品種中的一部分；不是逐一查詢的來源可以忽略 symbols。
+
+    fetch_changes() 與 fetch_batches() 相同，但只回傳 time_msc、bid 或 ask
+    與上次不同的報價，下游（快照、停價判斷、警報）只需處理有變動的品種。
+
+    healthy() 回報與終端的連線是否正常，由 ConnectionSupervisor 每個週期檢查；
+    reconnect() 在斷線後重新建立連線。
+
+    set_tiers() 由引擎每秒傳入各品種的交易狀態與警報狀態；在本行程輪詢的來源
+    由引擎的 PollScheduler 決定輪詢哪些品種，可以忽略，子行程來源則轉給子行程排程。
+
+    symbol_info() / symbol_infos() 由背景的品種資料執行緒呼叫，與輪詢執行緒並行；
+    直接呼叫終端的來源須以 lock 串接兩者的呼叫。
+    """
+
+    name = "base"
+    call_latency = None  # metrics.Histogram；設定時記錄每次報價查詢的耗時（毫秒）
+
+    def __init__(self):
+        self.symbols = []
+        self._last_ticks = {}
+        self.lock = threading.RLock()
+
+    def connect(self):
+        return True
+
+    def shutdown(self):
+        pass
+
+    def healthy(self):
+        return True
+
+    def reconnect(self):
+        self.shutdown()
+        return self.connect()
+
+    def select(self, symbols):
+        self.symbols = list(symbols)
+        keep = set(self.symbols)
+        self._last_ticks = {symbol: key for symbol, key in self._last_ticks.items() if symbol in keep}
+
+    def set_tiers(self, symbols, trading, urgent):
+        pass
+
+    def fetch_batches(self, symbols=None):
+        raise NotImplementedError
+
+    def fetch_changes(self, symbols=None):
+        last_ticks = self._last_ticks
+        for batch in self.fetch_batches(symbols):
+            changed = []
+            for tick in batch:
+                key = (tick.time_msc, tick.bid, tick.ask)
+                if last_ticks.get(tick.symbol) != key:
+                    last_ticks[tick.symbol] = key
+                    changed.append(tick)
+            if changed:
+                yield changed
+
+    def fetch(self):
+        ticks = []
+        for batch in self.fetch_batches():
+            ticks.extend(batch)
+        return ticks
+
+    def symbol_info(self, symbol):
+        return None
+
+    def symbol_infos(self, symbols):
+        """查詢多個品種，回傳 {symbol: SymbolMeta 或 None}；可一次送出多個查詢的來源可覆寫"""
+        result = {}
+        for symbol in symbols:
+            try:
+                result[symbol] = self.symbol_info(symbol)
+            except Exception as e:
+                print(f"無法獲取 {symbol} 的品種資料: {e}")
+                result[symbol] = None
+        return result
+
+
+class MT5Feed(QuoteFeed):
+    """MetaTrader5 終端報價
+
+    每個品種只在首次出現時呼叫 symbol_select；重新連線後才重新選取。
+    MT5 沒有多品種的報價呼叫，因此每批仍逐一呼叫 symbol_info_tick。
+    選取或報價查詢連續失敗的品種由 SymbolBreakers 暫停，之後以遞增間隔重試。
+    MetaTrader5 模組不是執行緒安全的，所有終端呼叫都在 lock 內進行；
+    輪詢每批釋放一次，背景的品種資料查詢可以插在批與批之間。
+    """
+
+    name = "mt5"
+
+    def __init__(self, batch_size=50, **login):
+        super().__init__()
+        self.batch_size = batch_size
+        self.login = {k: v for k, v in login.items() if v is not None}
+        self.mt5 = None
+        self._selected = set()
+        self.breakers = SymbolBreakers()
+
+    def connect(self):
+        if self.mt5 is None:
+            import MetaTrader5
+            self.mt5 = MetaTrader5
+        self._selected.clear()
+        self.breakers.reset()
+        login = dict(self.login)
+        # 終端路徑是 initialize() 的第一個不具名參數
+        path = login.pop('path', None)
+        with self.lock:
+            if path:
+                return bool(self.mt5.initialize(path, **login))
+            return bool(self.mt5.initialize(**login))
+
+    def shutdown(self):
+        if self.mt5 is not None:
+            with self.lock:
+                self.mt5.shutdown()
+
+    def healthy(self):
+        try:
+            with self.lock:
+                info = self.mt5.terminal_info()
+        except Exception:
+            return False
+        return info is not None and bool(info.connected)
+
+    def _select_symbol(self, symbol, now):
+        try:
+            with self.lock:
+                if self.mt5.symbol_select(symbol, True):
+                    self._selected.add(symbol)
+                    return True
+                error = self.mt5.last_error()
+            self.breakers.failure(symbol, now, f"無法選取: {error}")
+        except Exception as e:
+            self.breakers.failure(symbol, now, f"選取時出錯: {str(e)}")
+        return False
+
+    def select(self, symbols):
+        super().select(symbols)
+        self.breakers.retain(self.symbols)
+        now = time.monotonic()
+        with self.lock:
+            for symbol in self.symbols:
+                if symbol not in self._selected and self.breakers.allow(symbol, now):
+                    self._select_symbol(symbol, now)
+
+    def fetch_batches(self, symbols=None):
+        symbol_info_tick = self.mt5.symbol_info_tick
+        symbols = self.symbols if symbols is None else symbols
+        latency = self.call_latency
+        breakers = self.breakers
+        selected = self._selected
+        now = time.monotonic()
+        for start in range(0, len(symbols), self.batch_size):
+            batch = []
+            with self.lock:
+                for symbol in symbols[start:start + self.batch_size]:
+                    if not breakers.allow(symbol, now):
+                        continue
+                    if symbol not in selected and not self._select_symbol(symbol, now):
+                        continue
+                    try:
+                        if latency is None:
+                            tick = symbol_info_tick(symbol)
+                        else:
+                            call_start = time.perf_counter()
+                            tick = symbol_info_tick(symbol)
+                            latency.observe((time.perf_counter() - call_start) * 1000)
+                    except Exception as e:
+                        breakers.failure(symbol, now, str(e))
+                        continue
+                    if tick is None:
+                        breakers.failure(symbol, now, f"沒有報價: {self.mt5.last_error()}")
+                        continue
+                    breakers.success(symbol)
+                    batch.append(Tick(symbol, tick.time, tick.time_msc, tick.bid, tick.ask))
+            yield batch
+
+    def symbol_info(self, symbol):
+        with self.lock:
+            if symbol not in self._selected:
+                self.mt5.symbol_select(symbol, True)
+            info = self.mt5.symbol_info(symbol)
+        if info is None:
+            return None
+        return SymbolMeta(symbol, info.digits, info.point, info.trade_mode)
+
+
+class _SimSymbol:
+    __slots__ = ('price', 'spread', 'digits', 'rate', 'tick_time', 'next_time', 'bid', 'ask')
+
+
+class SimulatedFeed(QuoteFeed):
+    """行程內的模擬報價，用於在沒有 MT5 終端的環境下執行與壓力測試
+
+    tick_rate      每個品種每秒的平均報價數，可為數字或 {symbol: rate}
+    gap_probability 每筆報價之後出現報價空檔的機率
+    gap_seconds    報價空檔長度範圍 (最短, 最長)
+    outages        全體斷線區間 [(開始秒數, 持續秒數), ...]，以 connect() 時間起算
+    disconnect     True 時斷線區間內 healthy() 回傳 False（模擬終端斷線），否則只是沒有報價
+    seed           亂數種子；相同種子與相同時鐘序列會產生相同報價
+    clock          時間來源，預設為 time.time
+    """
+
+    name = "sim"
+
+    def __init__(self, tick_rate=2.0, gap_probability=0.0, gap_seconds=(5.0, 30.0),
+                 outages=(), seed=0, batch_size=500, clock=time.time, disconnect=False):
+        super().__init__()
+        self.tick_rate = tick_rate
+        self.gap_probability = gap_probability
+        self.gap_seconds = gap_seconds
+        self.outages = list(outages)
+        self.disconnect = disconnect
+        self.seed = seed
+        self.batch_size = batch_size
+        self.clock = clock
+        self.started_at = None
+        self._state = {}
+
+    def connect(self):
+        if self.started_at is None:
+            self.started_at = self.clock()
+        return True
+
+    def healthy(self):
+        return not (self.disconnect and self.started_at is not None and self.in_outage(self.clock()))
+
+    def in_outage(self, now):
+        offset = now - self.started_at
+        return any(start <= offset < start + duration for start, duration in self.outages)
+
+    def _rng(self, symbol):
+        return random.Random(f"{self.seed}:{symbol}")
+
+    def _init_symbol(self, symbol, now):
+        rng = self._rng(symbol)
+        state = _SimSymbol()
+        state.price = 10 ** rng.uniform(-0.5, 4.5)
+        state.digits = 5 if state.price < 10 else 3 if state.price < 1000 else 2
+        state.spread = round(state.price * rng.uniform(0.00005, 0.0005), state.digits) or 10 ** -state.digits
+        if isinstance(self.tick_rate, dict):
+            state.rate = self.tick_rate.get(symbol, 0.0)
+        else:
+            state.rate = self.tick_rate
+        state.tick_time = now
+        state.next_time = now
+        state.bid = round(state.price, state.digits)
+        state.ask = round(state.price + state.spread, state.digits)
+        return state, rng
+
+    def select(self, symbols):
+        super().select(symbols)
+        now = self.clock()
+        for symbol in self.symbols:
+            if symbol not in self._state:
+                self._state[symbol] = self._init_symbol(symbol, now)
+
+    def _advance(self, state, rng, now):
+        if state.rate <= 0:
+            return
+        while state.next_time <= now:
+            if self.in_outage(state.next_time):
+                state.next_time = self.started_at + self._outage_end(state.next_time - self.started_at)
+                continue
+            state.price *= math.exp(rng.gauss(0.0, 0.0002))
+            state.bid = round(state.price, state.digits)
+            state.ask = round(state.price + state.spread, state.digits)
+            state.tick_time = state.next_time
+            state.next_time += rng.expovariate(state.rate)
+            if self.gap_probability and rng.random() < self.gap_probability:
+                state.next_time += rng.uniform(*self.gap_seconds)
+
+    def _outage_end(self, offset):
+        for start, duration in self.outages:
+            if start <= offset < start + duration:
+                return start + duration
+        return offset
+
+    def fetch_batches(self, symbols=None):
+        now = self.clock()
+        symbols = self.symbols if symbols is None else symbols
+        for start in range(0, len(symbols), self.batch_size):
+            batch = []
+            for symbol in symbols[start:start + self.batch_size]:
+                state, rng = self._state[symbol]
+                self._advance(state, rng, now)
+                tick_msc = int(state.tick_time * 1000)
+                batch.append(Tick(symbol, tick_msc // 1000, tick_msc, state.bid, state.ask))
+            yield batch
+
+    def symbol_info(self, symbol):
+        if symbol not in self._state:
+            self._state[symbol] = self._init_symbol(symbol, self.clock())
+        state, _ = self._state[symbol]
+        return SymbolMeta(symbol, state.digits, 10 ** -state.digits, 4)
+
+
+FEEDS = {
+    MT5Feed.name: MT5Feed,
+    SimulatedFeed.name: SimulatedFeed,
+}
+
+
+def create_feed(kind="mt5", **options):
+    """依名稱建立報價來源"""
+    try:
+        feed_class = FEEDS[kind]
+    except KeyError:
+        raise ValueError(f"未知的報價來源: {kind}")
+    return feed_class(**options)
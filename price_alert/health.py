@@ -0,0 +1,120 @@
+"""報價來源的健康狀態：終端連線監督與每個品種的斷路器
+
+ConnectionSupervisor 每個輪詢週期檢查一次終端，斷線時停止輪詢並以指數退避重新連線；
+SymbolBreakers 讓連續失敗的品種暫停輪詢，之後以逐漸拉長的間隔重試，
+錯誤訊息只在暫停與恢復時輸出一次，不會每個週期重複。
+"""
+import time
+
+
+def backoff_delay(failures, base, max_delay):
+    """第 failures 次失敗後的等待秒數：base、2 base、4 base ... 最多 max_delay"""
+    return min(max_delay, base * 2 ** max(0, failures - 1))
+
+
+class ConnectionSupervisor:
+    """down 為 True 表示報價來源中斷（與個別品種停價不同）"""
+
+    def __init__(self, base_delay=1.0, max_delay=60.0, clock=time.monotonic):
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.clock = clock
+        self.down = False
+        self.down_since = None
+        self.attempts = 0
+        self.reconnects = 0
+        self.next_attempt = 0.0
+
+    def check(self, feed):
+        """回傳 (可以輪詢, 本次是否剛恢復連線)"""
+        now = self.clock()
+        if not self.down:
+            if feed.healthy():
+                return True, False
+            self.down = True
+            self.down_since = now
+            self.attempts = 0
+            self.next_attempt = now + self.base_delay
+            print(f"報價來源中斷 ({feed.name})，{self.base_delay:g} 秒後重新連線")
+            return False, False
+        if now < self.next_attempt:
+            return False, False
+        self.attempts += 1
+        try:
+            connected = feed.reconnect() and feed.healthy()
+        except Exception as e:
+            print(f"重新連線錯誤: {str(e)}")
+            connected = False
+        if connected:
+            print(f"報價來源已恢復連線 ({feed.name})，中斷 {now - self.down_since:.1f} 秒")
+            self.down = False
+            self.down_since = None
+            self.reconnects += 1
+            return True, True
+        delay = backoff_delay(self.attempts + 1, self.base_delay, self.max_delay)
+        self.next_attempt = now + delay
+        print(f"重新連線失敗（第 {self.attempts} 次），{delay:g} 秒後重試")
+        return False, False
+
+
+class SymbolBreakers:
+    """每個品種的斷路器
+
+    連續失敗 threshold 次後暫停該品種，第 n 次暫停等待 backoff_delay(n) 秒；
+    時間到時放行一次嘗試，成功即恢復，失敗則以更長的間隔再次暫停。
+    """
+
+    def __init__(self, threshold=3, base_delay=1.0, max_delay=300.0, clock=time.monotonic):
+        self.threshold = threshold
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.clock = clock  # parked() 未指定 now 時使用，須與 allow() / failure() 的 now 同一時鐘
+        self._failures = {}   # 品種 → 連續失敗次數
+        self._trips = {}      # 品種 → 暫停次數
+        self._open_until = {}  # 品種 → 可再嘗試的時間
+
+    def allow(self, symbol, now):
+        until = self._open_until.get(symbol)
+        return until is None or now >= until
+
+    def success(self, symbol):
+        if symbol in self._failures:
+            del self._failures[symbol]
+            if self._open_until.pop(symbol, None) is not None:
+                print(f"恢復輪詢 {symbol}")
+            self._trips.pop(symbol, None)
+
+    def failure(self, symbol, now, reason=""):
+        failures = self._failures.get(symbol, 0) + 1
+        self._failures[symbol] = failures
+        if failures < self.threshold:
+            return
+        trips = self._trips.get(symbol, 0) + 1
+        self._trips[symbol] = trips
+        delay = backoff_delay(trips, self.base_delay, self.max_delay)
+        self._open_until[symbol] = now + delay
+        if trips == 1:
+            print(f"暫停輪詢 {symbol}（連續 {failures} 次失敗: {reason}），{delay:g} 秒後重試")
+
+    def retain(self, symbols):
+        """移除不在列表中的品種"""
+        keep = set(symbols)
+        self.reset([symbol for symbol in set(self._failures) | set(self._open_until) if symbol not in keep])
+
+    def reset(self, symbols=None):
+        """清除全部或指定品種的狀態（例如重新連線後）"""
+        if symbols is None:
+            self._failures.clear()
+            self._trips.clear()
+            self._open_until.clear()
+            return
+        for symbol in symbols:
+            self._failures.pop(symbol, None)
+            self._trips.pop(symbol, None)
+            self._open_until.pop(symbol, None)
+
+    def parked(self, now=None):
+        """目前暫停中（重試時間尚未到）的品種數；到期但尚未重試的品種不計入"""
+        now = self.clock() if now is None else now
+        # 量測服務的執行緒也會呼叫，先複製一份再逐一比較
+        return sum(1 for until in list(self._open_until.values()) if until > now)
@@ -0,0 +1,181 @@
+"""每個品種固定容量的報價歷史，所有品種共用一個預先配置的 NumPy 陣列"""
+import threading
+import time
+
+import numpy as np
+
+HISTORY_DTYPE = np.dtype([
+    ('time_msc', 'i8'),  # 報價時間（毫秒）
+    ('bid', 'f8'),
+    ('ask', 'f8'),
+    ('recv', 'f8'),      # 本機接收時間（秒）
+])
+
+
+class TickHistory:
+    """buffer 的形狀為 (品種數, capacity)，每列為該品種的環狀緩衝區
+
+    count[row] 為該品種累計寫入的筆數，下一筆寫入位置為 count % capacity。
+    append() 一次寫入一批報價（每個品種至多一筆），與上一筆完全相同者略過；
+    記憶體用量固定為 品種數 × capacity × 32 位元組，與執行時間長短無關。
+    """
+
+    def __init__(self, symbols=(), capacity=128):
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        self.symbols = []
+        self.index = {}
+        self.buffer = np.zeros((0, capacity), dtype=HISTORY_DTYPE)
+        self.count = np.zeros(0, dtype=np.int64)
+        self.started_at = None  # 第一筆報價的接收時間
+        self.set_symbols(symbols)
+
+    def set_symbols(self, symbols):
+        """更換品種列表，保留仍存在之品種的歷史"""
+        symbols = list(symbols)
+        buffer = np.zeros((len(symbols), self.capacity), dtype=HISTORY_DTYPE)
+        count = np.zeros(len(symbols), dtype=np.int64)
+        with self._lock:
+            for row, symbol in enumerate(symbols):
+                old_row = self.index.get(symbol)
+                if old_row is not None:
+                    buffer[row] = self.buffer[old_row]
+                    count[row] = self.count[old_row]
+            self.symbols = symbols
+            self.index = {symbol: row for row, symbol in enumerate(symbols)}
+            self.buffer = buffer
+            self.count = count
+
+    def resize(self, capacity):
+        """更改每個品種保留的筆數，保留各品種最近的報價"""
+        with self._lock:
+            if capacity == self.capacity:
+                return
+            stored = np.minimum(self.count, self.capacity)
+            keep = np.minimum(stored, capacity)
+            positions = np.arange(capacity)
+            slots = (self.count[:, None] - keep[:, None] + positions) % self.capacity
+            filled = positions < keep[:, None]
+            buffer = np.zeros((len(self.count), capacity), dtype=HISTORY_DTYPE)
+            rows = np.broadcast_to(np.arange(len(self.count))[:, None], slots.shape)
+            buffer[filled] = self.buffer[rows[filled], slots[filled]]
+            self.buffer = buffer
+            self.count = keep.astype(np.int64)
+            self.capacity = capacity
+
+    def append(self, rows, time_msc, bid, ask, recv=None):
+        """寫入一批報價，rows 不可重複；回傳實際寫入的筆數"""
+        rows = np.asarray(rows, dtype=np.intp)
+        if not rows.size:
+            return 0
+        time_msc = np.asarray(time_msc, dtype=np.int64)
+        bid = np.asarray(bid, dtype=np.float64)
+        ask = np.asarray(ask, dtype=np.float64)
+        recv = time.time() if recv is None else recv
+        with self._lock:
+            if self.started_at is None:
+                self.started_at = recv
+            valid = rows < len(self.count)
+            if not valid.all():
+                rows, time_msc, bid, ask = rows[valid], time_msc[valid], bid[valid], ask[valid]
+            count = self.count[rows]
+            last = self.buffer[rows, (count - 1) % self.capacity]
+            new = ((count == 0) | (last['time_msc'] != time_msc) |
+                   (last['bid'] != bid) | (last['ask'] != ask))
+            rows, count = rows[new], count[new]
+            position = count % self.capacity
+            target = self.buffer[rows, position]
+            target['time_msc'] = time_msc[new]
+            target['bid'] = bid[new]
+            target['ask'] = ask[new]
+            target['recv'] = recv
+            self.buffer[rows, position] = target
+            self.count[rows] = count + 1
+            return int(rows.size)
+
+    def recent(self, symbol, n=None):
+        """回傳該品種最近 n 筆（依時間先後）的副本，n 為 None 時回傳全部"""
+        row = self.index.get(symbol)
+        if row is None:
+            return np.zeros(0, dtype=HISTORY_DTYPE)
+        with self._lock:
+            total = int(self.count[row])
+            size = min(total, self.capacity) if n is None else min(n, total, self.capacity)
+            slots = (total - size + np.arange(size)) % self.capacity
+            return self.buffer[row, slots]
+
+    def bids_at(self, rows, before_msc):
+        """各列在 before_msc（含）之前最後一筆的 bid
+
+        緩衝區內最舊的一筆仍晚於 before_msc（尚未收到那麼早的報價，或已被覆寫）時為 nan，
+        不以較晚的價格代替；before_msc 可為單一值或與 rows 等長的陣列。
+        """
+        rows = np.asarray(rows, dtype=np.intp)
+        before_msc = np.broadcast_to(np.asarray(before_msc, dtype=np.int64), rows.shape)
+        with self._lock:
+            valid_rows = rows < len(self.count)
+            safe_rows = np.where(valid_rows, rows, 0)
+            times = self.buffer['time_msc'][safe_rows]
+            count = np.where(valid_rows, self.count[safe_rows], 0)
+            stored = np.minimum(count, self.capacity)
+            start = (count - stored) % self.capacity
+            # ordinal 為各格在環狀緩衝區中的先後順序，0 為最舊
+            ordinal = (np.arange(self.capacity) - start[:, None]) % self.capacity
+            earlier = (ordinal < stored[:, None]) & (times <= before_msc[:, None])
+            chosen = np.where(earlier, ordinal, 0).max(axis=1)
+            slots = (start + chosen) % self.capacity
+            bids = self.buffer['bid'][safe_rows, slots]
+        bids[~earlier.any(axis=1)] = np.nan
+        return bids
+
+    def inter_arrival_ms(self, symbol, n=None):
+        """最近報價之間的時間間隔（毫秒）"""
+        return np.diff(self.recent(symbol, n)['time_msc'])
+
+    def spread(self, symbol, n=None):
+        records = self.recent(symbol, n)
+        return records['ask'] - records['bid']
+
+    def tick_rate(self, symbol, window=60.0, now=None):
+        """最近 window 秒內每秒收到的報價數"""
+        row = self.index.get(symbol)
+        return 0.0 if row is None else float(self.tick_rates(window, now)[row])
+
+    def _valid_slots(self):
+        return np.arange(self.capacity) < self.count[:, None]
+
+    def tick_rates(self, window=60.0, now=None):
+        """所有品種最近 window 秒內的每秒報價數
+
+        開始記錄未滿 window 秒時以已記錄的時間計算；緩衝區已覆寫舊報價時，
+        以緩衝區涵蓋的時間（最舊一筆至 now）為上限，避免低估報價頻繁的品種。
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            recent = self._valid_slots() & (self.buffer['recv'] >= now - window)
+            span = np.full(len(self.count), float(window))
+            if self.started_at is not None:
+                span = np.minimum(span, now - self.started_at)
+            wrapped = np.flatnonzero(self.count > self.capacity)
+            oldest = self.buffer['recv'][wrapped, self.count[wrapped] % self.capacity]
+            span[wrapped] = np.minimum(span[wrapped], now - oldest)
+            # 剛開始記錄時避免以極短的時間相除
+            return recent.sum(axis=1) / np.maximum(span, min(window, 1.0))
+
+    def last_spreads(self):
+        """所有品種最新一筆的點差，尚無報價者為 nan"""
+        with self._lock:
+            last = self.buffer[np.arange(len(self.count)), (self.count - 1) % self.capacity]
+            spreads = last['ask'] - last['bid']
+            spreads[self.count == 0] = np.nan
+            return spreads
+
+    def mean_inter_arrival_ms(self):
+        """所有品種緩衝區內報價間隔的平均值（毫秒），少於兩筆者為 nan"""
+        with self._lock:
+            stored = np.minimum(self.count, self.capacity)
+            first = self.buffer[np.arange(len(self.count)), (self.count - stored) % self.capacity]
+            last = self.buffer[np.arange(len(self.count)), (self.count - 1) % self.capacity]
+            span = (last['time_msc'] - first['time_msc']).astype(np.float64)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(stored > 1, span / (stored - 1), np.nan)
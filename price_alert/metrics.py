@@ -0,0 +1,265 @@
+"""執行期量測：延遲直方圖與計數器，以 Prometheus 文字格式輸出
+
+直方圖使用固定的毫秒分桶，observe() 只做一次二分搜尋與一次加法，可以放在
+每次報價查詢上。MetricsServer 在本機提供 GET /metrics：
+
+    python -m price_alert --metrics-port 9108
+    curl http://127.0.0.1:9108/metrics
+
+指定 profiler 時另外提供 POST /profile?seconds=N&mode=sample|cprofile，在執行中開始
+限定時間的效能分析；不依賴訊號，Windows 上的 headless 模式也能使用。只接受 POST，
+避免抓取程式或連結預覽的 GET 意外啟動分析（GET 回傳 405）：
+
+    curl -X POST "http://127.0.0.1:9108/profile?seconds=60"
+"""
+import bisect
+import http.server
+import threading
+import urllib.parse
+
+from price_alert.profiling import MODES
+
+# 毫秒分桶上限：0.05 ms 到約 30 秒
+DEFAULT_BOUNDS_MS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+
+def _labels_text(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in labels.items()) + "}"
+
+
+class Histogram:
+    """固定分桶的直方圖；多個執行緒同時 observe() 與讀取，計數都在 _lock 內更新"""
+
+    kind = "histogram"
+
+    def __init__(self, name, help_text, bounds=DEFAULT_BOUNDS_MS):
+        self.name = name
+        self.help_text = help_text
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)  # 最後一格為超過最大上限
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        i = bisect.bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += value
+            self.count += 1
+
+    def _state(self):
+        """回傳一致的 (counts 副本, sum, count)"""
+        with self._lock:
+            return list(self.counts), self.sum, self.count
+
+    def quantile(self, q):
+        """以分桶上限估計分位數，沒有資料時回傳 None"""
+        counts, _, total_count = self._state()
+        if not total_count:
+            return None
+        target = q * total_count
+        total = 0
+        for i, count in enumerate(counts):
+            total += count
+            if total >= target:
+                return self.bounds[i] if i < len(self.bounds) else float('inf')
+        return float('inf')
+
+    def render(self):
+        counts, value_sum, value_count = self._state()
+        lines = []
+        total = 0
+        for bound, count in zip(self.bounds, counts):
+            total += count
+            lines.append(f'{self.name}_bucket{{le="{bound}"}} {total}')
+        lines.append(f'{self.name}_bucket{{le="+Inf"}} {value_count}')
+        lines.append(f"{self.name}_sum {value_sum:.6f}")
+        lines.append(f"{self.name}_count {value_count}")
+        return lines
+
+
+class Counter:
+    """計數器；labels 相同名稱的多個計數器會合併輸出在同一個 HELP/TYPE 下"""
+
+    kind = "counter"
+
+    def __init__(self, name, help_text, labels=None, source=None):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels or {}
+        self.source = source  # 由外部狀態讀取數值的函式
+        self._value = 0
+        self._lock = threading.Lock()
+
+    @property
+    def value(self):
+        return self.source() if self.source is not None else self._value
+
+    def inc(self, amount=1):
+        with self._lock:
+            self._value += amount
+
+    def render(self):
+        return [f"{self.name}{_labels_text(self.labels)} {self.value}"]
+
+
+class Gauge(Counter):
+
+    kind = "gauge"
+
+
+class Metrics:
+    """價格監控的量測項目"""
+
+    def __init__(self):
+        self.feed_call_ms = Histogram("price_alert_feed_call_ms", "單次報價查詢（symbol_info_tick）耗時，毫秒")
+        self.poll_cycle_ms = Histogram("price_alert_poll_cycle_ms", "一輪輪詢耗時，毫秒")
+        self.display_refresh_ms = Histogram("price_alert_display_refresh_ms", "畫面更新（update_display）耗時，毫秒")
+        self.alert_latency_ms = Histogram("price_alert_alert_latency_ms",
+                                          "停價期限或報價接收到發出警報的延遲，毫秒")
+        self.alerts = {}
+        self._lock = threading.Lock()
+        self.playbacks = Counter("price_alert_playbacks_total", "實際播放的音效數")
+        self._items = [self.feed_call_ms, self.poll_cycle_ms, self.display_refresh_ms,
+                       self.alert_latency_ms, self.playbacks]
+
+    def add(self, item):
+        with self._lock:
+            self._items.append(item)
+        return item
+
+    def count_alert(self, event):
+        counter = self.alerts.get(event)
+        if counter is None:
+            # 輪詢與判斷執行緒可能同時遇到新的事件種類
+            with self._lock:
+                counter = self.alerts.get(event)
+                if counter is None:
+                    counter = Counter("price_alert_alerts_total", "停價、恢復與警報規則事件數", {"event": event})
+                    self._items.append(counter)
+                    self.alerts[event] = counter
+        counter.inc()
+
+    def render(self):
+        """輸出 Prometheus 文字格式"""
+        lines = []
+        described = set()
+        with self._lock:
+            items = list(self._items)
+        for item in items:
+            if item.name not in described:
+                described.add(item.name)
+                lines.append(f"# HELP {item.name} {item.help_text}")
+                lines.append(f"# TYPE {item.name} {item.kind}")
+            lines.extend(item.render())
+        return "\n".join(lines) + "\n"
+
+    def summary_text(self, overruns=0):
+        """狀態列用的簡短文字"""
+        def p95(histogram):
+            value = histogram.quantile(0.95)
+            return "-" if value is None else f"{value:g}"
+
+        return (f"查詢 p95 {p95(self.feed_call_ms)} ms | 輪詢 p95 {p95(self.poll_cycle_ms)} ms | "
+                f"畫面 p95 {p95(self.display_refresh_ms)} ms | 警報延遲 p95 {p95(self.alert_latency_ms)} ms | "
+                f"逾時 {overruns}")
+
+
+class MetricsServer:
+    """在背景執行緒提供 GET /metrics，指定 profiler 時另提供 POST /profile
+
+    profile_options 為 /profile 未指定參數時傳給 profiler.start() 的預設值；
+    參數可放在查詢字串或 application/x-www-form-urlencoded 的內容中。
+    """
+
+    def __init__(self, metrics, port=9108, host="127.0.0.1", profiler=None, profile_options=None):
+        self.metrics = metrics
+        self.port = port
+        self.host = host
+        self.profiler = profiler
+        self.profile_options = dict(profile_options or {})
+        self._server = None
+        self._thread = None
+
+    def start_profile(self, query):
+        """處理 /profile 的查詢字串，回傳 (HTTP 狀態碼, 回應文字)"""
+        if self.profiler is None:
+            return 404, "未啟用效能分析\n"
+        params = urllib.parse.parse_qs(query)
+        options = dict(self.profile_options)
+        try:
+            if 'seconds' in params:
+                options['duration'] = float(params['seconds'][-1])
+            if 'mode' in params:
+                options['mode'] = params['mode'][-1]
+        except ValueError:
+            return 400, "seconds 須為數字\n"
+        if not options.get('duration', 30.0) > 0:
+            return 400, "seconds 須大於 0\n"
+        if options.get('mode', "sample") not in MODES:
+            return 400, f"mode 須為 {' / '.join(MODES)}\n"
+        session = self.profiler.start(**options)
+        if session is None:
+            return 409, "效能分析已在進行中\n"
+        print(f"效能分析已開始（{session.duration:g} 秒）")
+        return 202, (f"效能分析已開始（{session.duration:g} 秒，{session.mode}），"
+                     f"結果寫入 {session.directory}/profile_{session.started_at:%Y%m%d_%H%M%S}.*\n")
+
+    def start(self):
+        server = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                path = self.path.partition("?")[0]
+                if path == "/metrics":
+                    self._reply(200, server.metrics.render(), "text/plain; version=0.0.4; charset=utf-8")
+                elif path == "/profile":
+                    self._reply(405, "請以 POST 啟動效能分析\n", allow="POST")
+                else:
+                    self.send_error(404)
+
+            def do_POST(self):
+                path, _, query = self.path.partition("?")
+                if path != "/profile":
+                    self.send_error(404)
+                    return
+                try:
+                    length = int(self.headers.get("Content-Length") or 0)
+                except ValueError:
+                    length = 0
+                form = self.rfile.read(length).decode("utf-8", "replace") if length > 0 else ""
+                # 查詢字串在後，與內容重複時以查詢字串為準
+                self._reply(*server.start_profile("&".join(part for part in (form, query) if part)))
+
+            def _reply(self, status, body, content_type="text/plain; charset=utf-8", allow=None):
+                body = body.encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                if allow:
+                    self.send_header("Allow", allow)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        try:
+            self._server = http.server.ThreadingHTTPServer((self.host, self.port), Handler)
+        except OSError as e:
+            print(f"無法啟動量測服務 {self.host}:{self.port}: {str(e)}")
+            return False
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True)
+        self._thread.start()
+        print(f"量測服務: http://{self.host}:{self.port}/metrics")
+        return True
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
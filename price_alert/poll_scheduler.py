@@ -0,0 +1,157 @@
+"""輪詢排程：固定週期不漂移，並依交易狀態與報價活躍度決定每個品種的輪詢頻率
+
+每個品種屬於三個等級之一：
+    active  交易時段內且近期有報價，或正在停價警報中，每個週期輪詢
+    quiet   交易時段內但超過 quiet_after 秒沒有新報價，每 quiet_interval 秒輪詢
+    closed  不在交易時段內，每 closed_interval 秒輪詢
+
+週期以單調時鐘上的絕對期限推進，輪詢本身的耗時不會累積成漂移；
+落後超過一個週期時計為一次逾時並重新對齊，不補跑錯過的週期。
+"""
+import threading
+import time
+
+import numpy as np
+
+
+class PollScheduler:
+
+    def __init__(self, interval=0.1, quiet_after=30.0, quiet_interval=1.0, closed_interval=10.0,
+                 clock=time.monotonic):
+        self.interval = interval
+        self.quiet_after = quiet_after
+        self.quiet_interval = quiet_interval
+        self.closed_interval = closed_interval
+        self.clock = clock
+        self.overruns = 0
+        self.max_lag = 0.0
+        self._deadline = None
+        self.reset(0)
+
+    def reset(self, size):
+        """更換品種列表；所有品種在下個週期都會輪詢"""
+        now = self.clock()
+        self.next_poll = np.zeros(size)
+        self.intervals = np.full(size, self.interval)
+        self.last_msc = np.zeros(size, dtype=np.int64)
+        self.last_change = np.full(size, now)
+
+    def __len__(self):
+        return len(self.next_poll)
+
+    def due(self, now):
+        """回傳本週期應輪詢的列索引"""
+        return np.flatnonzero(self.next_poll <= now)
+
+    def polled(self, rows, now):
+        """記錄 rows 已在 now 輪詢；due() 之後品種列表已更換時略過超出範圍的列"""
+        rows = np.asarray(rows, dtype=np.intp)
+        rows = rows[rows < len(self.next_poll)]
+        # 提早半個週期到期：醒來時間的抖動不會讓品種錯過下一個應輪詢的週期
+        self.next_poll[rows] = now + self.intervals[rows] - self.interval / 2
+
+    def observe(self, rows, times_msc, now):
+        """記錄收到的報價；報價時間有變才算活躍"""
+        rows = np.asarray(rows, dtype=np.intp)
+        times_msc = np.asarray(times_msc, dtype=np.int64)
+        keep = rows < len(self.last_msc)
+        rows, times_msc = rows[keep], times_msc[keep]
+        changed = times_msc != self.last_msc[rows]
+        self.last_msc[rows] = times_msc
+        self.last_change[rows[changed]] = now
+
+    def set_tiers(self, trading, urgent, now):
+        """依各列是否在交易時段（trading）與是否警報中（urgent）重新分級"""
+        trading = np.asarray(trading, dtype=bool)
+        urgent = np.asarray(urgent, dtype=bool)
+        if len(trading) != len(self.intervals):
+            return
+        quiet = (now - self.last_change > self.quiet_after) & ~urgent
+        intervals = np.where(trading, np.where(quiet, self.quiet_interval, self.interval), self.closed_interval)
+        # 升到較快的等級時不必等舊的輪詢時間
+        self.next_poll = np.minimum(self.next_poll, now + intervals)
+        self.intervals = intervals
+
+    def tier_counts(self):
+        """回傳 (active, quiet, closed) 品種數"""
+        intervals = self.intervals
+        return (int(np.count_nonzero(intervals == self.interval)),
+                int(np.count_nonzero(intervals == self.quiet_interval)),
+                int(np.count_nonzero(intervals == self.closed_interval)))
+
+    def start(self):
+        self._deadline = self.clock()
+
+    def wait_next(self, stop_event):
+        """等到下一個週期的期限；stop_event 被設定時提早返回"""
+        now = self.clock()
+        if self._deadline is None:
+            self._deadline = now
+        self._deadline += self.interval
+        lag = now - self._deadline
+        if lag <= 0:
+            stop_event.wait(-lag)
+            return
+        self.max_lag = max(self.max_lag, lag)
+        if lag > self.interval:
+            self.overruns += 1
+            self._deadline = now
+
+
+class SymbolPoller:
+    """報價子行程用：以 PollScheduler 決定每個週期向 feed 查詢哪些品種
+
+    主行程每秒以 set_tiers() 傳來各品種的交易狀態與警報狀態（QuoteFeed.set_tiers），
+    子行程依相同的 active / quiet / closed 等級輪詢，週期同樣以絕對期限推進。
+    """
+
+    def __init__(self, feed, interval=0.1):
+        self.feed = feed
+        self.scheduler = PollScheduler(interval)
+        self.symbols = []
+        self.index = {}
+        self._idle = threading.Event()  # 不會被設定，只用來等待下一個週期
+
+    def select(self, symbols):
+        self.feed.select(symbols)
+        self.symbols = list(symbols)
+        self.index = {symbol: row for row, symbol in enumerate(self.symbols)}
+        self.scheduler.reset(len(self.symbols))
+
+    def reselect(self):
+        """重新連線後再次選取，保留輪詢排程"""
+        self.feed.select(self.symbols)
+
+    def set_tiers(self, symbols, trading, urgent):
+        size = len(self.symbols)
+        trading_rows = np.zeros(size, dtype=bool)
+        urgent_rows = np.zeros(size, dtype=bool)
+        index = self.index
+        for symbol, is_trading, is_urgent in zip(symbols, trading, urgent):
+            row = index.get(symbol)
+            if row is not None:
+                trading_rows[row] = is_trading
+                urgent_rows[row] = is_urgent
+        self.scheduler.set_tiers(trading_rows, urgent_rows, self.scheduler.clock())
+
+    def poll(self):
+        """輪詢本週期到期的品種，逐批回傳有變動的報價"""
+        scheduler = self.scheduler
+        now = scheduler.clock()
+        rows = scheduler.due(now)
+        if not len(rows):
+            return
+        symbols = self.symbols
+        subset = None if len(rows) == len(symbols) else [symbols[row] for row in rows]
+        index = self.index
+        for batch in self.feed.fetch_changes(subset):
+            scheduler.observe([index.get(tick.symbol, len(symbols)) for tick in batch],
+                              [tick.time_msc for tick in batch], now)
+            yield batch
+        scheduler.polled(rows, now)
+
+    def start(self):
+        self.scheduler.start()
+
+    def wait_next(self):
+        self.scheduler.wait_next(self._idle)
@@ -0,0 +1,291 @@
+"""在獨立子行程執行報價輪詢，經由共用記憶體報價表交給主行程
+
+子行程擁有真正的報價來源（例如 MT5 終端），每個週期把報價直接寫入
+multiprocessing.shared_memory 中每個品種固定一列的結構陣列；主行程只比較每列的
+序號就能找出有變動的列，不需經過佇列序列化，也不與介面共用同一個 GIL。
+
+每列的序號採 seqlock：寫入前加一成為奇數、寫完再加一成為偶數。讀取端只接受
+前後兩次讀到相同偶數序號的列，讀到寫入一半的列時留待下個週期再讀。
+"""
+import multiprocessing
+import queue
+import threading
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from price_alert.feeds import QuoteFeed, SymbolMeta, Tick, create_feed
+from price_alert.health import ConnectionSupervisor
+from price_alert.poll_scheduler import SymbolPoller
+
+SHARED_TICK_DTYPE = np.dtype([
+    ('time_msc', 'i8'),
+    ('bid', 'f8'),
+    ('ask', 'f8'),
+    ('seq', 'u8'),
+])
+
+
+class SharedTickTable:
+    """共用記憶體中的報價表，每個品種一列
+
+    由主行程以 create=True 建立並負責 unlink()；子行程以名稱附加。
+    """
+
+    def __init__(self, symbols, name=None, create=False):
+        self.symbols = list(symbols)
+        self.index = {symbol: row for row, symbol in enumerate(self.symbols)}
+        size = max(1, len(self.symbols)) * SHARED_TICK_DTYPE.itemsize
+        self.shm = shared_memory.SharedMemory(name=name, create=create, size=size if create else 0)
+        self.table = np.ndarray(len(self.symbols), dtype=SHARED_TICK_DTYPE, buffer=self.shm.buf)
+        if create:
+            self.table[:] = 0
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def write(self, ticks):
+        """寫入一批 Tick（子行程端），同一品種只保留最後一筆"""
+        index = self.index
+        latest = {}
+        for tick in ticks:
+            row = index.get(tick.symbol)
+            if row is not None:
+                latest[row] = tick
+        if not latest:
+            return
+        rows = np.fromiter(latest, dtype=np.intp, count=len(latest))
+        values = list(latest.values())
+        table = self.table
+        seq = table['seq']
+        seq[rows] += 1
+        table['time_msc'][rows] = [tick.time_msc for tick in values]
+        table['bid'][rows] = [tick.bid for tick in values]
+        table['ask'][rows] = [tick.ask for tick in values]
+        seq[rows] += 1
+
+    def read_changed(self, last_seq):
+        """回傳自 last_seq 之後完整寫入的 (列索引, 報價列)，並更新 last_seq"""
+        table = self.table
+        seq = table['seq'].copy()
+        rows = np.flatnonzero((seq != last_seq) & (seq % 2 == 0))
+        if not len(rows):
+            return rows, table[:0].copy()
+        values = table[rows]
+        consistent = values['seq'] == seq[rows]
+        rows = rows[consistent]
+        values = values[consistent]
+        last_seq[rows] = values['seq']
+        return rows, values
+
+    def close(self):
+        self.table = None
+        self.shm.close()
+
+    def unlink(self):
+        self.shm.unlink()
+
+
+def _worker(kind, options, control, replies, poll_interval):
+    """子行程：連線報價來源，依主行程指示附加報價表並持續寫入
+
+    輪詢頻率依主行程傳來的交易與警報狀態分級（SymbolPoller），週期以絕對期限推進。
+    終端斷線時由子行程自行以指數退避重新連線，並以 ('health', 是否正常) 通知主行程。
+    """
+    feed = create_feed(kind, **options)
+    try:
+        connected = feed.connect()
+    except Exception as e:
+        replies.put(('status', False, str(e)))
+        return
+    replies.put(('status', connected, ""))
+    if not connected:
+        return
+    table = None
+    supervisor = ConnectionSupervisor()
+    poller = SymbolPoller(feed, poll_interval)
+    reported = True
+    poller.start()
+    try:
+        while True:
+            try:
+                while True:
+                    command = control.get_nowait()
+                    if command[0] == 'stop':
+                        return
+                    if command[0] == 'select':
+                        if table is not None:
+                            table.close()
+                        table = SharedTickTable(command[2], name=command[1])
+                        poller.select(table.symbols)
+                    elif command[0] == 'tiers':
+                        poller.set_tiers(*command[1:])
+                    elif command[0] == 'info':
+                        meta = feed.symbol_info(command[1])
+                        replies.put(('info', command[1], None if meta is None else tuple(meta)))
+            except queue.Empty:
+                pass
+            available, recovered = supervisor.check(feed)
+            if recovered and table is not None:
+                poller.reselect()
+            if available != reported:
+                replies.put(('health', available))
+                reported = available
+            if available and table is not None:
+                for batch in poller.poll():
+                    table.write(batch)
+            poller.wait_next()
+    except Exception as e:
+        replies.put(('status', False, f"報價子行程錯誤: {str(e)}"))
+    finally:
+        if table is not None:
+            table.close()
+        feed.shutdown()
+
+
+class ProcessFeed(QuoteFeed):
+    """將另一個報價來源放到子行程執行
+
+    fetch_batches() 只讀取共用報價表中序號有變動的列，不會等待子行程。
+    回覆佇列由輪詢與品種資料兩個執行緒共用，取出與處理都在 _lock 內進行。
+    """
+
+    name = "process"
+
+    def __init__(self, kind="mt5", poll_interval=0.1, connect_timeout=60.0, info_timeout=10.0, **options):
+        super().__init__()
+        self.kind = kind
+        self.options = options
+        self.poll_interval = poll_interval
+        self.connect_timeout = connect_timeout
+        self.info_timeout = info_timeout
+        self._ctx = multiprocessing.get_context("spawn")
+        self._process = None
+        self._control = None
+        self._replies = None
+        self._table = None
+        self._last_seq = None
+        self._info = {}
+        self._terminal_ok = True
+        self._lock = threading.Lock()
+
+    def connect(self):
+        if self._process is not None and self._process.is_alive():
+            return True
+        self._control = self._ctx.Queue()
+        self._replies = self._ctx.Queue()
+        self._terminal_ok = True
+        self._process = self._ctx.Process(
+            target=_worker, name=f"feed-{self.kind}", daemon=True,
+            args=(self.kind, self.options, self._control, self._replies, self.poll_interval))
+        self._process.start()
+        try:
+            _, connected, text = self._replies.get(timeout=self.connect_timeout)
+        except queue.Empty:
+            connected, text = False, "報價子行程連線逾時"
+        if text:
+            print(text)
+        if not connected:
+            self.shutdown()
+            return False
+        if self.symbols:
+            self.select(self.symbols)
+        return True
+
+    def healthy(self):
+        if self._process is None or not self._process.is_alive():
+            return False
+        self._check_status()
+        return self._terminal_ok
+
+    def reconnect(self):
+        # 子行程仍在執行時由它自行重新連線終端，只有子行程結束時才重新啟動
+        if self._process is not None and self._process.is_alive():
+            return True
+        return super().reconnect()
+
+    def shutdown(self):
+        if self._process is not None:
+            self._control.put(('stop',))
+            self._process.join(timeout=5.0)
+            if self._process.is_alive():
+                self._process.terminate()
+            self._process = None
+        self._release_table()
+
+    def _release_table(self):
+        if self._table is not None:
+            self._table.close()
+            self._table.unlink()
+            self._table = None
+
+    def select(self, symbols):
+        super().select(symbols)
+        if self._process is None:
+            return
+        # 品種列表改變時換一塊新的報價表，子行程附加後才會寫入
+        old_table = self._table
+        self._table = SharedTickTable(self.symbols, create=True)
+        self._last_seq = np.zeros(len(self.symbols), dtype=np.uint64)
+        self._control.put(('select', self._table.name, self.symbols))
+        if old_table is not None:
+            old_table.close()
+            old_table.unlink()
+
+    def set_tiers(self, symbols, trading, urgent):
+        if self._process is not None:
+            self._control.put(('tiers', list(symbols), list(trading), list(urgent)))
+
+    def fetch_batches(self, symbols=None):
+        if self._table is None:
+            return
+        self._check_status()
+        rows, values = self._table.read_changed(self._last_seq)
+        if not len(rows):
+            return
+        symbols = self.symbols
+        yield [Tick(symbols[row], msc // 1000, msc, bid, ask)
+               for row, msc, bid, ask in zip(rows.tolist(), values['time_msc'].tolist(),
+                                             values['bid'].tolist(), values['ask'].tolist())]
+
+    def _check_status(self):
+        with self._lock:
+            try:
+                while True:
+                    self._handle(self._replies.get_nowait())
+            except queue.Empty:
+                pass
+
+    def _handle(self, message):
+        if message[0] == 'info':
+            self._info[message[1]] = None if message[2] is None else SymbolMeta(*message[2])
+        elif message[0] == 'health':
+            self._terminal_ok = message[1]
+        elif message[0] == 'status' and message[2]:
+            print(message[2])
+
+    def symbol_info(self, symbol):
+        return self.symbol_infos([symbol]).get(symbol)
+
+    def symbol_infos(self, symbols):
+        """一次送出所有查詢，等待所有結果或 info_timeout
+
+        _info 只用來接收回覆：送出前先清除這些品種的舊結果，不會沿用過期或失敗（None）的查詢。
+        """
+        if self._process is None:
+            return {symbol: None for symbol in symbols}
+        with self._lock:
+            for symbol in symbols:
+                self._info.pop(symbol, None)
+        waiting = list(dict.fromkeys(symbols))
+        for symbol in waiting:
+            self._control.put(('info', symbol))
+        deadline = time.monotonic() + self.info_timeout
+        while waiting and time.monotonic() < deadline:
+            time.sleep(0.01)
+            self._check_status()
+            waiting = [symbol for symbol in waiting if symbol not in self._info]
+        with self._lock:
+            return {symbol: self._info.pop(symbol, None) for symbol in dict.fromkeys(symbols)}
@@ -0,0 +1,208 @@
+"""即時效能分析：在執行中對輪詢與畫面更新做限定時間的分析，不需重新啟動
+
+程式以 profiler.section(name) 標示要分析的區段（輪詢、狀態判斷、畫面更新）。
+分析未啟動時 section() 不做任何事；啟動後由取樣執行緒每 interval 秒讀取
+正在區段內之執行緒的呼叫堆疊，結束時寫出：
+
+    profile_YYYYMMDD_HHMMSS.collapsed  火焰圖格式（flamegraph.pl、speedscope 可讀）
+    profile_YYYYMMDD_HHMMSS.txt        依取樣數排序的函式統計
+    profile_YYYYMMDD_HHMMSS.pstats     mode="cprofile" 時另外以 cProfile 量測
+
+cProfile 的額外負擔較大，只在需要完整呼叫次數時使用。
+"""
+import collections
+import contextlib
+import cProfile
+import datetime
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+
+MODES = ("sample", "cprofile")
+
+
+class _Section:
+    __slots__ = ('session', 'name', 'thread_id', 'profile')
+
+    def __init__(self, session, name):
+        self.session = session
+        self.name = name
+
+    def __enter__(self):
+        self.thread_id = threading.get_ident()
+        self.session.sections[self.thread_id] = self.name
+        self.profile = self.session.profile_for_thread() if self.session.mode == "cprofile" else None
+        if self.profile is not None:
+            try:
+                self.profile.enable()
+            except ValueError:
+                # 其他分析工具正在執行
+                self.profile = None
+        return self
+
+    def __exit__(self, *exc):
+        if self.profile is not None:
+            self.profile.disable()
+        self.session.sections.pop(self.thread_id, None)
+        return False
+
+
+class ProfileSession:
+    """一次限定時間的分析；由 Profiler.start() 建立"""
+
+    def __init__(self, mode="sample", duration=30.0, directory="profiles", interval=0.005, on_finish=None):
+        if mode not in MODES:
+            raise ValueError(f"不支援的分析模式: {mode}")
+        self.mode = mode
+        self.duration = duration
+        self.directory = directory
+        self.interval = interval
+        self.on_finish = on_finish
+        self.sections = {}  # 執行緒 id → 區段名稱
+        self.samples = collections.Counter()
+        self.started_at = datetime.datetime.now()
+        self.paths = []
+        self._profiles = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self, wait=True):
+        self._stop.set()
+        if wait and threading.current_thread() is not self._thread:
+            self._thread.join(timeout=10.0)
+
+    @property
+    def running(self):
+        return self._thread.is_alive()
+
+    def profile_for_thread(self):
+        thread_id = threading.get_ident()
+        with self._lock:
+            profile = self._profiles.get(thread_id)
+            if profile is None:
+                profile = self._profiles[thread_id] = cProfile.Profile()
+            return profile
+
+    def _run(self):
+        deadline = time.monotonic() + self.duration
+        own_id = threading.get_ident()
+        while not self._stop.is_set() and time.monotonic() < deadline:
+            frames = sys._current_frames()
+            for thread_id, name in list(self.sections.items()):
+                frame = frames.get(thread_id)
+                if frame is None or thread_id == own_id:
+                    continue
+                self.samples[self._stack_key(name, frame)] += 1
+            del frames
+            self._stop.wait(self.interval)
+        try:
+            self._dump()
+        except Exception as e:
+            print(f"保存效能分析結果錯誤: {str(e)}")
+        if self.on_finish is not None:
+            self.on_finish(self)
+
+    @staticmethod
+    def _stack_key(name, frame):
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+            frame = frame.f_back
+        stack.append(name)
+        return ";".join(reversed(stack))
+
+    def _dump(self):
+        os.makedirs(self.directory, exist_ok=True)
+        base = os.path.join(self.directory, f"profile_{self.started_at:%Y%m%d_%H%M%S}")
+        with open(base + ".collapsed", 'w', encoding='utf-8') as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+        self.paths.append(base + ".collapsed")
+
+        report = io.StringIO()
+        self._write_sample_report(report)
+        if self._profiles:
+            stats = None
+            for profile in self._profiles.values():
+                if stats is None:
+                    stats = pstats.Stats(profile, stream=report)
+                else:
+                    stats.add(profile)
+            stats.dump_stats(base + ".pstats")
+            self.paths.append(base + ".pstats")
+            report.write("\n==== cProfile（依累計時間排序）====\n")
+            stats.sort_stats("cumulative").print_stats(40)
+        with open(base + ".txt", 'w', encoding='utf-8') as f:
+            f.write(report.getvalue())
+        self.paths.append(base + ".txt")
+
+    def _write_sample_report(self, out):
+        total = sum(self.samples.values())
+        by_section = collections.Counter()
+        own = collections.Counter()
+        inclusive = collections.Counter()
+        for stack, count in self.samples.items():
+            frames = stack.split(";")
+            by_section[frames[0]] += count
+            own[frames[-1]] += count
+            for function in set(frames[1:]):
+                inclusive[function] += count
+        out.write(f"開始: {self.started_at:%Y-%m-%d %H:%M:%S} | 模式: {self.mode} | "
+                  f"取樣間隔: {self.interval * 1000:g} ms | 取樣數: {total}\n")
+        for section, count in by_section.most_common():
+            out.write(f"  {section}: {count}\n")
+        out.write("\n==== 自身取樣數 ====\n")
+        for function, count in own.most_common(40):
+            out.write(f"{count:8d} {count / total:6.1%}  {function}\n")
+        out.write("\n==== 累計取樣數 ====\n")
+        for function, count in inclusive.most_common(40):
+            out.write(f"{count:8d} {count / total:6.1%}  {function}\n")
+
+
+class Profiler:
+    """程式各處共用的分析入口；同一時間最多一個 ProfileSession"""
+
+    def __init__(self):
+        self.session = None
+        self._null = contextlib.nullcontext()
+
+    def section(self, name):
+        session = self.session
+        if session is None:
+            return self._null
+        return _Section(session, name)
+
+    @property
+    def running(self):
+        return self.session is not None and self.session.running
+
+    def start(self, duration=30.0, mode="sample", directory="profiles", interval=0.005, on_finish=None):
+        """開始分析，duration 秒後自動停止並寫出結果；已在分析中時回傳 None"""
+        if self.running:
+            return None
+
+        def finished(session):
+            if self.session is session:
+                self.session = None
+            print("效能分析結果: " + ", ".join(session.paths))
+            if on_finish is not None:
+                on_finish(session)
+
+        session = ProfileSession(mode, duration, directory, interval, finished)
+        self.session = session
+        session.start()
+        return session
+
+    def stop(self):
+        """提前結束目前的分析並寫出結果"""
+        session = self.session
+        if session is not None:
+            session.stop()
@@ -0,0 +1,322 @@
+"""PyQt6 的表格模型"""
+import datetime
+import functools
+
+from PyQt6.QtCore import QAbstractTableModel, QModelIndex, Qt, pyqtSignal
+from PyQt6.QtGui import QColor
+
+from price_alert.schedule import CLOSED, DAYS, format_hms
+
+COLOR_ON = QColor(Qt.GlobalColor.green)
+COLOR_OFF = QColor(255, 200, 200)
+
+
+def _runs(rows):
+    """將排序後的列索引分組為連續區段 (first, last)"""
+    runs = []
+    for row in rows:
+        if runs and row == runs[-1][1] + 1:
+            runs[-1][1] = row
+        else:
+            runs.append([row, row])
+    return runs
+
+
+@functools.lru_cache(maxsize=4096)
+def _format_second(seconds, tz):
+    """epoch 秒數 → 顯示用文字；同一秒的多個品種共用結果"""
+    return datetime.datetime.fromtimestamp(seconds, tz=tz).strftime('%Y-%m-%d %H:%M:%S')
+
+
+class PriceTableModel(QAbstractTableModel):
+    """價格監控表的模型，直接讀取報價快照
+
+    快照中的時間為 epoch 毫秒；價格與時間只在 data() 被呼叫（儲存格可見）時才格式化。
+    update_ticks()、set_status() 僅記錄有變動的列，flush() 時以連續區段發出 dataChanged。
+    警報勾選與時間容忍度（秒）寫回 alert_enabled / tolerances（以品種為鍵的字典）；
+    使用者修改語音警報欄時發出 voiceEdited(row, text)，修改勾選或容忍度時發出 settingsEdited(row)。
+    """
+
+    voiceEdited = pyqtSignal(int, str)
+    settingsEdited = pyqtSignal(int)
+
+    HEADERS = ["", "交易品種", "時間", "買價", "賣價", "時間差", "時間容忍度", "狀態", "警報", "語音警報"]
+    COL_TIME, COL_BID, COL_ASK, COL_DIFF = 2, 3, 4, 5
+    COL_ENABLED, COL_TOLERANCE = 0, 6
+    COL_STATUS, COL_ALERT, COL_VOICE = 7, 8, 9
+
+    def __init__(self, tz, alert_enabled, tolerances, parent=None):
+        super().__init__(parent)
+        self.tz = tz
+        self.alert_enabled = alert_enabled
+        self.tolerances = tolerances
+        self.symbols = []
+        self.tolerance = []
+        self.digits = {}
+        self.table = None
+        self.now_ts = 0.0
+        self.trading = []
+        self.alert_on = []
+        self.voice = []
+        self._dirty_status = set()
+        self.set_symbols([])
+
+    def set_symbols(self, symbols):
+        self.beginResetModel()
+        self.symbols = list(symbols)
+        self.tolerance = [self.tolerances.get(symbol, 0) for symbol in self.symbols]
+        self.table = None
+        self.trading = [False] * len(self.symbols)
+        self.alert_on = [False] * len(self.symbols)
+        self.voice = [""] * len(self.symbols)
+        self._dirty_status.clear()
+        self.endResetModel()
+
+    def set_dicts(self, alert_enabled, tolerances):
+        """更換對應的字典（引擎更換品種列表後呼叫，之後再 set_symbols）"""
+        self.alert_enabled = alert_enabled
+        self.tolerances = tolerances
+
+    def set_digits(self, digits):
+        self.digits = digits
+
+    def refresh_prices(self):
+        """digits 被外部修改後，重繪買價與賣價欄"""
+        if self.symbols:
+            self.dataChanged.emit(self.index(0, self.COL_BID), self.index(len(self.symbols) - 1, self.COL_ASK))
+
+    def set_tolerance(self, row, seconds):
+        self.tolerance[row] = seconds
+        self.tolerances[self.symbols[row]] = seconds
+        index = self.index(row, self.COL_TOLERANCE)
+        self.dataChanged.emit(index, index)
+
+    def refresh_tolerances(self):
+        """tolerances 被外部修改後，重新讀取並重繪時間容忍度欄"""
+        self.tolerance = [self.tolerances.get(symbol, 0) for symbol in self.symbols]
+        if self.symbols:
+            self.dataChanged.emit(self.index(0, self.COL_TOLERANCE),
+                                  self.index(len(self.symbols) - 1, self.COL_TOLERANCE))
+
+    def refresh_enabled(self):
+        """alert_enabled 被外部修改後，重繪勾選欄"""
+        if self.symbols:
+            self.dataChanged.emit(self.index(0, self.COL_ENABLED),
+                                  self.index(len(self.symbols) - 1, self.COL_ENABLED))
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.symbols)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return self.HEADERS[section]
+        return super().headerData(section, orientation, role)
+
+    def flags(self, index):
+        flags = super().flags(index)
+        if index.column() in (self.COL_VOICE, self.COL_TOLERANCE):
+            flags |= Qt.ItemFlag.ItemIsEditable
+        elif index.column() == self.COL_ENABLED:
+            flags |= Qt.ItemFlag.ItemIsUserCheckable
+        return flags
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        row, col = index.row(), index.column()
+        if role == Qt.ItemDataRole.CheckStateRole and col == self.COL_ENABLED:
+            if self.alert_enabled.get(self.symbols[row], True):
+                return Qt.CheckState.Checked
+            return Qt.CheckState.Unchecked
+        if role == Qt.ItemDataRole.EditRole and col == self.COL_TOLERANCE:
+            return self.tolerance[row]
+        if role == Qt.ItemDataRole.DisplayRole or role == Qt.ItemDataRole.EditRole:
+            if col == 1:
+                return self.symbols[row]
+            if col == self.COL_TOLERANCE:
+                return format_hms(self.tolerance[row])
+            if col == self.COL_STATUS:
+                return "交易中" if self.trading[row] else "關閉"
+            if col == self.COL_ALERT:
+                return "開啟" if self.alert_on[row] else "關閉"
+            if col == self.COL_VOICE:
+                return self.voice[row]
+            if self.COL_TIME <= col <= self.COL_DIFF:
+                return self._tick_text(row, col)
+        elif role == Qt.ItemDataRole.BackgroundRole:
+            if col == self.COL_STATUS:
+                return COLOR_ON if self.trading[row] else COLOR_OFF
+            if col == self.COL_ALERT:
+                return COLOR_ON if self.alert_on[row] else COLOR_OFF
+        return None
+
+    def _tick_text(self, row, col):
+        if self.table is None or row >= len(self.table):
+            return None
+        record = self.table[row]
+        if not record['version']:
+            return None
+        time_msc = int(record['time_msc'])
+        if col == self.COL_TIME:
+            return _format_second(time_msc // 1000, self.tz)
+        if col == self.COL_DIFF:
+            return str(datetime.timedelta(seconds=max(0, (int(self.now_ts * 1000) - time_msc) // 1000)))
+        digits = self.digits.get(self.symbols[row], 5)
+        value = record['bid'] if col == self.COL_BID else record['ask']
+        return f"{value:.{digits}f}"
+
+    def setData(self, index, value, role=Qt.ItemDataRole.EditRole):
+        if not index.isValid():
+            return False
+        row, col = index.row(), index.column()
+        if col == self.COL_ENABLED and role == Qt.ItemDataRole.CheckStateRole:
+            self.alert_enabled[self.symbols[row]] = Qt.CheckState(value) == Qt.CheckState.Checked
+            self.dataChanged.emit(index, index)
+            self.settingsEdited.emit(row)
+            return True
+        if role != Qt.ItemDataRole.EditRole:
+            return False
+        if col == self.COL_TOLERANCE:
+            self.set_tolerance(row, int(value))
+            self.settingsEdited.emit(row)
+            return True
+        if col == self.COL_VOICE:
+            self.set_voice(row, str(value))
+            self.flush()
+            self.voiceEdited.emit(row, str(value))
+            return True
+        return False
+
+    def update_ticks(self, table, changed_rows, now_ts):
+        """載入新的報價快照；changed_rows 為報價有變動的列"""
+        if len(table) != len(self.symbols):
+            return
+        self.table = table
+        self.now_ts = now_ts
+        for first, last in _runs(changed_rows):
+            self.dataChanged.emit(self.index(first, self.COL_TIME), self.index(last, self.COL_ASK))
+        if self.symbols:
+            # 時間差隨時間變動，整欄只發出一次訊號，由檢視自行重繪可見範圍
+            self.dataChanged.emit(self.index(0, self.COL_DIFF), self.index(len(self.symbols) - 1, self.COL_DIFF))
+
+    def set_status(self, row, trading, alert_on):
+        if self.trading[row] != trading or self.alert_on[row] != alert_on:
+            self.trading[row] = trading
+            self.alert_on[row] = alert_on
+            self._dirty_status.add(row)
+
+    def set_voice(self, row, text):
+        if self.voice[row] != text:
+            self.voice[row] = text
+            self._dirty_status.add(row)
+
+    def flush(self):
+        """對狀態有變動的列發出 dataChanged"""
+        if not self._dirty_status:
+            return
+        rows = sorted(self._dirty_status)
+        self._dirty_status.clear()
+        for first, last in _runs(rows):
+            self.dataChanged.emit(self.index(first, self.COL_STATUS), self.index(last, self.COL_VOICE))
+
+
+class ScheduleTableModel(QAbstractTableModel):
+    """交易時間表的模型，資料存放於 MonitorEngine 的 groups / schedules
+
+    每次修改都經由 engine.set_schedule() 立即重新編譯到 ScheduleBook。
+    EditRole 下日期欄回傳星期索引 (0-6)，時間欄回傳當日秒數，供委派編輯器使用。
+    """
+
+    HEADERS = ["交易品種", "產品組", "開始日", "開始時間", "結束日", "結束時間",
+               "休息1開始", "休息1結束", "休息2開始", "休息2結束", "休息3開始", "休息3結束"]
+    COL_GROUP, COL_START_DAY, COL_START_TIME, COL_END_DAY, COL_END_TIME = 1, 2, 3, 4, 5
+    DAY_COLUMNS = (COL_START_DAY, COL_END_DAY)
+    TIME_COLUMNS = (3, 5, 6, 7, 8, 9, 10, 11)
+
+    def __init__(self, engine, parent=None):
+        super().__init__(parent)
+        self.engine = engine
+        self.symbols = []
+
+    def set_symbols(self, symbols):
+        self.beginResetModel()
+        self.symbols = list(symbols)
+        self.endResetModel()
+
+    def refresh(self):
+        """引擎的時間表被外部修改後重繪全部內容"""
+        if self.symbols:
+            self.dataChanged.emit(self.index(0, self.COL_GROUP),
+                                  self.index(len(self.symbols) - 1, len(self.HEADERS) - 1))
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.symbols)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return self.HEADERS[section]
+        return super().headerData(section, orientation, role)
+
+    def flags(self, index):
+        flags = super().flags(index)
+        if index.column() > 0:
+            flags |= Qt.ItemFlag.ItemIsEditable
+        return flags
+
+    def _entry(self, row):
+        return self.engine.schedules.get(self.symbols[row], CLOSED)
+
+    def _seconds(self, row, col):
+        entry = self._entry(row)
+        if col == self.COL_START_TIME:
+            return entry.start_time
+        if col == self.COL_END_TIME:
+            return entry.end_time
+        pair = entry.breaks[(col - 6) // 2] if (col - 6) // 2 < len(entry.breaks) else (0, 0)
+        return pair[(col - 6) % 2]
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or role not in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.EditRole):
+            return None
+        row, col = index.row(), index.column()
+        if col == 0:
+            return self.symbols[row]
+        if col == self.COL_GROUP:
+            return self.engine.groups.get(self.symbols[row], "")
+        entry = self._entry(row)
+        if col in self.DAY_COLUMNS:
+            day = entry.start_day if col == self.COL_START_DAY else entry.end_day
+            return day if role == Qt.ItemDataRole.EditRole else DAYS[day]
+        seconds = self._seconds(row, col)
+        return seconds if role == Qt.ItemDataRole.EditRole else format_hms(seconds)
+
+    def setData(self, index, value, role=Qt.ItemDataRole.EditRole):
+        if not index.isValid() or role != Qt.ItemDataRole.EditRole or index.column() == 0:
+            return False
+        row, col = index.row(), index.column()
+        symbol = self.symbols[row]
+        group = self.engine.groups.get(symbol, "")
+        entry = self._entry(row)
+        if col == self.COL_GROUP:
+            group = str(value)
+        elif col == self.COL_START_DAY:
+            entry = entry._replace(start_day=int(value))
+        elif col == self.COL_END_DAY:
+            entry = entry._replace(end_day=int(value))
+        elif col == self.COL_START_TIME:
+            entry = entry._replace(start_time=int(value))
+        elif col == self.COL_END_TIME:
+            entry = entry._replace(end_time=int(value))
+        else:
+            breaks = [list(pair) for pair in entry.breaks] + [[0, 0] for _ in range(3 - len(entry.breaks))]
+            breaks[(col - 6) // 2][(col - 6) % 2] = int(value)
+            entry = entry._replace(breaks=tuple(tuple(pair) for pair in breaks))
+        self.engine.set_schedule(symbol, group, entry)
+        self.dataChanged.emit(index, index)
+        return True
@@ -0,0 +1,321 @@
+"""報價與停價事件的欄式記錄：背景批次寫入只附加的二進位區段，以 np.memmap 讀取
+
+目錄結構（每個區段一個子目錄）：
+
+    recordings/20261018_093000_0/
+        symbols.txt           品種代號，第 n 行的 id 為 n
+        ticks/time_msc.bin    報價時間（毫秒）
+        ticks/recv.bin        本機接收時間（秒）
+        ticks/symbol.bin      品種 id
+        ticks/bid.bin, ticks/ask.bin
+        events/time.bin, events/symbol.bin, events/event.bin, events/stale_seconds.bin
+
+每個欄位檔都是小端序的定長陣列，筆數 = 檔案大小 / 欄位寬度；程式中斷時各欄長度
+可能不一，讀取時取最短者。
+
+    python -m price_alert.recorder recordings --gap 30
+"""
+import argparse
+import datetime
+import os
+import queue
+import sys
+import threading
+import time
+
+import numpy as np
+
+TICK_COLUMNS = (('time_msc', '<i8'), ('recv', '<f8'), ('symbol', '<i4'), ('bid', '<f8'), ('ask', '<f8'))
+EVENT_COLUMNS = (('time', '<f8'), ('symbol', '<i4'), ('event', 'u1'), ('stale_seconds', '<f8'))
+EVENT_CODES = {"stale": 1, "resume": 2, "rule": 3}
+EVENT_NAMES = {code: name for name, code in EVENT_CODES.items()}
+
+
+class TickRecorder:
+    """由背景執行緒寫入的報價與事件記錄
+
+    record_ticks() 只把輪詢到的整批資料放入佇列，對呼叫端的成本與批次大小無關；
+    與同一品種上一筆完全相同的報價在寫入時略過。每 flush_interval 秒或累積
+    flush_size 筆時寫入一次，區段超過 segment_rows 筆或跨日時另開新區段。
+    """
+
+    def __init__(self, directory="recordings", flush_interval=1.0, flush_size=100000,
+                 segment_rows=20000000, tz=None):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.flush_size = flush_size
+        self.segment_rows = segment_rows
+        self.tz = tz
+        self._queue = queue.SimpleQueue()
+        self._thread = None
+        self._segment = None
+        self.ticks_written = 0
+        self.events_written = 0
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="tick-recorder", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout=10.0)
+            self._thread = None
+
+    def record_ticks(self, symbols, rows, time_msc, bid, ask, recv):
+        """symbols 為品種列表（不會再被修改），rows 為該批報價在 symbols 中的索引"""
+        if rows:
+            self._queue.put(('ticks', symbols, rows, time_msc, bid, ask, recv))
+
+    def record_event(self, symbol, event, stale_seconds=None, timestamp=None):
+        self._queue.put(('event', symbol, EVENT_CODES.get(event, 0),
+                         np.nan if stale_seconds is None else stale_seconds,
+                         time.time() if timestamp is None else timestamp))
+
+    def _run(self):
+        pending = []
+        size = 0
+        deadline = None
+        running = True
+        while running:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = ()
+            if item is None:
+                running = False
+            elif item:
+                pending.append(item)
+                size += len(item[2]) if item[0] == 'ticks' else 1
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+            if pending and (not running or size >= self.flush_size or time.monotonic() >= deadline):
+                try:
+                    self._write(pending)
+                except Exception as e:
+                    print(f"寫入報價記錄失敗: {str(e)}")
+                    self._close_segment()
+                pending = []
+                size = 0
+                deadline = None
+        self._close_segment()
+
+    def _close_segment(self):
+        """關閉目前的區段（寫出已寫入的部分）；下一次寫入時另開新區段"""
+        segment, self._segment = self._segment, None
+        if segment is not None:
+            try:
+                segment.close()
+            except Exception as e:
+                print(f"關閉報價記錄失敗: {str(e)}")
+
+    def _segment_for(self, now, rows):
+        day = datetime.datetime.fromtimestamp(now, tz=self.tz).strftime('%Y%m%d')
+        segment = self._segment
+        if segment is None or segment.day != day or segment.rows + rows > self.segment_rows:
+            self._close_segment()
+            stamp = datetime.datetime.fromtimestamp(now, tz=self.tz).strftime('%Y%m%d_%H%M%S')
+            index = 0
+            while os.path.exists(os.path.join(self.directory, f"{stamp}_{index}")):
+                index += 1
+            segment = self._segment = _SegmentWriter(os.path.join(self.directory, f"{stamp}_{index}"), day)
+        return segment
+
+    def _write(self, items):
+        ticks = [item for item in items if item[0] == 'ticks']
+        events = [item for item in items if item[0] == 'event']
+        rows = sum(len(item[2]) for item in ticks)
+        segment = self._segment_for(time.time(), rows)
+        if ticks:
+            ids, time_msc, bid, ask, recv = [], [], [], [], []
+            for _, symbols, batch_rows, batch_msc, batch_bid, batch_ask, batch_recv in ticks:
+                ids.append(segment.symbol_ids(symbols)[np.asarray(batch_rows, dtype=np.intp)])
+                time_msc.append(np.asarray(batch_msc, dtype=np.int64))
+                bid.append(np.asarray(batch_bid, dtype=np.float64))
+                ask.append(np.asarray(batch_ask, dtype=np.float64))
+                recv.append(np.full(len(batch_rows), batch_recv, dtype=np.float64))
+            self.ticks_written += segment.write_ticks(np.concatenate(ids), np.concatenate(time_msc),
+                                                      np.concatenate(recv), np.concatenate(bid),
+                                                      np.concatenate(ask))
+        if events:
+            ids = np.array([segment.symbol_id(item[1]) for item in events], dtype=np.int32)
+            segment.write_events(np.array([item[4] for item in events], dtype=np.float64), ids,
+                                 np.array([item[2] for item in events], dtype=np.uint8),
+                                 np.array([item[3] for item in events], dtype=np.float64))
+            self.events_written += len(events)
+        segment.flush()
+
+
+class _SegmentWriter:
+    def __init__(self, path, day):
+        self.path = path
+        self.day = day
+        self.rows = 0
+        os.makedirs(os.path.join(path, "ticks"))
+        os.makedirs(os.path.join(path, "events"))
+        self._symbols_file = open(os.path.join(path, "symbols.txt"), 'a', encoding='utf-8')
+        self._ids = {}
+        self._id_cache = (None, None)
+        # 依品種 id 保存上一筆報價
+        self._last_time = np.zeros(0, dtype=np.int64)
+        self._last_bid = np.zeros(0)
+        self._last_ask = np.zeros(0)
+        self._files = {}
+        try:
+            for group, columns in (("ticks", TICK_COLUMNS), ("events", EVENT_COLUMNS)):
+                for name, _ in columns:
+                    self._files[group, name] = open(os.path.join(path, group, f"{name}.bin"), 'ab')
+        except Exception:
+            self.close()
+            raise
+
+    def symbol_id(self, symbol):
+        symbol_id = self._ids.get(symbol)
+        if symbol_id is None:
+            symbol_id = self._ids[symbol] = len(self._ids)
+            self._symbols_file.write(symbol + "\n")
+        return symbol_id
+
+    def symbol_ids(self, symbols):
+        """品種列表 → id 陣列；同一個列表物件只轉換一次"""
+        cached_symbols, cached_ids = self._id_cache
+        if cached_symbols is not symbols:
+            cached_ids = np.array([self.symbol_id(symbol) for symbol in symbols], dtype=np.int32)
+            self._id_cache = (symbols, cached_ids)
+        return cached_ids
+
+    def write_ticks(self, ids, time_msc, recv, bid, ask):
+        keep = self._changed(ids, time_msc, bid, ask)
+        columns = {'time_msc': time_msc, 'recv': recv, 'symbol': ids, 'bid': bid, 'ask': ask}
+        for name, dtype in TICK_COLUMNS:
+            self._files['ticks', name].write(columns[name][keep].astype(dtype, copy=False).tobytes())
+        written = int(keep.sum())
+        self.rows += written
+        return written
+
+    def _changed(self, ids, time_msc, bid, ask):
+        """略過與同品種上一筆相同的報價（輪詢未更新時 MT5 會回傳同一筆）"""
+        if len(self._last_time) < len(self._ids):
+            grow = len(self._ids) - len(self._last_time)
+            self._last_time = np.concatenate([self._last_time, np.full(grow, -1, dtype=np.int64)])
+            self._last_bid = np.concatenate([self._last_bid, np.full(grow, np.nan)])
+            self._last_ask = np.concatenate([self._last_ask, np.full(grow, np.nan)])
+        order = np.argsort(ids, kind='stable')
+        sid, t, b, a = ids[order], time_msc[order], bid[order], ask[order]
+        first = np.ones(len(sid), dtype=bool)
+        first[1:] = sid[1:] != sid[:-1]
+        prev_t, prev_b, prev_a = np.roll(t, 1), np.roll(b, 1), np.roll(a, 1)
+        prev_t[first] = self._last_time[sid[first]]
+        prev_b[first] = self._last_bid[sid[first]]
+        prev_a[first] = self._last_ask[sid[first]]
+        last = np.ones(len(sid), dtype=bool)
+        last[:-1] = sid[:-1] != sid[1:]
+        self._last_time[sid[last]] = t[last]
+        self._last_bid[sid[last]] = b[last]
+        self._last_ask[sid[last]] = a[last]
+        keep = np.empty(len(sid), dtype=bool)
+        keep[order] = (prev_t != t) | (prev_b != b) | (prev_a != a)
+        return keep
+
+    def write_events(self, times, ids, codes, stale_seconds):
+        columns = {'time': times, 'symbol': ids, 'event': codes, 'stale_seconds': stale_seconds}
+        for name, dtype in EVENT_COLUMNS:
+            self._files['events', name].write(columns[name].astype(dtype, copy=False).tobytes())
+
+    def flush(self):
+        self._symbols_file.flush()
+        for f in self._files.values():
+            f.flush()
+
+    def close(self):
+        """關閉所有欄位檔；個別檔案關閉失敗時仍關閉其餘檔案，最後再拋出錯誤"""
+        error = None
+        for f in [self._symbols_file, *self._files.values()]:
+            try:
+                f.close()
+            except Exception as e:
+                error = error or e
+        if error is not None:
+            raise error
+
+
+def _map_columns(directory, columns):
+    """以 memmap 開啟各欄，長度取最短者（寫入中斷時各欄可能不一）"""
+    sizes = {}
+    for name, dtype in columns:
+        path = os.path.join(directory, f"{name}.bin")
+        sizes[name] = os.path.getsize(path) // np.dtype(dtype).itemsize if os.path.exists(path) else 0
+    length = min(sizes.values())
+    mapped = {}
+    for name, dtype in columns:
+        if length:
+            mapped[name] = np.memmap(os.path.join(directory, f"{name}.bin"), dtype=dtype, mode='r', shape=(length,))
+        else:
+            mapped[name] = np.zeros(0, dtype=dtype)
+    return mapped
+
+
+class Segment:
+    """唯讀開啟的記錄區段；ticks / events 為 {欄位名稱: np.memmap}"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, "symbols.txt"), 'r', encoding='utf-8') as f:
+            self.symbols = [line.rstrip("\n") for line in f]
+        self.ticks = _map_columns(os.path.join(path, "ticks"), TICK_COLUMNS)
+        self.events = _map_columns(os.path.join(path, "events"), EVENT_COLUMNS)
+
+    def __len__(self):
+        return len(self.ticks['time_msc'])
+
+    def symbol_ticks(self, symbol):
+        """回傳該品種所有報價的索引"""
+        return np.flatnonzero(self.ticks['symbol'] == self.symbols.index(symbol))
+
+    def gaps(self, min_seconds):
+        """找出每個品種相鄰報價間隔不小於 min_seconds 的區間 [(symbol, 開始毫秒, 結束毫秒), ...]"""
+        ids = np.asarray(self.ticks['symbol'])
+        times = np.asarray(self.ticks['time_msc'])
+        order = np.lexsort((times, ids))
+        ids, times = ids[order], times[order]
+        same = ids[1:] == ids[:-1]
+        found = np.flatnonzero(same & (np.diff(times) >= min_seconds * 1000))
+        return [(self.symbols[ids[i]], int(times[i]), int(times[i + 1])) for i in found]
+
+    def event_records(self):
+        """回傳 [(時間, 品種, 事件名稱, 停價秒數), ...]"""
+        events = self.events
+        return [(float(t), self.symbols[s], EVENT_NAMES.get(int(e), str(e)), float(v))
+                for t, s, e, v in zip(events['time'], events['symbol'], events['event'], events['stale_seconds'])]
+
+
+def iter_segments(directory="recordings"):
+    """依時間順序開啟目錄下所有區段"""
+    if not os.path.isdir(directory):
+        return
+    for name in sorted(os.listdir(directory)):
+        path = os.path.join(directory, name)
+        if os.path.isfile(os.path.join(path, "symbols.txt")):
+            yield Segment(path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="price_alert.recorder", description="檢視報價記錄")
+    parser.add_argument("directory", nargs="?", default="recordings")
+    parser.add_argument("--gap", type=float, default=0.0, help="列出報價間隔不小於此秒數的區間")
+    args = parser.parse_args(argv)
+
+    for segment in iter_segments(args.directory):
+        events = segment.events
+        print(f"{segment.path}: {len(segment.symbols)} 品種, {len(segment)} 筆報價, {len(events['time'])} 筆事件")
+        if args.gap > 0:
+            for symbol, start, end in segment.gaps(args.gap):
+                start_text = datetime.datetime.fromtimestamp(start / 1000).isoformat(timespec='milliseconds')
+                print(f"  {symbol} {start_text} 空檔 {(end - start) / 1000:.1f} 秒")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
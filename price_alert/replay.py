@@ -0,0 +1,145 @@
+"""重播：將記錄的報價依接收時間送入與即時監控相同的判斷與警報流程
+
+重播在單一執行緒中以虛擬時鐘推進：每到一批報價的接收時間就呼叫
+engine.poll_once()，兩批之間的停價期限則在期限當下判斷，因此結果與速度無關，
+相同的記錄每次都產生相同的事件。有 frozen、change 警報規則時，兩批之間也每
+engine.poll_interval 秒輪詢一次，與即時監控每個輪詢週期判斷規則的時間一致。speed 為 None 時不等待（盡可能快），
+否則以 speed 倍速對應真實時間。
+
+    python -m price_alert --replay recordings --speed 10
+"""
+import os
+import time
+
+import numpy as np
+
+from price_alert.feeds import QuoteFeed, Tick
+from price_alert.recorder import Segment, iter_segments
+from price_alert.staleness import NEVER
+
+
+class VirtualClock:
+    """可手動設定的時鐘，作為 MonitorEngine 的 clock"""
+
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    def set(self, now):
+        self.now = now
+
+
+def open_segments(path):
+    """path 可以是單一區段目錄或包含多個區段的目錄"""
+    if os.path.isfile(os.path.join(path, "symbols.txt")):
+        return [Segment(path)]
+    return list(iter_segments(path))
+
+
+class ReplayFeed(QuoteFeed):
+    """從記錄區段讀出的報價來源；fetch_batches() 回傳接收時間不晚於時鐘的報價"""
+
+    name = "replay"
+
+    def __init__(self, segments, clock, batch_size=500):
+        super().__init__()
+        self.clock = clock
+        self.batch_size = batch_size
+        self.recorded_symbols = []
+        ids = {}
+        columns = {name: [] for name in ('time_msc', 'recv', 'symbol', 'bid', 'ask')}
+        for segment in segments:
+            mapping = np.array([ids.setdefault(symbol, len(ids)) for symbol in segment.symbols] or [0],
+                               dtype=np.int32)
+            for name in columns:
+                values = np.asarray(segment.ticks[name])
+                columns[name].append(mapping[values] if name == 'symbol' else values)
+        self.recorded_symbols = list(ids)
+        merged = {name: np.concatenate(values) if values else np.zeros(0) for name, values in columns.items()}
+        order = np.argsort(merged['recv'], kind='stable')
+        self.recv = merged['recv'][order]
+        self.time_msc = merged['time_msc'][order].astype(np.int64)
+        self.symbol_ids = merged['symbol'][order].astype(np.intp)
+        self.bid = merged['bid'][order]
+        self.ask = merged['ask'][order]
+        self.cursor = 0
+
+    def __len__(self):
+        return len(self.recv)
+
+    def batch_times(self):
+        """各批報價的接收時間（已排序、不重複）"""
+        return np.unique(self.recv)
+
+    def fetch_batches(self, symbols=None):
+        end = int(np.searchsorted(self.recv, self.clock(), side='right'))
+        names = self.recorded_symbols
+        for start in range(self.cursor, end, self.batch_size):
+            stop = min(end, start + self.batch_size)
+            time_msc = self.time_msc[start:stop].tolist()
+            yield [Tick(names[symbol_id], msc // 1000, msc, bid, ask)
+                   for symbol_id, msc, bid, ask in zip(self.symbol_ids[start:stop].tolist(), time_msc,
+                                                       self.bid[start:stop].tolist(), self.ask[start:stop].tolist())]
+        self.cursor = end
+
+
+def run_replay(engine, feed, clock, speed=None, tail=0.0):
+    """執行重播，回傳統計 {ticks, seconds, ticks_per_second, virtual_seconds}
+
+    tail 為最後一批報價之後繼續推進的虛擬秒數，讓結尾的停價期限也能到期。
+    """
+    times = feed.batch_times()
+    if not len(times):
+        return {"ticks": 0, "seconds": 0.0, "ticks_per_second": 0.0, "virtual_seconds": 0.0}
+    clock.set(float(times[0]))
+    engine.feed.select(engine.symbols)
+    engine.detector.invalidate()
+    started = time.perf_counter()
+    virtual_start = clock()
+
+    def advance(target):
+        # 依序處理 target 之前到期的停價期限
+        while True:
+            deadline = engine.next_deadline()
+            if deadline > target or deadline == NEVER:
+                break
+            wait_until(max(deadline, clock()))
+            engine.evaluate_due()
+        wait_until(target)
+
+    def wait_until(target):
+        if speed is not None:
+            # 以開始時間為基準換算，避免逐批等待的誤差累積
+            delay = started + (target - virtual_start) / speed - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        clock.set(max(target, clock()))
+
+    def poll_between(start, end):
+        # 即時監控沒有新報價時仍每個週期判斷警報規則，只隨時間成立的規則須依相同節奏判斷
+        compiled = engine.compiled_rules
+        if compiled is None or not compiled.timed:
+            return
+        step = 1
+        while start + step * engine.poll_interval < end:
+            advance(start + step * engine.poll_interval)
+            engine.poll_once()
+            engine.evaluate_due()
+            step += 1
+
+    batch_times = times.tolist()
+    end_time = batch_times[-1] + tail
+    for i, batch_time in enumerate(batch_times):
+        advance(batch_time)
+        engine.poll_once()
+        engine.evaluate_due()
+        poll_between(batch_time, batch_times[i + 1] if i + 1 < len(batch_times) else end_time)
+    advance(end_time)
+    engine.evaluate_due()
+
+    elapsed = time.perf_counter() - started
+    return {"ticks": len(feed), "seconds": round(elapsed, 3),
+            "ticks_per_second": round(len(feed) / elapsed, 1) if elapsed > 0 else None,
+            "virtual_seconds": round(float(times[-1] - times[0]) + tail, 3)}
@@ -0,0 +1,112 @@
+"""編譯後的警報規則：所有規則存成 NumPy 陣列，每個輪詢週期對整張報價快照一次判斷
+
+每條規則換算成「數值 ≥ 門檻」的形式：above 的數值為 bid，below 為 -bid（門檻取負），
+spread 為 ask - bid，change 為視窗起點以來的漲跌幅（%），frozen 為價格未變動的秒數。
+數值為 nan（尚無報價、報價歷史未涵蓋整個 change 期間、frozen 不在交易時段）時狀態不變。
+state 為各規則目前狀態：-1 尚未判斷、0 待觸發、1 已觸發；
+0 → 1 時觸發，數值低於 門檻 - hysteresis 時回到 0。穿越類規則啟動時為 -1，
+第一次看到價格只記錄位置不觸發，避免價格本來就在門檻另一側時一啟動就警報。
+"""
+import numpy as np
+
+from price_alert.alert_rules import ABOVE, BELOW, CHANGE, FROZEN, ON, SPREAD
+
+UNKNOWN, ARMED, FIRED = -1, 0, 1
+
+
+class CompiledRules:
+    """依 symbols（與 TickSnapshot 相同的列順序）編譯的規則集合"""
+
+    def __init__(self, rules, symbols, version=0):
+        index = {symbol: row for row, symbol in enumerate(symbols)}
+        self.rules = [rule for rule in rules if rule.symbol in index]
+        rules = self.rules
+        self.symbols = symbols
+        self.row = np.array([index[rule.symbol] for rule in rules], dtype=np.intp)
+        self.kind = np.array([rule.kind for rule in rules], dtype=np.int8)
+        threshold = np.array([rule.threshold for rule in rules], dtype=np.float64)
+        self.threshold = np.where(self.kind == BELOW, -threshold, threshold)
+        self.hysteresis = np.array([rule.hysteresis for rule in rules], dtype=np.float64)
+        self.state = np.where((self.kind == ABOVE) | (self.kind == BELOW), UNKNOWN, ARMED).astype(np.int8)
+
+        self._on = np.flatnonzero(self.kind == ON)
+        self._above = np.flatnonzero(self.kind == ABOVE)
+        self._below = np.flatnonzero(self.kind == BELOW)
+        self._spread = np.flatnonzero(self.kind == SPREAD)
+        self._frozen = np.flatnonzero(self.kind == FROZEN)
+        self._change = np.flatnonzero(self.kind == CHANGE)
+        # 相同品種與期間的 change 規則共用一次歷史查詢
+        keys = np.array([(index[rules[i].symbol], int(rules[i].window * 1000)) for i in self._change],
+                        dtype=np.int64).reshape(-1, 2)
+        self._change_keys, self._change_lookup = np.unique(keys, axis=0, return_inverse=True)
+        self._change_lookup = self._change_lookup.reshape(-1)
+        self._change_direction = np.array([rules[i].direction for i in self._change], dtype=np.int8)
+
+        self._seen_version = version  # ON 規則只對此版本之後的報價觸發
+        self._last_bid = np.full(len(symbols), np.nan)
+        self._last_ask = np.full(len(symbols), np.nan)
+        self._changed_at = np.full(len(symbols), np.nan)
+
+    def __len__(self):
+        return len(self.rules)
+
+    @property
+    def timed(self):
+        """是否有只隨時間成立的規則（frozen、change），沒有新報價時也需要判斷"""
+        return bool(len(self._frozen) or len(self._change))
+
+    def restart_frozen(self, now):
+        """報價來源中斷期間價格無法更新，恢復後重新計算 frozen 的時間"""
+        self._changed_at[~np.isnan(self._changed_at)] = now
+
+    def evaluate(self, version, table, now, history=None, trading=None):
+        """判斷所有規則，回傳本次觸發的規則索引（已排序）
+
+        table 為 TickSnapshot.read() 的報價表，version 為其版本號；
+        history 為 TickHistory（change 規則需要），trading 為各列是否在交易時段（frozen 規則需要）。
+        """
+        if len(table) != len(self.symbols):
+            # 品種列表正在更換，等待重新編譯
+            return np.zeros(0, dtype=np.intp)
+        has_quote = table['version'] > 0
+        bid = np.where(has_quote, table['bid'], np.nan)
+        ask = np.where(has_quote, table['ask'], np.nan)
+        changed = has_quote & ((bid != self._last_bid) | (ask != self._last_ask))
+        self._changed_at[changed] = now
+        self._last_bid = bid
+        self._last_ask = ask
+
+        value = np.full(len(self.rules), np.nan)
+        value[self._above] = bid[self.row[self._above]]
+        value[self._below] = -bid[self.row[self._below]]
+        value[self._spread] = ask[self.row[self._spread]] - bid[self.row[self._spread]]
+        if len(self._frozen):
+            rows = self.row[self._frozen]
+            frozen_for = now - self._changed_at[rows]
+            if trading is not None:
+                frozen_for[~np.asarray(trading, dtype=bool)[rows]] = np.nan
+            value[self._frozen] = frozen_for
+        if len(self._change) and history is not None:
+            keys = self._change_keys
+            reference = history.bids_at(keys[:, 0], int(now * 1000) - keys[:, 1])
+            with np.errstate(invalid='ignore', divide='ignore'):
+                pct = (bid[keys[:, 0]] / reference - 1.0) * 100.0
+            pct = pct[self._change_lookup]
+            direction = self._change_direction
+            value[self._change] = np.where(direction == 0, np.abs(pct), pct * direction)
+
+        state = self.state
+        with np.errstate(invalid='ignore'):
+            cond = value >= self.threshold
+            clear = value < self.threshold - self.hysteresis
+        fire = (state == ARMED) & cond
+        unknown = state == UNKNOWN
+        state[(state == FIRED) & clear] = ARMED
+        state[fire | (unknown & cond)] = FIRED
+        state[unknown & clear] = ARMED
+
+        if len(self._on):
+            # 舊格式 ON：該品種有新報價即觸發
+            fire[self._on] = table['version'][self.row[self._on]] > self._seen_version
+            self._seen_version = version
+        return np.flatnonzero(fire)
@@ -0,0 +1,165 @@
+"""交易時間表：將每個品種的時段編譯為一週內的秒數區間"""
+import bisect
+import collections
+import threading
+
+DAYS = ["星期一", "星期二", "星期三", "星期四", "星期五", "星期六", "星期日"]
+DAY_INDEX = {day: i for i, day in enumerate(DAYS)}
+
+DAY_SECONDS = 86400
+WEEK_SECONDS = 7 * DAY_SECONDS
+
+# 日為 0-6（星期一為 0），時間為當日秒數；breaks 為每日休息的 (開始, 結束) 秒數
+ScheduleEntry = collections.namedtuple(
+    'ScheduleEntry', ['start_day', 'start_time', 'end_day', 'end_time', 'breaks'])
+
+CLOSED = ScheduleEntry(0, 0, 0, 0, ())
+
+
+def parse_hms(text):
+    """將 "HH:mm:ss" 或 "h:mm:ss" 轉為當日秒數，格式錯誤時回傳 None"""
+    try:
+        hours, minutes, seconds = (int(part) for part in text.strip().split(":"))
+    except (AttributeError, ValueError):
+        return None
+    if not (0 <= hours < 24 and 0 <= minutes < 60 and 0 <= seconds < 60):
+        return None
+    return hours * 3600 + minutes * 60 + seconds
+
+
+def format_hms(seconds):
+    return f"{seconds // 3600:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+
+
+def week_position(now):
+    """回傳時間點在當週的秒數（星期一 00:00:00 為 0）"""
+    return (now.weekday() * DAY_SECONDS + now.hour * 3600 + now.minute * 60 + now.second
+            + now.microsecond / 1e6)
+
+
+def _wrap(start, end):
+    """將可能跨越週末的 [start, end) 拆成落在 [0, WEEK_SECONDS) 內的區間"""
+    if end <= WEEK_SECONDS:
+        return [(start, end)]
+    return [(start, WEEK_SECONDS), (0, end - WEEK_SECONDS)]
+
+
+def _subtract(intervals, holes):
+    result = []
+    for start, end in intervals:
+        pieces = [(start, end)]
+        for hole_start, hole_end in holes:
+            next_pieces = []
+            for piece_start, piece_end in pieces:
+                if hole_end <= piece_start or hole_start >= piece_end:
+                    next_pieces.append((piece_start, piece_end))
+                    continue
+                if piece_start < hole_start:
+                    next_pieces.append((piece_start, hole_start))
+                if hole_end < piece_end:
+                    next_pieces.append((hole_end, piece_end))
+            pieces = next_pieces
+        result.extend(pieces)
+    return sorted(result)
+
+
+class CompiledSchedule:
+    """一週內的交易區間（已扣除休息時間），以排序後的 [開始, 結束) 秒數表示"""
+
+    __slots__ = ('intervals', 'starts', 'boundaries')
+
+    def __init__(self, entry):
+        session_start = entry.start_day * DAY_SECONDS + entry.start_time
+        session_end = entry.end_day * DAY_SECONDS + entry.end_time
+        if session_end < session_start:
+            session_end += WEEK_SECONDS
+        sessions = _wrap(session_start, session_end) if session_end > session_start else []
+
+        holes = []
+        for break_start, break_end in entry.breaks:
+            if break_start == 0 and break_end == 0:
+                continue
+            if break_end < break_start:
+                break_end += DAY_SECONDS
+            for day in range(7):
+                offset = day * DAY_SECONDS
+                holes.extend(_wrap(offset + break_start, offset + break_end))
+
+        self.intervals = [(start, end) for start, end in _subtract(sessions, holes) if end > start]
+        self.starts = [start for start, _ in self.intervals]
+        # 跨週末的時段在週末被拆成兩段，接合點（週末 = 下週 0）不是真正的開收市
+        ends = {end % WEEK_SECONDS for _, end in self.intervals}
+        self.boundaries = sorted(set(self.starts) ^ ends)
+
+    def is_open(self, position):
+        i = bisect.bisect_right(self.starts, position) - 1
+        return i >= 0 and position < self.intervals[i][1]
+
+    def seconds_to_transition(self, position):
+        """距離下一次開市或收市的秒數；全週休市或全週開市時回傳 None"""
+        if not self.boundaries:
+            return None
+        i = bisect.bisect_right(self.boundaries, position)
+        if i < len(self.boundaries):
+            return self.boundaries[i] - position
+        return self.boundaries[0] + WEEK_SECONDS - position
+
+
+class ScheduleBook:
+    """所有品種的已編譯時間表與快取狀態
+
+    每個品種保存目前狀態及下一次轉換的時間戳，只有跨過開收市邊界時才重新計算。
+    GUI、輪詢與判斷執行緒都會使用，編譯結果與快取狀態的讀寫都在同一個鎖內，
+    避免 set_entry() 更換時間表的同時另一執行緒寫回舊時間表的狀態。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._compiled = {}
+        self._status = {}
+        self._now = (None, 0.0, 0.0)  # (datetime, 時間戳, 週內秒數)
+
+    def set_entry(self, symbol, entry):
+        compiled = CompiledSchedule(entry)
+        with self._lock:
+            self._compiled[symbol] = compiled
+            self._status.pop(symbol, None)
+
+    def retain(self, symbols):
+        """移除不在列表中的品種"""
+        keep = set(symbols)
+        with self._lock:
+            for symbol in list(self._compiled):
+                if symbol not in keep:
+                    del self._compiled[symbol]
+                    self._status.pop(symbol, None)
+
+    def _now_values(self, now):
+        cached = self._now
+        if cached[0] is not now:
+            cached = self._now = (now, now.timestamp(), week_position(now))
+        return cached[1], cached[2]
+
+    def _status_for(self, symbol, now):
+        """回傳 (是否交易中, 下一次開收市的時間戳)；呼叫端須持有 _lock"""
+        now_ts, position = self._now_values(now)
+        cached = self._status.get(symbol)
+        if cached is not None and now_ts < cached[1]:
+            return cached
+
+        compiled = self._compiled.get(symbol)
+        if compiled is None:
+            return False, float('inf')
+        delta = compiled.seconds_to_transition(position)
+        status = (compiled.is_open(position), float('inf') if delta is None else now_ts + delta)
+        self._status[symbol] = status
+        return status
+
+    def is_trading(self, symbol, now):
+        with self._lock:
+            return self._status_for(symbol, now)[0]
+
+    def next_transition(self, symbol, now):
+        """回傳該品種下一次開收市的時間戳，全週休市時為 inf"""
+        with self._lock:
+            return self._status_for(symbol, now)[1]
@@ -0,0 +1,301 @@
+"""多終端分片：每個子行程擁有一個 MT5 終端（或帳戶）與部分品種，經由佇列回傳報價
+
+MetaTrader5 的 Python API 每個行程只能連線一個終端，因此每個終端各開一個
+子行程輪詢，主行程的 ShardedFeed 只負責分派品種與彙整報價。
+
+terminals.json 範例：
+
+    {"terminals": [
+        {"name": "ICM", "options": {"path": "C:/ICM/terminal64.exe", "login": 123, "password": "...", "server": "..."}},
+        {"name": "PEP", "symbols": ["USOil", "UKOil"], "options": {"path": "C:/PEP/terminal64.exe"}}
+    ]}
+
+品種寫成 "名稱:代號"（例如 "PEP:XAUUSD"）時固定由該終端報價，畫面上以完整名稱顯示，
+因此可以並列不同券商的同一品種；其他品種交給 symbols 列表中包含它的終端，
+都沒有時交給第一個未指定 symbols 的終端。
+"""
+import json
+import multiprocessing
+import queue
+import threading
+import time
+
+from price_alert.feeds import QuoteFeed, SymbolMeta, Tick, create_feed
+from price_alert.health import ConnectionSupervisor
+from price_alert.poll_scheduler import SymbolPoller
+
+SEPARATOR = ":"
+
+
+class TerminalSpec:
+    """一個分片：name 為顯示用前綴，feed 為報價來源種類，options 傳給 create_feed()"""
+
+    def __init__(self, name, feed="mt5", symbols=None, options=None):
+        self.name = name
+        self.feed = feed
+        self.symbols = None if symbols is None else set(symbols)
+        self.options = dict(options or {})
+
+
+def load_terminals(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    return [TerminalSpec(item['name'], item.get('feed', 'mt5'), item.get('symbols'), item.get('options'))
+            for item in config.get('terminals', [])]
+
+
+def _worker(name, kind, options, control, output, poll_interval):
+    """子行程：連線自己的終端，依主行程指示選取品種並持續回傳報價
+
+    輪詢頻率依主行程傳來的交易與警報狀態分級（SymbolPoller），週期以絕對期限推進。
+    終端斷線時自行以指數退避重新連線，並以 ('health', 名稱, 是否正常) 通知主行程。
+    """
+    feed = create_feed(kind, **options)
+    try:
+        connected = feed.connect()
+    except Exception as e:
+        output.put(('status', name, False, str(e)))
+        return
+    output.put(('status', name, connected, "" if connected else f"無法初始化報價來源 ({name})"))
+    if not connected:
+        return
+    supervisor = ConnectionSupervisor()
+    poller = SymbolPoller(feed, poll_interval)
+    reported = True
+    poller.start()
+    try:
+        while True:
+            try:
+                while True:
+                    command = control.get_nowait()
+                    if command[0] == 'stop':
+                        return
+                    if command[0] == 'select':
+                        poller.select(command[1])
+                    elif command[0] == 'tiers':
+                        poller.set_tiers(*command[1:])
+                    elif command[0] == 'info':
+                        output.put(('info', name, [(symbol, feed.symbol_info(symbol)) for symbol in command[1]]))
+            except queue.Empty:
+                pass
+            available, recovered = supervisor.check(feed)
+            if recovered:
+                poller.reselect()
+            if available != reported:
+                output.put(('health', name, available))
+                reported = available
+            if available:
+                for batch in poller.poll():
+                    output.put(('ticks', name, [tuple(tick) for tick in batch]))
+            poller.wait_next()
+    except Exception as e:
+        output.put(('status', name, False, f"{name} 輪詢錯誤: {str(e)}"))
+    finally:
+        feed.shutdown()
+
+
+class ShardedFeed(QuoteFeed):
+    """以多個子行程輪詢多個終端的報價來源
+
+    fetch_batches() 取出佇列中所有已收到的報價，不會等待子行程；
+    symbol_info() 每次都詢問負責的子行程（快取與期限由 SymbolMetaCache 負責）。
+    各終端斷線時由子行程自行重新連線，只有全部終端都中斷時 healthy() 才回傳 False，
+    其餘終端的品種照常判斷停價。
+
+    輪詢執行緒與背景的品種資料執行緒都會讀取同一個輸出佇列，取出並處理訊息
+    都在 _lock 內進行，報價批次不會遺失或交換順序；等待查詢結果時不持有鎖。
+    """
+
+    name = "sharded"
+
+    def __init__(self, terminals, poll_interval=0.1, connect_timeout=60.0, info_timeout=10.0):
+        super().__init__()
+        self.terminals = list(terminals)
+        self.poll_interval = poll_interval
+        self.connect_timeout = connect_timeout
+        self.info_timeout = info_timeout
+        self._ctx = multiprocessing.get_context("spawn")
+        self._output = None
+        self._workers = {}
+        self._connected = set()
+        self._down = set()
+        self._info = {}
+        self._labels = {}
+        self._pending_batches = []
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, path, **options):
+        return cls(load_terminals(path), **options)
+
+    def route(self, symbol):
+        """回傳 (終端名稱, 終端上的品種代號)，找不到負責的終端時為 (None, symbol)"""
+        names = {spec.name for spec in self.terminals}
+        prefix, sep, remote = symbol.partition(SEPARATOR)
+        if sep and prefix in names:
+            return prefix, remote
+        for spec in self.terminals:
+            if spec.symbols is not None and symbol in spec.symbols:
+                return spec.name, symbol
+        for spec in self.terminals:
+            if spec.symbols is None:
+                return spec.name, symbol
+        return None, symbol
+
+    def connect(self):
+        if not self._workers:
+            self._output = self._ctx.Queue()
+            for spec in self.terminals:
+                control = self._ctx.Queue()
+                process = self._ctx.Process(
+                    target=_worker, name=f"feed-{spec.name}", daemon=True,
+                    args=(spec.name, spec.feed, spec.options, control, self._output, self.poll_interval))
+                process.start()
+                self._workers[spec.name] = (process, control)
+            deadline = time.monotonic() + self.connect_timeout
+            waiting = set(self._workers)
+            while waiting and time.monotonic() < deadline:
+                try:
+                    message = self._output.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if message[0] == 'status':
+                    waiting.discard(message[1])
+                self._handle(message)
+            for name in waiting:
+                print(f"終端 {name} 連線逾時")
+            if self.symbols:
+                self.select(self.symbols)
+        return bool(self._connected)
+
+    def healthy(self):
+        if self._output is None:
+            return False
+        self._drain()
+        alive = {name for name, (process, control) in self._workers.items() if process.is_alive()}
+        return bool((self._connected & alive) - self._down)
+
+    def reconnect(self):
+        # 仍有子行程在執行時由它們自行重新連線，全部結束時才重新啟動
+        if any(process.is_alive() for process, control in self._workers.values()):
+            return True
+        return super().reconnect()
+
+    def shutdown(self):
+        for name, (process, control) in self._workers.items():
+            control.put(('stop',))
+        for name, (process, control) in self._workers.items():
+            process.join(timeout=5.0)
+            if process.is_alive():
+                process.terminate()
+        self._workers = {}
+        self._connected.clear()
+        self._down.clear()
+
+    def _assign(self, symbols):
+        assigned = {name: [] for name in self._workers}
+        for symbol in symbols:
+            name, remote = self.route(symbol)
+            if name in assigned:
+                assigned[name].append(remote)
+                self._labels[name, remote] = symbol
+            else:
+                print(f"沒有負責 {symbol} 的終端")
+        return assigned
+
+    def select(self, symbols):
+        super().select(symbols)
+        self._labels = {}
+        if not self._workers:
+            return
+        for name, remote_symbols in self._assign(self.symbols).items():
+            self._workers[name][1].put(('select', remote_symbols))
+
+    def set_tiers(self, symbols, trading, urgent):
+        if not self._workers:
+            return
+        split = {name: ([], [], []) for name in self._workers}
+        for symbol, is_trading, is_urgent in zip(symbols, trading, urgent):
+            name, remote = self.route(symbol)
+            lists = split.get(name)
+            if lists is not None:
+                lists[0].append(remote)
+                lists[1].append(is_trading)
+                lists[2].append(is_urgent)
+        for name, (remote_symbols, shard_trading, shard_urgent) in split.items():
+            self._workers[name][1].put(('tiers', remote_symbols, shard_trading, shard_urgent))
+
+    def _display_symbol(self, name, remote):
+        """子行程回傳的代號 → 畫面上的品種名稱"""
+        return self._labels.get((name, remote), remote)
+
+    def _handle(self, message):
+        kind, name = message[0], message[1]
+        if kind == 'ticks':
+            self._pending_batches.append([Tick(self._display_symbol(name, tick[0]), *tick[1:])
+                                          for tick in message[2]])
+        elif kind == 'info':
+            for remote, meta in message[2]:
+                symbol = self._display_symbol(name, remote)
+                self._info[symbol] = None if meta is None else SymbolMeta(symbol, *meta[1:])
+        elif kind == 'health':
+            if message[2]:
+                self._down.discard(name)
+                print(f"終端 {name} 已恢復連線")
+            else:
+                self._down.add(name)
+                print(f"終端 {name} 中斷")
+        elif kind == 'status':
+            connected, text = message[2], message[3]
+            if connected:
+                self._connected.add(name)
+            else:
+                self._connected.discard(name)
+                if text:
+                    print(text)
+
+    def _drain(self):
+        with self._lock:
+            try:
+                while True:
+                    self._handle(self._output.get_nowait())
+            except queue.Empty:
+                pass
+
+    def fetch_batches(self, symbols=None):
+        if self._output is None:
+            return
+        self._drain()
+        with self._lock:
+            batches, self._pending_batches = self._pending_batches, []
+        yield from batches
+
+    def symbol_info(self, symbol):
+        return self.symbol_infos([symbol]).get(symbol)
+
+    def symbol_infos(self, symbols):
+        """依終端分組一次送出查詢，等待所有結果或 info_timeout
+
+        _info 只用來接收回覆：送出前先清除這些品種的舊結果，不會沿用過期或失敗（None）的查詢。
+        """
+        requests = {}
+        waiting = []
+        with self._lock:
+            for symbol in symbols:
+                self._info.pop(symbol, None)
+        for symbol in symbols:
+            name, remote = self.route(symbol)
+            if name not in self._workers or name not in self._connected:
+                continue
+            self._labels.setdefault((name, remote), symbol)
+            requests.setdefault(name, []).append(remote)
+            waiting.append(symbol)
+        for name, remote_symbols in requests.items():
+            self._workers[name][1].put(('info', remote_symbols))
+        deadline = time.monotonic() + self.info_timeout
+        while waiting and time.monotonic() < deadline:
+            time.sleep(0.01)
+            self._drain()
+            waiting = [symbol for symbol in waiting if symbol not in self._info]
+        with self._lock:
+            return {symbol: self._info.pop(symbol, None) for symbol in dict.fromkeys(symbols)}
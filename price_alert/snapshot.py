@@ -0,0 +1,77 @@
+"""輪詢執行緒與顯示之間共用的記憶體內報價快照"""
+import threading
+
+import numpy as np
+
+# 每個交易品種固定一列；time_msc 為報價時間（epoch 毫秒），
+# version 為該列最後一次更新時的快照版本，0 表示尚未收到報價
+TICK_DTYPE = np.dtype([
+    ('time_msc', 'i8'),
+    ('bid', 'f8'),
+    ('ask', 'f8'),
+    ('version', 'u8'),
+])
+
+
+class TickSnapshot:
+    """以交易品種為列的報價表，附帶單調遞增的版本號
+
+    輪詢執行緒每個週期以 publish() 一次性寫入，介面以 read() 取得副本，
+    只需比較版本號即可得知哪些列有變動，不需再經過 CSV 檔案。
+    """
+
+    def __init__(self, symbols=()):
+        self._lock = threading.Lock()
+        self.version = 0
+        self.symbols = []
+        self.index = {}
+        self.table = np.zeros(0, dtype=TICK_DTYPE)
+        self.set_symbols(symbols)
+
+    def set_symbols(self, symbols):
+        """更換品種列表，保留仍存在之品種的最後報價"""
+        symbols = list(symbols)
+        table = np.zeros(len(symbols), dtype=TICK_DTYPE)
+        with self._lock:
+            for row, symbol in enumerate(symbols):
+                old_row = self.index.get(symbol)
+                if old_row is not None:
+                    table[row] = self.table[old_row]
+            self.symbols = symbols
+            self.index = {symbol: row for row, symbol in enumerate(symbols)}
+            self.table = table
+            self.version += 1
+
+    def publish(self, ticks):
+        """寫入一批 (symbol, time_msc, bid, ask)，回傳新的版本號"""
+        with self._lock:
+            self.version += 1
+            version = self.version
+            table = self.table
+            index = self.index
+            for symbol, time_msc, bid, ask in ticks:
+                row = index.get(symbol)
+                if row is None:
+                    continue
+                table[row] = (time_msc, bid, ask, version)
+            return version
+
+    def read(self):
+        """回傳 (版本號, 品種列表, 報價表副本)"""
+        with self._lock:
+            return self.version, self.symbols, self.table.copy()
+
+    def layout(self):
+        """回傳目前的 (品種列表, {品種: 列索引})，兩者一致"""
+        with self._lock:
+            return self.symbols, self.index
+
+    def read_rows(self, rows):
+        """只複製指定的列，回傳 (品種列表, 報價列)"""
+        with self._lock:
+            return self.symbols, self.table[rows]
+
+    @staticmethod
+    def changed_rows(table, since):
+        """回傳 table 中版本號大於 since 的列索引"""
+        return np.flatnonzero(table['version'] > since)
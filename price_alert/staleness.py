@@ -0,0 +1,116 @@
+"""停價偵測的期限排程：以最小堆積保存每列下一次需要重新判斷的時間"""
+import heapq
+import threading
+import time
+
+NEVER = float('inf')
+
+
+class StalenessDetector:
+    """每列保存一個喚醒時間（通常為 報價時間 + 容忍度，或下一次開收市），
+    wait() 只在最早的期限到期、或有列被標記時才返回需要重新判斷的列。
+
+    報價推遲期限時不需更新堆積：舊的項目到期後由使用者重新判斷，
+    並以 schedule() 設定新的期限。watch_ticks 為 True 的列（警報中、
+    尚未收到報價等）在 touch() 收到新報價時會立即被標記。
+    """
+
+    def __init__(self, clock=time.time):
+        self.clock = clock
+        self._cond = threading.Condition()
+        self._heap = []
+        self._wake_at = []
+        self._watch = []
+        self._due = set()
+        self._closed = False
+
+    def reset(self, size):
+        """更換列數，所有列都標記為需要判斷"""
+        with self._cond:
+            self._heap = []
+            self._wake_at = [NEVER] * size
+            self._watch = [True] * size
+            self._due = set(range(size))
+            self._closed = False
+            self._cond.notify()
+
+    def schedule(self, row, when, watch_ticks=False):
+        """設定該列的下一次喚醒時間，NEVER 表示只依報價或標記喚醒"""
+        with self._cond:
+            if row >= len(self._wake_at):
+                return
+            self._watch[row] = watch_ticks
+            if when == self._wake_at[row]:
+                return
+            self._wake_at[row] = when
+            if when != NEVER:
+                earliest = self._heap[0][0] if self._heap else NEVER
+                heapq.heappush(self._heap, (when, row))
+                if when < earliest:
+                    self._cond.notify()
+
+    def touch(self, rows):
+        """這些列收到新報價；只有 watch_ticks 的列會被標記"""
+        with self._cond:
+            watch = self._watch
+            size = len(watch)
+            marked = False
+            for row in rows:
+                if row < size and watch[row]:
+                    self._due.add(row)
+                    marked = True
+            if marked:
+                self._cond.notify()
+
+    def invalidate(self, rows=None):
+        """標記列需要立即重新判斷，rows 為 None 時標記全部"""
+        with self._cond:
+            self._due.update(range(len(self._wake_at)) if rows is None else rows)
+            self._cond.notify()
+
+    def open(self):
+        with self._cond:
+            self._closed = False
+
+    def close(self):
+        """喚醒並結束所有 wait()，直到再次 open()"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def next_wake(self):
+        """最早的喚醒時間（可能是已被取代的項目），沒有時為 NEVER"""
+        with self._cond:
+            return self._heap[0][0] if self._heap else NEVER
+
+    def pending(self):
+        """堆積中的項目數（含已被取代者）"""
+        return len(self._heap)
+
+    def wait(self, timeout=None):
+        """阻塞直到有列需要判斷，回傳排序後的列索引；close() 或逾時回傳空列表
+
+        timeout=0 時不等待，只取出目前已到期或被標記的列。
+        """
+        end = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while not self._closed:
+                now = self.clock()
+                heap = self._heap
+                while heap and heap[0][0] <= now:
+                    when, row = heapq.heappop(heap)
+                    if row < len(self._wake_at) and self._wake_at[row] == when:
+                        self._wake_at[row] = NEVER
+                        self._due.add(row)
+                if self._due:
+                    rows = sorted(self._due)
+                    self._due.clear()
+                    return rows
+                wait = heap[0][0] - now if heap else None
+                if end is not None:
+                    remaining = end - time.monotonic()
+                    if remaining <= 0:
+                        return []
+                    wait = remaining if wait is None else min(wait, remaining)
+                self._cond.wait(wait)
+            return []
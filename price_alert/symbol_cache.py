@@ -0,0 +1,82 @@
+"""品種資料（小數位數、點值、交易模式）的磁碟快取
+
+啟動與更換產品列表時先使用快取中的值，只有缺少或超過 ttl 的品種才在背景
+向報價來源查詢。不同報價來源的同名品種可能不同，快取鍵包含來源名稱。
+"""
+import json
+import os
+import threading
+import time
+
+from price_alert.feeds import SymbolMeta
+
+
+class SymbolMetaCache:
+
+    def __init__(self, path="symbol_cache.json", ttl=86400.0, clock=time.time):
+        self.path = path
+        self.ttl = ttl
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._entries = {}  # "來源:品種" → (SymbolMeta, 查詢時間)
+        self.load()
+
+    @staticmethod
+    def _key(feed_name, symbol):
+        return f"{feed_name}:{symbol}"
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self._entries = {key: (SymbolMeta(*item['meta']), item['fetched']) for key, item in data.items()}
+        except Exception as e:
+            print(f"載入品種快取錯誤: {str(e)}")
+
+    def save(self):
+        with self._lock:
+            data = {key: {'meta': list(meta), 'fetched': fetched}
+                    for key, (meta, fetched) in self._entries.items()}
+        try:
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"保存品種快取錯誤: {str(e)}")
+
+    def get(self, feed_name, symbol):
+        """回傳快取的 SymbolMeta（即使已過期），沒有時回傳 None"""
+        entry = self._entries.get(self._key(feed_name, symbol))
+        return None if entry is None else entry[0]
+
+    def stale_symbols(self, feed_name, symbols):
+        """回傳缺少或已過期的品種"""
+        now = self.clock()
+        stale = []
+        for symbol in symbols:
+            entry = self._entries.get(self._key(feed_name, symbol))
+            if entry is None or now - entry[1] > self.ttl:
+                stale.append(symbol)
+        return stale
+
+    def put(self, feed_name, meta):
+        with self._lock:
+            self._entries[self._key(feed_name, meta.symbol)] = (meta, self.clock())
+
+    def refresh(self, feed, symbols):
+        """查詢 symbols 並寫入快取，回傳 {symbol: SymbolMeta}（查詢失敗的品種不列入）
+
+        只在呼叫端的單一執行緒內經由 feed.symbol_infos() 查詢：終端呼叫與輪詢共用
+        feed 的鎖，多開執行緒也只會排隊，子行程來源則一次送出所有查詢。
+        """
+        fetched = {}
+        for symbol, meta in feed.symbol_infos(symbols).items():
+            if meta is not None:
+                self.put(feed.name, meta)
+                fetched[symbol] = meta
+        if fetched:
+            self.save()
+        return fetched
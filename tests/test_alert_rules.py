@@ -0,0 +1,52 @@
+import os
+
+import pytest
+
+from price_alert.alert_rules import ABOVE, CHANGE, FROZEN, AlertRuleStore, parse_condition
+
+
+def test_parse_condition():
+    assert parse_condition("above 1.5") == (ABOVE, 1.5, 0.0, 0)
+    assert parse_condition("change -0.5% 60") == (CHANGE, 0.5, 60.0, -1)
+    assert parse_condition("frozen 30") == (FROZEN, 30.0, 30.0, 0)
+    assert parse_condition("OFF") is None
+    assert parse_condition("") is None
+    with pytest.raises(ValueError):
+        parse_condition("change 1%")
+    with pytest.raises(ValueError):
+        parse_condition("sideways 1")
+
+
+def write_rules(path, lines, mtime):
+    path.write_text("symbol,condition,wav_path,hysteresis\n" + "".join(line + "\n" for line in lines),
+                    encoding="utf-8")
+    os.utime(path, ns=(mtime, mtime))
+
+
+def test_rules_for_symbols_follow_symbol_order(tmp_path):
+    path = tmp_path / "alert_config.csv"
+    write_rules(path, ["AAA,above 1.5,a.wav,", "BBB,frozen 30,,", "AAA,below 1.2,,0.01", "CCC,bogus,,"], 10**18)
+    store = AlertRuleStore(str(path))
+    assert store.reload() == 3
+    version, rules = store.rules(["BBB", "AAA", "ZZZ"])
+    assert [(rule.symbol, rule.condition) for rule in rules] == [
+        ("BBB", "frozen 30"), ("AAA", "above 1.5"), ("AAA", "below 1.2")]
+    assert rules[2].hysteresis == 0.01
+    assert store.rules()[1][0].wav_path == "a.wav"
+
+
+def test_refresh_reloads_only_when_file_changes(tmp_path):
+    path = tmp_path / "alert_config.csv"
+    write_rules(path, ["AAA,above 1.5,,"], 10**18)
+    store = AlertRuleStore(str(path), check_interval=0.0)
+    store.refresh()
+    version = store.version
+    store.refresh()
+    assert store.version == version
+    write_rules(path, ["AAA,above 1.5,,", "BBB,spread 0.001,,"], 2 * 10**18)
+    store.refresh()
+    assert store.version == version + 1
+    assert [rule.symbol for rule in store.rules(["AAA", "BBB"])[1]] == ["AAA", "BBB"]
+    path.unlink()
+    store.refresh()
+    assert store.rules() == (version + 2, ())
@@ -0,0 +1,153 @@
+import threading
+import time
+
+from price_alert.audio import PRIORITY_RESUME, PRIORITY_STALE, AlertAudioPlayer
+from price_alert.config import Product
+from price_alert.engine import MonitorEngine
+from price_alert.feeds import QuoteFeed
+from price_alert.schedule import ScheduleEntry
+
+
+class FakePlayer:
+    """記錄播放內容；release 設定前第一次播放會阻塞，讓後續請求留在佇列中"""
+
+    def __init__(self, from_memory=True):
+        self.from_memory = from_memory
+        self.calls = []
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def __call__(self, path, data):
+        self.calls.append((path, data, time.monotonic()))
+        self.started.set()
+        self.release.wait(2.0)
+
+
+def wav(tmp_path, name, content=b"RIFF"):
+    path = tmp_path / name
+    path.write_bytes(content)
+    return str(path)
+
+
+def wait_for(condition, timeout=2.0):
+    end = time.monotonic() + timeout
+    while not condition() and time.monotonic() < end:
+        time.sleep(0.005)
+    return condition()
+
+
+def test_coalesces_identical_pending_requests(tmp_path):
+    player = FakePlayer()
+    audio = AlertAudioPlayer(player=player, max_per_second=0)
+    a, b = wav(tmp_path, "a.wav"), wav(tmp_path, "b.wav")
+    audio.start()
+    try:
+        assert audio.play(a)
+        assert player.started.wait(2.0)
+        # 播放 a 的同時，b 排隊中：相同的 b 被合併
+        assert audio.play(b)
+        assert not audio.play(b)
+        assert audio.coalesced == 1
+        player.release.set()
+        assert wait_for(lambda: audio.played == 2)
+        assert [call[0] for call in player.calls] == [a, b]
+        assert audio.play(b)
+    finally:
+        player.release.set()
+        audio.stop()
+
+
+def test_higher_priority_plays_first(tmp_path):
+    player = FakePlayer()
+    audio = AlertAudioPlayer(player=player, max_per_second=0)
+    first, resume, stale = wav(tmp_path, "first.wav"), wav(tmp_path, "resume.wav"), wav(tmp_path, "stale.wav")
+    audio.start()
+    try:
+        audio.play(first)
+        assert player.started.wait(2.0)
+        audio.play(resume, PRIORITY_RESUME)
+        audio.play(stale, PRIORITY_STALE)
+        player.release.set()
+        assert wait_for(lambda: audio.played == 3)
+        assert [call[0] for call in player.calls] == [first, stale, resume]
+    finally:
+        player.release.set()
+        audio.stop()
+
+
+def test_rate_limit_spaces_playbacks(tmp_path):
+    player = FakePlayer()
+    player.release.set()
+    audio = AlertAudioPlayer(player=player, max_per_second=20)
+    paths = [wav(tmp_path, f"{i}.wav") for i in range(3)]
+    audio.start()
+    try:
+        for path in paths:
+            assert audio.play(path)
+        assert wait_for(lambda: audio.played == 3)
+        times = [call[2] for call in player.calls]
+        assert min(b - a for a, b in zip(times, times[1:])) >= 0.045
+    finally:
+        audio.stop()
+
+
+def test_missing_file_is_not_queued(tmp_path):
+    audio = AlertAudioPlayer(player=FakePlayer())
+    assert not audio.play("")
+    assert not audio.play(str(tmp_path / "missing.wav"))
+
+
+def test_cached_bytes_only_for_memory_players(tmp_path):
+    path = wav(tmp_path, "a.wav", b"RIFFdata")
+    for from_memory, expected in [(True, b"RIFFdata"), (False, None)]:
+        player = FakePlayer(from_memory)
+        player.release.set()
+        audio = AlertAudioPlayer(player=player)
+        audio.start()
+        try:
+            audio.play(path)
+            assert wait_for(lambda: audio.played == 1)
+            assert player.calls[0][1] == expected
+            assert bool(audio._cache) == from_memory
+        finally:
+            audio.stop()
+
+
+class SilentFeed(QuoteFeed):
+    def fetch_batches(self, symbols=None):
+        yield []
+
+
+class RecordingAudio:
+    def __init__(self, accept):
+        self.accept = accept
+        self.requests = []
+        self.playbacks = None
+
+    def play(self, path, priority):
+        self.requests.append(path)
+        return self.accept
+
+    def preload(self, paths):
+        pass
+
+
+def stale_engine(tmp_path, audio):
+    engine = MonitorEngine(SilentFeed(), alert_config=str(tmp_path / "none.csv"), audio=audio, clock=lambda: 1e9)
+    engine.set_products([Product("AAA", "stop.wav", "")])
+    engine.set_schedule("AAA", "", ScheduleEntry(0, 0, 6, 86399, ()))
+    engine.tolerances["AAA"] = 1
+    engine.snapshot.publish([("AAA", int(1e9 * 1000) - 5000, 1.0, 1.1)])
+    return engine
+
+
+def test_row_marked_played_only_when_sound_queued(tmp_path):
+    engine = stale_engine(tmp_path, RecordingAudio(accept=False))
+    engine.evaluate()
+    assert engine.alert_on == [True]
+    assert engine.played == [False]
+    engine = stale_engine(tmp_path, RecordingAudio(accept=True))
+    engine.evaluate()
+    assert engine.played == [True]
+    engine.evaluate()
+    assert engine.audio.requests == ["stop.wav"]
@@ -0,0 +1,46 @@
+import datetime
+import json
+
+from price_alert.event_log import FIELDS, EventLogWriter
+
+UTC = datetime.timezone.utc
+# 2026-01-05 23:59:59 UTC
+MIDNIGHT = datetime.datetime(2026, 1, 6, tzinfo=UTC).timestamp()
+
+
+def run(writer, records):
+    writer.start()
+    for record in records:
+        writer.log(*record)
+    writer.stop()
+
+
+def test_rotates_daily_and_writes_header_once(tmp_path):
+    writer = EventLogWriter(str(tmp_path), tz=UTC)
+    run(writer, [("AAA", "stale", 5.0, 1.5, MIDNIGHT - 1), ("BBB", "resume", None, None, MIDNIGHT + 1)])
+    run(EventLogWriter(str(tmp_path), tz=UTC), [("CCC", "stale", 2.0, None, MIDNIGHT + 2)])
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["play_log_20260105.csv", "play_log_20260106.csv"]
+    first = (tmp_path / "play_log_20260105.csv").read_text().splitlines()
+    assert first == [",".join(FIELDS), "2026-01-05T23:59:59.000+00:00,AAA,stale,5.0,1.5"]
+    # 重新啟動後接續寫入，不重複標題
+    second = (tmp_path / "play_log_20260106.csv").read_text().splitlines()
+    assert second[0] == ",".join(FIELDS)
+    assert [line.split(",")[1] for line in second[1:]] == ["BBB", "CCC"]
+
+
+def test_rotates_by_size_and_skips_full_parts(tmp_path):
+    records = [("AAA", "stale", 1.0, None, MIDNIGHT + i) for i in range(3)]
+    run(EventLogWriter(str(tmp_path), flush_size=1, max_bytes=60, tz=UTC), records)
+    names = sorted(p.name for p in tmp_path.iterdir())
+    assert names == ["play_log_20260106.csv", "play_log_20260106_1.csv", "play_log_20260106_2.csv"]
+    # 既有檔案已滿時從下一個編號開始
+    run(EventLogWriter(str(tmp_path), max_bytes=60, tz=UTC), records[:1])
+    assert (tmp_path / "play_log_20260106_3.csv").exists()
+
+
+def test_jsonl_uses_null_for_missing_values(tmp_path):
+    run(EventLogWriter(str(tmp_path), prefix="events", fmt="jsonl", rotate_daily=False, tz=UTC),
+        [("AAA", "resume", None, 12.3456, MIDNIGHT)])
+    record = json.loads((tmp_path / "events.jsonl").read_text())
+    assert record == {"timestamp": "2026-01-06T00:00:00.000+00:00", "symbol": "AAA", "event": "resume",
+                      "stale_seconds": None, "latency_ms": 12.346}
@@ -0,0 +1,46 @@
+from price_alert.feeds import QuoteFeed, Tick
+
+
+class ScriptedFeed(QuoteFeed):
+    """每次輪詢回傳 quotes 中已選取品種的報價，每批 batch_size 個"""
+
+    def __init__(self, batch_size=2):
+        super().__init__()
+        self.batch_size = batch_size
+        self.quotes = {}
+
+    def fetch_batches(self, symbols=None):
+        symbols = self.symbols if symbols is None else symbols
+        ticks = [Tick(symbol, 0, *self.quotes[symbol]) for symbol in symbols]
+        for start in range(0, len(ticks), self.batch_size):
+            yield ticks[start:start + self.batch_size]
+
+
+def polled(feed, symbols=None):
+    return [[tick.symbol for tick in batch] for batch in feed.fetch_changes(symbols)]
+
+
+def test_only_changed_ticks_are_yielded():
+    feed = ScriptedFeed()
+    feed.select(["AAA", "BBB", "CCC"])
+    feed.quotes = {"AAA": (1000, 1.0, 1.1), "BBB": (1000, 2.0, 2.1), "CCC": (1000, 3.0, 3.1)}
+    assert polled(feed) == [["AAA", "BBB"], ["CCC"]]
+    assert polled(feed) == []
+    # time_msc、bid、ask 任一變動都算；沒有變動的批不回傳
+    feed.quotes["AAA"] = (1001, 1.0, 1.1)
+    feed.quotes["CCC"] = (1000, 3.0, 3.2)
+    assert polled(feed) == [["AAA"], ["CCC"]]
+    feed.quotes["BBB"] = (1000, 2.05, 2.1)
+    assert polled(feed, ["BBB", "CCC"]) == [["BBB"]]
+
+
+def test_select_prunes_removed_symbols():
+    feed = ScriptedFeed()
+    feed.select(["AAA", "BBB"])
+    feed.quotes = {"AAA": (1000, 1.0, 1.1), "BBB": (1000, 2.0, 2.1)}
+    polled(feed)
+    feed.select(["AAA"])
+    assert set(feed._last_ticks) == {"AAA"}
+    # 重新加入的品種視為新品種，第一次輪詢即回傳
+    feed.select(["AAA", "BBB"])
+    assert polled(feed) == [["BBB"]]
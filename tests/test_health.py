@@ -0,0 +1,87 @@
+from price_alert.health import ConnectionSupervisor, SymbolBreakers, backoff_delay
+from price_alert.replay import VirtualClock
+
+
+def test_backoff_doubles_up_to_limit():
+    assert [backoff_delay(n, 1.0, 5.0) for n in range(1, 6)] == [1.0, 2.0, 4.0, 5.0, 5.0]
+
+
+def test_breaker_parks_after_threshold_and_backs_off():
+    breakers = SymbolBreakers(threshold=2, base_delay=1.0, max_delay=10.0)
+    breakers.failure("AAA", 100.0)
+    assert breakers.allow("AAA", 100.0)
+    breakers.failure("AAA", 100.0)
+    assert not breakers.allow("AAA", 100.5)
+    assert breakers.parked(100.5) == 1
+    # 時間到放行一次；再次失敗時等待加倍
+    assert breakers.allow("AAA", 101.0)
+    breakers.failure("AAA", 101.0)
+    assert not breakers.allow("AAA", 102.5)
+    assert breakers.allow("AAA", 103.0)
+    breakers.success("AAA")
+    assert breakers.parked(103.0) == 0
+    breakers.failure("AAA", 103.0)
+    assert breakers.allow("AAA", 103.0)
+
+
+def test_parked_counts_only_unexpired_entries():
+    clock = VirtualClock(100.0)
+    breakers = SymbolBreakers(threshold=1, base_delay=1.0, clock=clock)
+    breakers.failure("AAA", 100.0)
+    breakers.failure("BBB", 100.0)
+    breakers.failure("BBB", 100.5)
+    assert breakers.parked() == 2
+    clock.set(101.5)
+    # AAA 已可重試（尚未輪詢），BBB 第二次暫停到 102.5
+    assert breakers.parked() == 1
+    clock.set(103.0)
+    assert breakers.parked() == 0
+
+
+def test_retain_and_reset():
+    breakers = SymbolBreakers(threshold=1)
+    breakers.failure("AAA", 0.0)
+    breakers.failure("BBB", 0.0)
+    breakers.retain(["BBB"])
+    assert breakers.allow("AAA", 0.0) and not breakers.allow("BBB", 0.0)
+    breakers.reset()
+    assert breakers.allow("BBB", 0.0)
+
+
+class FlakyFeed:
+    name = "flaky"
+
+    def __init__(self):
+        self.up = True
+        self.reconnects = 0
+
+    def healthy(self):
+        return self.up
+
+    def reconnect(self):
+        self.reconnects += 1
+        return self.up
+
+
+def test_supervisor_reconnects_with_backoff():
+    clock = VirtualClock(0.0)
+    supervisor = ConnectionSupervisor(base_delay=1.0, max_delay=4.0, clock=clock)
+    feed = FlakyFeed()
+    assert supervisor.check(feed) == (True, False)
+    feed.up = False
+    assert supervisor.check(feed) == (False, False)
+    assert supervisor.down
+    attempts = []
+    for step in range(1, 80):
+        clock.set(step * 0.1)
+        before = feed.reconnects
+        supervisor.check(feed)
+        if feed.reconnects != before:
+            attempts.append(round(clock(), 1))
+    # 第一次在 1 秒後重試，之後間隔 2、4、4 秒
+    assert attempts == [1.0, 3.0, 7.0]
+    feed.up = True
+    clock.set(11.0)
+    assert supervisor.check(feed) == (True, True)
+    assert not supervisor.down and supervisor.reconnects == 1
+    assert supervisor.check(feed) == (True, False)
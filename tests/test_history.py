@@ -0,0 +1,63 @@
+import numpy as np
+
+from price_alert.history import TickHistory
+
+
+def filled(capacity=8, ticks=5):
+    """AAA 每秒一筆，bid 依序為 1.0, 1.1, ...；BBB 沒有報價"""
+    history = TickHistory(["AAA", "BBB"], capacity)
+    for i in range(ticks):
+        history.append([0], [1000 * (i + 1)], [1.0 + i / 10], [1.1 + i / 10], recv=float(i + 1))
+    return history
+
+
+def test_bids_at_returns_last_tick_before_time():
+    history = filled()
+    bids = history.bids_at([0, 0, 0], [1000, 2500, 9000])
+    np.testing.assert_allclose(bids, [1.0, 1.1, 1.4])
+
+
+def test_bids_at_is_nan_before_first_tick_and_without_quotes():
+    history = filled()
+    bids = history.bids_at([0, 1, 5], 999)
+    assert np.isnan(bids).all()
+    assert np.isnan(history.bids_at([1], 5000)[0])
+
+
+def test_bids_at_is_nan_once_overwritten():
+    history = filled(capacity=4, ticks=6)
+    # 緩衝區只剩 3 至 6 秒的報價
+    assert np.isnan(history.bids_at([0], 2500)[0])
+    np.testing.assert_allclose(history.bids_at([0, 0], [3000, 6000]), [1.2, 1.5])
+
+
+def test_append_skips_duplicates():
+    history = filled(ticks=2)
+    last = history.recent("AAA", 1)[0]
+    assert history.append([0, 1], [last['time_msc'], 2000], [last['bid'], 2.0], [last['ask'], 2.1], recv=3.0) == 1
+    assert history.count.tolist() == [2, 1]
+
+
+def test_resize_keeps_newest_ticks():
+    history = filled(capacity=4, ticks=6)
+    history.resize(8)
+    np.testing.assert_allclose(history.recent("AAA")['bid'], [1.2, 1.3, 1.4, 1.5])
+    history.resize(2)
+    np.testing.assert_allclose(history.recent("AAA")['bid'], [1.4, 1.5])
+    assert history.bids_at([0], 5000)[0] == 1.4
+
+
+def test_set_symbols_keeps_existing_history():
+    history = filled(ticks=3)
+    history.set_symbols(["CCC", "AAA"])
+    np.testing.assert_allclose(history.recent("AAA")['bid'], [1.0, 1.1, 1.2])
+    assert len(history.recent("CCC")) == 0
+
+
+def test_tick_rates_use_recorded_span():
+    history = filled(capacity=64, ticks=5)
+    # 開始記錄只有 4 秒：以 4 秒計算，不以 60 秒的視窗稀釋
+    assert history.tick_rate("AAA", window=60.0, now=5.0) == 5 / 4
+    history = filled(capacity=4, ticks=20)
+    # 緩衝區只涵蓋最近 3 秒
+    assert history.tick_rate("AAA", window=60.0, now=20.0) == 4 / 3
@@ -0,0 +1,76 @@
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+from price_alert.metrics import Histogram, Metrics, MetricsServer
+
+
+def test_histogram_render_and_quantile():
+    histogram = Histogram("t_ms", "測試", bounds=(1, 10))
+    assert histogram.quantile(0.5) is None
+    for value in (0.5, 5, 5, 50):
+        histogram.observe(value)
+    assert histogram.quantile(0.5) == 10
+    assert histogram.quantile(1.0) == float('inf')
+    assert histogram.render() == ['t_ms_bucket{le="1"} 1', 't_ms_bucket{le="10"} 3', 't_ms_bucket{le="+Inf"} 4',
+                                  "t_ms_sum 60.500000", "t_ms_count 4"]
+
+
+def test_concurrent_observe_and_count_alert_lose_nothing():
+    metrics = Metrics()
+
+    def worker():
+        for _ in range(20000):
+            metrics.poll_cycle_ms.observe(1.0)
+            metrics.count_alert("stale")
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert metrics.poll_cycle_ms.count == 80000
+    assert sum(metrics.poll_cycle_ms.counts) == 80000
+    assert metrics.alerts["stale"].value == 80000
+    # 同一事件只建立一個計數器
+    assert metrics.render().count('price_alert_alerts_total{event="stale"}') == 1
+
+
+class FakeProfiler:
+    def __init__(self):
+        self.calls = []
+
+    def start(self, **options):
+        self.calls.append(options)
+        return None  # 回應 409，不必建立真正的分析工作
+
+
+@pytest.fixture
+def served():
+    profiler = FakeProfiler()
+    server = MetricsServer(Metrics(), port=0, profiler=profiler, profile_options={"duration": 30.0, "mode": "sample"})
+    assert server.start()
+    yield f"http://127.0.0.1:{server._server.server_address[1]}", profiler
+    server.stop()
+
+
+def status_of(url, data=None):
+    try:
+        with urllib.request.urlopen(url, data=data, timeout=5) as response:
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+
+def test_profile_requires_post(served):
+    base, profiler = served
+    assert status_of(base + "/metrics") == 200
+    # GET 不得啟動分析
+    assert status_of(base + "/profile?seconds=5") == 405
+    assert profiler.calls == []
+    assert status_of(base + "/profile?seconds=5", data=b"") == 409
+    assert status_of(base + "/profile", data=b"seconds=7&mode=cprofile") == 409
+    assert status_of(base + "/profile", data=b"seconds=-1") == 400
+    assert profiler.calls == [{"duration": 5.0, "mode": "sample"}, {"duration": 7.0, "mode": "cprofile"}]
@@ -0,0 +1,52 @@
+import os
+
+import pytest
+
+from price_alert.config import PARAMETER_HEADERS, ParameterSets, merge_parameter_row
+from price_alert.schedule import ScheduleEntry
+
+
+def write_params(path, rows):
+    lines = [",".join(PARAMETER_HEADERS)] + [",".join(row) for row in rows]
+    path.write_text("\n".join(lines) + "\n")
+
+
+def row(symbol, start_time="01:00:00", break_start="", break_end=""):
+    return [symbol, "00:01:00", "A", "星期一", start_time, "星期五", "23:00:00",
+            break_start, break_end, "", "", "", ""]
+
+
+def test_preloads_and_caches_until_file_changes(tmp_path):
+    path = tmp_path / "winter.csv"
+    write_params(path, [row("AAA"), row("BBB", "02:00:00")])
+    sets = ParameterSets({"冬令": str(path)})
+    first = sets.get("冬令")
+    assert set(first) == {"AAA", "BBB"}
+    assert first["BBB"].start_time == 7200
+    # 檔案未變更時不重新解析
+    assert sets.get("冬令") is first
+
+    write_params(path, [row("AAA", "03:00:00")])
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    second = sets.get("冬令")
+    assert set(second) == {"AAA"}
+    assert second["AAA"].start_time == 3 * 3600
+
+
+def test_missing_file_is_reported_not_raised_on_preload(tmp_path, capsys):
+    sets = ParameterSets({"夏令": str(tmp_path / "missing.csv")})
+    assert "夏令" in sets
+    assert "預先載入參數失敗" in capsys.readouterr().out
+    with pytest.raises(FileNotFoundError):
+        sets.get("夏令")
+
+
+def test_last_row_wins_and_unparsed_fields_keep_values(tmp_path):
+    path = tmp_path / "params.csv"
+    write_params(path, [row("AAA", "01:00:00"), row("AAA", "bad", "12:00:00", "13:00:00")])
+    params = ParameterSets({"冬令": str(path)}).get("冬令")["AAA"]
+    entry = ScheduleEntry(0, 60, 4, 82800, ((100, 200),))
+    merged = merge_parameter_row(entry, params)
+    assert merged.start_time == 60
+    assert merged.breaks == ((12 * 3600, 13 * 3600), (0, 0), (0, 0))
@@ -0,0 +1,113 @@
+import numpy as np
+
+from price_alert.feeds import QuoteFeed, Tick
+from price_alert.poll_scheduler import PollScheduler, SymbolPoller
+from price_alert.replay import VirtualClock
+
+
+def make_scheduler(size=3):
+    clock = VirtualClock(1000.0)
+    scheduler = PollScheduler(0.1, quiet_after=30.0, quiet_interval=1.0, closed_interval=10.0, clock=clock)
+    scheduler.reset(size)
+    return clock, scheduler
+
+
+def test_all_rows_due_after_reset():
+    clock, scheduler = make_scheduler()
+    assert scheduler.due(clock()).tolist() == [0, 1, 2]
+    scheduler.polled([0, 1, 2], clock())
+    assert scheduler.due(clock()).tolist() == []
+    # 提早半個週期到期，醒來稍早也不會錯過下一個週期
+    assert scheduler.due(clock() + 0.04).tolist() == []
+    assert scheduler.due(clock() + 0.06).tolist() == [0, 1, 2]
+
+
+def test_tiers_follow_trading_activity_and_alerts():
+    clock, scheduler = make_scheduler()
+    scheduler.observe([0, 1, 2], [1, 1, 1], clock())
+    clock.set(1040.0)
+    scheduler.observe([0], [2], clock())
+    scheduler.set_tiers([True, True, False], [False, False, False], clock())
+    assert scheduler.intervals.tolist() == [0.1, 1.0, 10.0]
+    assert scheduler.tier_counts() == (1, 1, 1)
+    # 警報中的品種即使沒有新報價也每個週期輪詢
+    scheduler.set_tiers([True, True, False], [False, True, False], clock())
+    assert scheduler.intervals.tolist() == [0.1, 0.1, 10.0]
+
+
+def test_faster_tier_does_not_wait_for_old_poll_time():
+    clock, scheduler = make_scheduler(1)
+    scheduler.set_tiers([False], [False], clock())
+    scheduler.polled([0], clock())
+    clock.set(1001.0)
+    assert scheduler.due(clock()).tolist() == []
+    scheduler.set_tiers([True], [False], clock())
+    clock.set(1001.1)
+    assert scheduler.due(clock()).tolist() == [0]
+
+
+def test_polled_ignores_rows_from_previous_list():
+    clock, scheduler = make_scheduler(10)
+    rows = scheduler.due(clock())
+    scheduler.reset(5)
+    scheduler.polled(rows, clock())
+    assert len(scheduler.due(clock() + 0.1)) == 5
+
+
+def test_observe_counts_only_changed_times():
+    clock, scheduler = make_scheduler(2)
+    scheduler.observe([0, 1], [5, 5], clock())
+    clock.set(1010.0)
+    scheduler.observe([0, 1, 7], [5, 6, 9], clock())
+    assert scheduler.last_change.tolist() == [1000.0, 1010.0]
+
+
+def test_deadlines_advance_without_drift():
+    # reset()、start() 與每次 wait_next() 各讀一次時鐘
+    times = iter([0.0, 0.0, 0.0, 0.03, 0.13, 0.45, 0.7, 0.7])
+    scheduler = PollScheduler(0.1, clock=lambda: next(times))
+    waits = []
+
+    class Recorder:
+        def wait(self, seconds):
+            waits.append(round(seconds, 6))
+
+    scheduler.start()
+    scheduler.wait_next(Recorder())  # 0.00 → 期限 0.1
+    scheduler.wait_next(Recorder())  # 0.03 → 期限 0.2，輪詢耗時不累積
+    scheduler.wait_next(Recorder())  # 0.13 → 期限 0.3
+    assert waits == [0.1, 0.17, 0.17]
+    scheduler.wait_next(Recorder())  # 0.45 落後期限 0.4 不到一個週期：不等待、不算逾時
+    assert scheduler.overruns == 0 and round(scheduler.max_lag, 6) == 0.05
+    scheduler.wait_next(Recorder())  # 0.70 落後期限 0.5 超過一個週期：逾時並重新對齊
+    assert scheduler.overruns == 1
+    scheduler.wait_next(Recorder())  # 0.70 → 期限 0.8
+    assert waits[-1] == 0.1
+
+
+class CountingFeed(QuoteFeed):
+    def __init__(self):
+        super().__init__()
+        self.polled = []
+
+    def fetch_batches(self, symbols=None):
+        symbols = self.symbols if symbols is None else symbols
+        self.polled.append(list(symbols))
+        yield [Tick(symbol, 0, len(self.polled), 1.0, 1.1) for symbol in symbols]
+
+
+def test_symbol_poller_skips_closed_symbols():
+    feed = CountingFeed()
+    poller = SymbolPoller(feed, 0.1)
+    clock = VirtualClock(1000.0)
+    poller.scheduler.clock = clock
+    poller.select(["A", "B", "C"])
+    # 沒有傳來的品種（B）與不在交易時段的品種（C）都以休市頻率輪詢
+    poller.set_tiers(["C", "A", "X"], [False, True, True], [False, False, False])
+    assert sum(len(batch) for batch in poller.poll()) == 3
+    for step in range(1, 20):
+        clock.set(1000.0 + step * 0.1)
+        list(poller.poll())
+    counts = {symbol: sum(symbol in polled for polled in feed.polled) for symbol in "ABC"}
+    assert counts == {"A": 20, "B": 1, "C": 1}
+    assert np.allclose(poller.scheduler.intervals, [0.1, 10.0, 10.0])
@@ -0,0 +1,107 @@
+import datetime
+from zoneinfo import ZoneInfo
+
+from price_alert.config import Product
+from price_alert.engine import MonitorEngine
+from price_alert.feeds import QuoteFeed, Tick
+from price_alert.recorder import TickRecorder
+from price_alert.replay import ReplayFeed, VirtualClock, open_segments, run_replay
+from price_alert.schedule import ScheduleEntry
+
+TZ = ZoneInfo("Asia/Shanghai")
+START = datetime.datetime(2026, 10, 14, 10, 0, tzinfo=TZ).timestamp()  # 星期三
+ALL_WEEK = ScheduleEntry(0, 0, 6, 86399, ())
+POLL_INTERVAL = 0.1
+DURATION = 12.0
+
+
+def script():
+    """(秒數, 品種, bid)：AAA 在 3-6 秒停價，BBB 穩定上漲後持平，9-10.6 秒兩者都沒有報價"""
+    ticks = []
+    for i in range(int(DURATION / 0.2)):
+        t = round(i * 0.2, 1)
+        if 9.0 <= t < 10.6:
+            continue
+        if not 3.0 <= t < 6.0:
+            ticks.append((t, "AAA", 1.0 + (i % 3) * 0.001))
+        ticks.append((t, "BBB", 2.0 + min(t, 8.0) * 0.004))
+    return ticks
+
+
+class ScriptedFeed(QuoteFeed):
+    """依時鐘回傳腳本中各品種最新的報價，如同 MT5 回傳最後一筆"""
+
+    name = "scripted"
+
+    def __init__(self, clock):
+        super().__init__()
+        self.clock = clock
+        self.ticks = script()
+
+    def fetch_batches(self, symbols=None):
+        now = self.clock() - START
+        latest = {}
+        for t, symbol, bid in self.ticks:
+            if t <= now + 1e-9:
+                latest[symbol] = Tick(symbol, int(START + t), int(round((START + t) * 1000)), bid, bid + 0.0002)
+        yield [latest[symbol] for symbol in self.symbols if symbol in latest]
+
+
+def make_engine(feed, clock, alert_config, recorder=None):
+    engine = MonitorEngine(feed, tz=TZ, alert_config=str(alert_config), recorder=recorder,
+                           poll_interval=POLL_INTERVAL, clock=clock)
+    engine.set_products([Product("AAA", "", ""), Product("BBB", "", "")])
+    for symbol in engine.symbols:
+        engine.tolerances[symbol] = 1
+        engine.set_schedule(symbol, "", ALL_WEEK)
+    events = []
+
+    def listener(symbol, event, stale_seconds):
+        events.append((round(float(clock()) - START, 3), symbol, event))
+
+    engine.listeners.append(listener)
+    return engine, events
+
+
+def run_live(engine, clock):
+    """以虛擬時鐘模擬即時監控：輪詢執行緒每週期輪詢，判斷執行緒在期限當下判斷"""
+    engine.feed.select(engine.symbols)
+    steps = int(DURATION / POLL_INTERVAL)
+    for step in range(steps + 1):
+        now = START + step * POLL_INTERVAL
+        while engine.next_deadline() <= now:
+            clock.set(max(engine.next_deadline(), clock()))
+            engine.evaluate_due()
+        clock.set(now)
+        engine.poll_once()
+        engine.evaluate_due()
+
+
+def test_record_then_replay_produces_same_events(tmp_path):
+    alert_config = tmp_path / "alert_config.csv"
+    alert_config.write_text("symbol,condition,wav_path\n"
+                            "AAA,frozen 1.5,\n"
+                            "BBB,above 2.02,\n"
+                            "BBB,change 0.3% 2,\n", encoding="utf-8")
+    recordings = tmp_path / "recordings"
+
+    clock = VirtualClock(START)
+    recorder = TickRecorder(str(recordings), tz=TZ)
+    recorder.start()
+    engine, live_events = make_engine(ScriptedFeed(clock), clock, alert_config, recorder)
+    run_live(engine, clock)
+    recorder.stop()
+
+    kinds = {(symbol, event) for _, symbol, event in live_events}
+    assert {("AAA", "stale"), ("AAA", "resume"), ("AAA", "rule"), ("BBB", "rule")} <= kinds
+
+    segments = open_segments(str(recordings))
+    recorded = [(round(t - START, 3), symbol, event) for segment in segments
+                for t, symbol, event, _ in segment.event_records()]
+    assert recorded == live_events
+
+    clock = VirtualClock()
+    feed = ReplayFeed(segments, clock)
+    engine, replay_events = make_engine(feed, clock, alert_config)
+    run_replay(engine, feed, clock, tail=DURATION - (feed.recv[-1] - START))
+    assert replay_events == live_events
@@ -0,0 +1,127 @@
+import numpy as np
+
+from price_alert.alert_rules import AlertRule, parse_condition
+from price_alert.history import TickHistory
+from price_alert.rule_engine import ARMED, FIRED, UNKNOWN, CompiledRules
+from price_alert.snapshot import TickSnapshot
+
+SYMBOLS = ["AAA", "BBB"]
+
+
+def rule(symbol, condition, hysteresis=0.0):
+    return AlertRule(symbol, condition, "", *parse_condition(condition), hysteresis)
+
+
+class Quotes:
+    """報價快照與報價歷史，以秒為單位推進"""
+
+    def __init__(self, capacity=128):
+        self.snapshot = TickSnapshot(SYMBOLS)
+        self.history = TickHistory(SYMBOLS, capacity)
+
+    def tick(self, symbol, now, bid, ask=None):
+        ask = bid + 0.0001 if ask is None else ask
+        self.snapshot.publish([(symbol, int(now * 1000), bid, ask)])
+        self.history.append([SYMBOLS.index(symbol)], [int(now * 1000)], [bid], [ask], now)
+
+    def evaluate(self, compiled, now, trading=None):
+        version, _, table = self.snapshot.read()
+        fired = compiled.evaluate(version, table, now, self.history, trading)
+        return [compiled.rules[i].condition for i in fired]
+
+
+def test_crossing_waits_for_first_price():
+    quotes = Quotes()
+    compiled = CompiledRules([rule("AAA", "above 1.5")], SYMBOLS)
+    assert compiled.state.tolist() == [UNKNOWN]
+    assert quotes.evaluate(compiled, 0.0) == []
+    assert compiled.state.tolist() == [UNKNOWN]
+    # 啟動時價格已在門檻之上：只記錄位置
+    quotes.tick("AAA", 1.0, 1.6)
+    assert quotes.evaluate(compiled, 1.0) == []
+    assert compiled.state.tolist() == [FIRED]
+    quotes.tick("AAA", 2.0, 1.4)
+    assert quotes.evaluate(compiled, 2.0) == []
+    quotes.tick("AAA", 3.0, 1.6)
+    assert quotes.evaluate(compiled, 3.0) == ["above 1.5"]
+
+
+def test_crossing_from_below_fires():
+    quotes = Quotes()
+    compiled = CompiledRules([rule("AAA", "below 1.5")], SYMBOLS)
+    quotes.tick("AAA", 1.0, 1.6)
+    assert quotes.evaluate(compiled, 1.0) == []
+    assert compiled.state.tolist() == [ARMED]
+    quotes.tick("AAA", 2.0, 1.4)
+    assert quotes.evaluate(compiled, 2.0) == ["below 1.5"]
+
+
+def test_hysteresis_rearms_only_after_leaving_band():
+    quotes = Quotes()
+    compiled = CompiledRules([rule("AAA", "above 1.5", hysteresis=0.1)], SYMBOLS)
+    for now, bid, expected in [(1, 1.35, []), (2, 1.55, ["above 1.5"]), (3, 1.45, []),
+                               (4, 1.55, []), (5, 1.35, []), (6, 1.55, ["above 1.5"])]:
+        quotes.tick("AAA", now, bid)
+        assert quotes.evaluate(compiled, now) == expected
+
+
+def test_frozen_only_counts_while_trading():
+    quotes = Quotes()
+    compiled = CompiledRules([rule("AAA", "frozen 2")], SYMBOLS)
+    quotes.tick("AAA", 0.0, 1.0)
+    closed = [False, False]
+    assert quotes.evaluate(compiled, 0.0, closed) == []
+    assert quotes.evaluate(compiled, 5.0, closed) == []
+    assert quotes.evaluate(compiled, 5.0, [True, False]) == ["frozen 2"]
+    assert quotes.evaluate(compiled, 6.0, [True, False]) == []
+
+
+def test_frozen_restarts_after_feed_recovery():
+    quotes = Quotes()
+    compiled = CompiledRules([rule("AAA", "frozen 2")], SYMBOLS)
+    quotes.tick("AAA", 0.0, 1.0)
+    trading = [True, True]
+    assert quotes.evaluate(compiled, 1.0, trading) == []
+    compiled.restart_frozen(10.0)
+    assert quotes.evaluate(compiled, 11.0, trading) == []
+    assert quotes.evaluate(compiled, 12.5, trading) == ["frozen 2"]
+
+
+def test_change_needs_history_covering_window():
+    quotes = Quotes()
+    compiled = CompiledRules([rule("BBB", "change 1% 10")], SYMBOLS)
+    quotes.tick("BBB", 100.0, 1.00)
+    quotes.tick("BBB", 105.0, 1.02)
+    # 報價歷史只有 5 秒，不足以判斷 10 秒的漲跌
+    assert quotes.evaluate(compiled, 105.0) == []
+    quotes.tick("BBB", 111.0, 1.03)
+    assert quotes.evaluate(compiled, 111.0) == ["change 1% 10"]
+
+
+def test_change_with_short_buffer_stays_silent():
+    quotes = Quotes(capacity=4)
+    compiled = CompiledRules([rule("BBB", "change 1% 10")], SYMBOLS)
+    quotes.tick("BBB", 100.0, 1.00)
+    for now in range(101, 112):
+        quotes.tick("BBB", float(now), 1.00 + (now - 100) * 0.001)
+    # 最舊的一筆在 108 秒，期間起點 101 秒的價格已被覆寫
+    assert np.isnan(quotes.history.bids_at([1], 101000)[0])
+    assert quotes.evaluate(compiled, 111.0) == []
+
+
+def test_change_direction():
+    quotes = Quotes()
+    compiled = CompiledRules([rule("BBB", "change +1% 5"), rule("BBB", "change -1% 5")], SYMBOLS)
+    quotes.tick("BBB", 100.0, 1.00)
+    quotes.tick("BBB", 105.0, 0.98)
+    assert quotes.evaluate(compiled, 105.0) == ["change -1% 5"]
+
+
+def test_on_fires_for_new_quotes_only():
+    quotes = Quotes()
+    quotes.tick("AAA", 1.0, 1.0)
+    compiled = CompiledRules([rule("AAA", "ON")], SYMBOLS, quotes.snapshot.version)
+    assert quotes.evaluate(compiled, 1.0) == []
+    quotes.tick("AAA", 2.0, 1.1)
+    assert quotes.evaluate(compiled, 2.0) == ["ON"]
+    assert quotes.evaluate(compiled, 3.0) == []
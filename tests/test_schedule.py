@@ -0,0 +1,70 @@
+import datetime
+from zoneinfo import ZoneInfo
+
+from price_alert.schedule import (DAY_SECONDS, WEEK_SECONDS, CompiledSchedule, ScheduleBook, ScheduleEntry,
+                                  parse_hms)
+
+
+def at(day, hms):
+    """週內秒數：day 為 0-6（星期一為 0）"""
+    return day * DAY_SECONDS + parse_hms(hms)
+
+
+# 星期日 22:00 開市、星期五 21:00 收市，跨越週末
+WEEKLY = ScheduleEntry(6, parse_hms("22:00:00"), 4, parse_hms("21:00:00"), ())
+
+
+def test_session_wraps_around_week_end():
+    schedule = CompiledSchedule(WEEKLY)
+    assert schedule.is_open(at(0, "00:00:00"))
+    assert schedule.is_open(at(2, "12:00:00"))
+    assert schedule.is_open(at(6, "23:59:59"))
+    assert not schedule.is_open(at(4, "21:00:00"))
+    assert not schedule.is_open(at(5, "12:00:00"))
+    assert not schedule.is_open(at(6, "21:59:59"))
+
+
+def test_transition_wraps_to_next_week():
+    schedule = CompiledSchedule(WEEKLY)
+    assert schedule.seconds_to_transition(at(5, "12:00:00")) == at(6, "22:00:00") - at(5, "12:00:00")
+    assert schedule.seconds_to_transition(at(4, "20:00:00")) == 3600
+    # 星期日開市後的下一次轉換在星期五收市
+    position = at(6, "23:00:00")
+    assert schedule.seconds_to_transition(position) == at(4, "21:00:00") + WEEK_SECONDS - position
+
+
+def test_break_across_midnight():
+    entry = WEEKLY._replace(breaks=((parse_hms("23:00:00"), parse_hms("01:00:00")),))
+    schedule = CompiledSchedule(entry)
+    assert schedule.is_open(at(1, "22:59:59"))
+    assert not schedule.is_open(at(1, "23:30:00"))
+    assert not schedule.is_open(at(2, "00:30:00"))
+    assert schedule.is_open(at(2, "01:00:00"))
+    assert schedule.seconds_to_transition(at(1, "23:30:00")) == 5400
+    # 星期日 23:00 的休息跨到下週一 01:00
+    assert schedule.is_open(at(6, "22:30:00"))
+    assert not schedule.is_open(at(6, "23:30:00"))
+    assert not schedule.is_open(at(0, "00:30:00"))
+    assert schedule.is_open(at(0, "01:00:00"))
+
+
+def test_closed_all_week():
+    schedule = CompiledSchedule(ScheduleEntry(0, 0, 0, 0, ()))
+    assert not schedule.is_open(at(2, "12:00:00"))
+    assert schedule.seconds_to_transition(at(2, "12:00:00")) is None
+
+
+def test_schedule_book_caches_until_transition():
+    tz = ZoneInfo("Asia/Shanghai")
+    book = ScheduleBook()
+    book.set_entry("EURUSD", WEEKLY)
+    friday = datetime.datetime(2026, 10, 16, 20, 0, tzinfo=tz)
+    assert book.is_trading("EURUSD", friday)
+    assert book.next_transition("EURUSD", friday) == friday.timestamp() + 3600
+    later = friday + datetime.timedelta(hours=1)
+    assert not book.is_trading("EURUSD", later)
+    # 更換時間表後不沿用舊的快取
+    book.set_entry("EURUSD", WEEKLY._replace(end_time=parse_hms("23:00:00")))
+    assert book.is_trading("EURUSD", later)
+    book.retain([])
+    assert not book.is_trading("EURUSD", later)
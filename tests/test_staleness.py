@@ -0,0 +1,69 @@
+import threading
+
+from price_alert.replay import VirtualClock
+from price_alert.staleness import NEVER, StalenessDetector
+
+
+def make_detector(size=3):
+    clock = VirtualClock(100.0)
+    detector = StalenessDetector(clock)
+    detector.reset(size)
+    assert detector.wait(0) == list(range(size))
+    return clock, detector
+
+
+def test_rows_wake_at_their_deadlines():
+    clock, detector = make_detector()
+    detector.schedule(0, 102.0)
+    detector.schedule(1, 101.0)
+    detector.schedule(2, NEVER)
+    assert detector.next_wake() == 101.0
+    assert detector.wait(0) == []
+    clock.set(101.0)
+    assert detector.wait(0) == [1]
+    clock.set(105.0)
+    assert detector.wait(0) == [0]
+    assert detector.wait(0) == []
+
+
+def test_rescheduled_deadline_replaces_old_entry():
+    clock, detector = make_detector()
+    detector.schedule(0, 101.0)
+    detector.schedule(0, 103.0)
+    clock.set(102.0)
+    assert detector.wait(0) == []
+    clock.set(103.0)
+    assert detector.wait(0) == [0]
+
+
+def test_touch_marks_only_watched_rows():
+    clock, detector = make_detector()
+    detector.schedule(0, NEVER, watch_ticks=True)
+    detector.schedule(1, NEVER)
+    detector.touch([0, 1, 5])
+    assert detector.wait(0) == [0]
+
+
+def test_invalidate_and_reset():
+    clock, detector = make_detector()
+    detector.invalidate([2])
+    assert detector.wait(0) == [2]
+    detector.invalidate()
+    assert detector.wait(0) == [0, 1, 2]
+    detector.schedule(0, 101.0)
+    detector.reset(2)
+    assert detector.wait(0) == [0, 1]
+    clock.set(101.0)
+    assert detector.wait(0) == []
+
+
+def test_wait_timeout_and_close():
+    clock, detector = make_detector()
+    assert detector.wait(timeout=0.01) == []
+    result = []
+    thread = threading.Thread(target=lambda: result.append(detector.wait()))
+    thread.start()
+    detector.close()
+    thread.join(timeout=2.0)
+    assert not thread.is_alive()
+    assert result == [[]]
@@ -0,0 +1,81 @@
+from price_alert.feeds import QuoteFeed, SimulatedFeed, SymbolMeta
+from price_alert.process_feed import ProcessFeed
+from price_alert.replay import VirtualClock
+from price_alert.symbol_cache import SymbolMetaCache
+
+
+class LookupFeed(QuoteFeed):
+    """回傳 metas 中的品種資料並記錄查詢次數"""
+
+    name = "lookup"
+
+    def __init__(self, metas):
+        super().__init__()
+        self.metas = metas
+        self.lookups = []
+
+    def symbol_info(self, symbol):
+        self.lookups.append(symbol)
+        meta = self.metas.get(symbol)
+        if isinstance(meta, Exception):
+            raise meta
+        return meta
+
+
+def meta(symbol, digits=5):
+    return SymbolMeta(symbol, digits, 10 ** -digits, 4)
+
+
+def test_only_missing_or_expired_symbols_are_stale(tmp_path):
+    clock = VirtualClock(1000.0)
+    cache = SymbolMetaCache(str(tmp_path / "cache.json"), ttl=60.0, clock=clock)
+    cache.put("lookup", meta("AAA"))
+    clock.set(1030.0)
+    cache.put("lookup", meta("BBB"))
+    assert cache.stale_symbols("lookup", ["AAA", "BBB", "CCC"]) == ["CCC"]
+    clock.set(1061.0)
+    assert cache.stale_symbols("lookup", ["AAA", "BBB", "CCC"]) == ["AAA", "CCC"]
+    # 過期的值在重新查詢前仍可使用；不同來源的同名品種分開保存
+    assert cache.get("lookup", "AAA") == meta("AAA")
+    assert cache.get("other", "AAA") is None
+
+
+def test_refresh_stores_successful_lookups_only(tmp_path):
+    clock = VirtualClock(1000.0)
+    path = str(tmp_path / "cache.json")
+    cache = SymbolMetaCache(path, ttl=60.0, clock=clock)
+    feed = LookupFeed({"AAA": meta("AAA", 3), "BBB": None, "CCC": RuntimeError("terminal busy")})
+    fetched = cache.refresh(feed, ["AAA", "BBB", "CCC"])
+    assert fetched == {"AAA": meta("AAA", 3)}
+    assert cache.stale_symbols("lookup", ["AAA", "BBB", "CCC"]) == ["BBB", "CCC"]
+    # 保存後重新載入
+    reloaded = SymbolMetaCache(path, ttl=60.0, clock=clock)
+    assert reloaded.get("lookup", "AAA") == meta("AAA", 3)
+    assert reloaded.stale_symbols("lookup", ["AAA"]) == []
+
+
+def test_expired_entry_is_queried_again(tmp_path):
+    clock = VirtualClock(1000.0)
+    cache = SymbolMetaCache(str(tmp_path / "cache.json"), ttl=60.0, clock=clock)
+    feed = LookupFeed({"AAA": meta("AAA", 3)})
+    cache.refresh(feed, cache.stale_symbols("lookup", ["AAA"]))
+    feed.metas["AAA"] = meta("AAA", 2)
+    clock.set(1100.0)
+    cache.refresh(feed, cache.stale_symbols("lookup", ["AAA"]))
+    assert feed.lookups == ["AAA", "AAA"]
+    assert cache.get("lookup", "AAA").digits == 2
+
+
+def test_process_feed_does_not_reuse_earlier_replies():
+    expected = SimulatedFeed().symbol_info("AAA")
+    feed = ProcessFeed("sim", info_timeout=5.0)
+    assert feed.connect()
+    try:
+        feed._info["AAA"] = meta("AAA", 9)
+        feed._info["BBB"] = None
+        infos = feed.symbol_infos(["AAA", "BBB"])
+        assert infos["AAA"] == expected
+        assert infos["BBB"] is not None
+        assert feed._info == {}
+    finally:
+        feed.shutdown()